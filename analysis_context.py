@@ -0,0 +1,148 @@
+import logging
+from typing import Callable, Dict, Optional
+from species_config import get_species_category, get_species_config
+
+logger = logging.getLogger(__name__)
+
+class lazy_property:
+    """Compute an attribute on first access and store it on the instance
+
+    Like functools.cached_property but without the lock it takes around
+    every computation before Python 3.12, which costs more than most of the
+    quantities cached here. Counts computations in `compute_counts`.
+    """
+
+    def __init__(self, func: Callable):
+        self.func = func
+        self.name = func.__name__
+        self.__doc__ = func.__doc__
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        value = self.func(instance)
+        instance.__dict__[self.name] = value
+        counts = instance.compute_counts
+        counts[self.name] = counts.get(self.name, 0) + 1
+        return value
+
+class AnalysisContext:
+    """Per-record cache of derived quantities shared by all analyzers
+
+    Each quantity (category, species config, vital sign deviations, age
+    ratio, weight status, ...) is computed lazily on first access and then
+    reused, so analyzers running on the same record never redo each other's
+    work. Cached quantities are plain instance attributes after the first
+    access. `compute_counts` records how often each quantity was computed.
+    """
+
+    # Cached quantities derived from each record field, besides vital signs
+    # (vital_deviations) and Species (everything)
+    FIELD_DEPENDENCIES = {
+        'Age': ('age_ratio',),
+        'Weight': ('weight_status',)
+    }
+
+    def __init__(self, data: Dict):
+        self.data = data
+        self._values = {}
+        self.compute_counts = {}
+
+    def memo(self, key: str, compute: Callable):
+        """Return the cached value for `key`, computing it on first use"""
+        if key in self._values:
+            return self._values[key]
+        value = compute()
+        self._values[key] = value
+        self.compute_counts[key] = self.compute_counts.get(key, 0) + 1
+        return value
+
+    def invalidate(self, *keys: str) -> None:
+        """Forget cached values so they are recomputed on next access"""
+        for key in keys:
+            self._values.pop(key, None)
+            self.__dict__.pop(key, None)
+
+    def update(self, changes: Dict) -> None:
+        """Apply changed record fields and forget what was derived from them
+
+        memo() entries do not declare the fields they read, so they are
+        always dropped.
+        """
+        self.data.update(changes)
+        if 'Species' in changes:
+            stale = [name for name, attr in vars(AnalysisContext).items()
+                     if isinstance(attr, lazy_property)]
+        else:
+            vital_signs = (self.species_config or {}).get('vital_signs', {})
+            stale = [key for field in changes for key in self.FIELD_DEPENDENCIES.get(field, ())]
+            if any(field in vital_signs for field in changes):
+                stale.append('vital_deviations')
+        self.invalidate(*stale)
+        self._values.clear()
+
+    @lazy_property
+    def species(self) -> Optional[str]:
+        return self.data.get('Species')
+
+    @lazy_property
+    def category(self) -> Optional[str]:
+        return get_species_category(self.species)
+
+    @lazy_property
+    def species_config(self) -> Optional[Dict]:
+        return get_species_config(self.species)
+
+    @lazy_property
+    def vital_deviations(self) -> Dict[str, Dict]:
+        """Value, normal range and relative deviation of each reported vital sign"""
+        deviations = {}
+        species_config = self.species_config or {}
+        for sign, (min_val, max_val) in species_config.get('vital_signs', {}).items():
+            if sign in self.data and self.data[sign]:
+                value = float(self.data[sign])
+                deviation = 0
+
+                if value < min_val:
+                    deviation = (min_val - value) / min_val
+                elif value > max_val:
+                    deviation = (value - max_val) / max_val
+
+                deviations[sign] = {
+                    'value': value,
+                    'range': (min_val, max_val),
+                    'deviation': deviation
+                }
+        return deviations
+
+    @lazy_property
+    def age_ratio(self) -> Optional[float]:
+        """Age as a fraction of the species lifespan (None if lifespan unknown)"""
+        age = float(self.data.get('Age', 0))
+        lifespan = (self.species_config or {}).get('lifespan', 0)
+        if lifespan == 0:
+            return None
+        return age / lifespan
+
+    @lazy_property
+    def weight_status(self) -> Dict:
+        """Weight value, species range, status and relative deviation"""
+        weight = float(self.data.get('Weight', 0))
+        weight_range = (self.species_config or {}).get('weight_range', (0, 0))
+
+        if weight < weight_range[0]:
+            status = 'Underweight'
+            deviation = (weight_range[0] - weight) / weight_range[0]
+        elif weight > weight_range[1]:
+            status = 'Overweight'
+            deviation = (weight - weight_range[1]) / weight_range[1]
+        else:
+            status = 'Normal'
+            deviation = 0
+
+        return {
+            'value': weight,
+            'range': weight_range,
+            'status': status,
+            'deviation': deviation
+        }
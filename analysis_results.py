@@ -0,0 +1,130 @@
+from typing import Optional, Sequence, Tuple
+
+
+class Record:
+    """Compact analysis result: attributes in `__slots__`, no per-instance dict
+
+    Records are built by the analyzers and passed between stages as they
+    are; `to_json` turns them into the response's dict shape only when a
+    response is sent or logged. Fields listed in `OMIT_IF_NONE` are left
+    out of that dict when unset. Records may be shared between requests
+    (constant results), so they are never modified after construction.
+    """
+
+    __slots__ = ()
+    OMIT_IF_NONE: Tuple[str, ...] = ()
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__)
+        return f'{type(self).__name__}({fields})'
+
+
+class VitalSignResult(Record):
+    __slots__ = ('value', 'range', 'status', 'deviation', 'weight', 'severity')
+
+    def __init__(self, value: float, range: Tuple[float, float], status: str, deviation: float,
+                 weight: float, severity: str):
+        self.value = value
+        self.range = range
+        self.status = status
+        self.deviation = deviation
+        self.weight = weight
+        self.severity = severity
+
+
+class WeightAnalysis(Record):
+    __slots__ = ('value', 'range', 'status', 'severity', 'deviation')
+
+    def __init__(self, value: float, range: Tuple[float, float], status: str, severity: str, deviation: float):
+        self.value = value
+        self.range = range
+        self.status = status
+        self.severity = severity
+        self.deviation = deviation
+
+
+class AgeAnalysis(Record):
+    __slots__ = ('status', 'life_stage', 'risk_level', 'concerns')
+    OMIT_IF_NONE = ('life_stage', 'risk_level', 'concerns')
+
+    def __init__(self, status: str, life_stage: Optional[str] = None, risk_level: Optional[str] = None,
+                 concerns: Optional[Sequence[str]] = None):
+        self.status = status
+        self.life_stage = life_stage
+        self.risk_level = risk_level
+        self.concerns = concerns
+
+
+class EnvironmentAnalysis(Record):
+    __slots__ = ('environment', 'risk_level', 'concerns')
+
+    def __init__(self, environment: Optional[str], risk_level: str, concerns: Sequence[str]):
+        self.environment = environment
+        self.risk_level = risk_level
+        self.concerns = concerns
+
+
+class Appropriateness(Record):
+    """How suitable a diet or activity level is for a species"""
+
+    __slots__ = ('appropriateness', 'notes', 'recommendations')
+
+    def __init__(self, appropriateness: str, notes: str, recommendations: Sequence[str]):
+        self.appropriateness = appropriateness
+        self.notes = notes
+        self.recommendations = recommendations
+
+
+class DietAnalysis(Record):
+    __slots__ = ('diet_type', 'appropriateness', 'recommendations')
+
+    def __init__(self, diet_type: Optional[str], appropriateness: Appropriateness, recommendations: Sequence[str]):
+        self.diet_type = diet_type
+        self.appropriateness = appropriateness
+        self.recommendations = recommendations
+
+
+class ActivityAnalysis(Record):
+    __slots__ = ('activity_level', 'appropriateness', 'recommendations')
+
+    def __init__(self, activity_level: Optional[str], appropriateness: Appropriateness,
+                 recommendations: Sequence[str]):
+        self.activity_level = activity_level
+        self.appropriateness = appropriateness
+        self.recommendations = recommendations
+
+
+class Recommendation(Record):
+    __slots__ = ('recommendation', 'urgency')
+
+    def __init__(self, recommendation: str, urgency: str):
+        self.recommendation = recommendation
+        self.urgency = urgency
+
+
+_SCALARS = (str, int, float, bool, type(None))
+
+
+def to_json(value):
+    """The response (JSON) form of a value holding records
+
+    Records become dicts with their fields in declaration order, tuples
+    become lists, dicts and lists are copied with their items converted.
+    Anything else is returned unchanged.
+    """
+    if isinstance(value, _SCALARS):
+        return value
+    if isinstance(value, Record):
+        omit = value.OMIT_IF_NONE
+        result = {}
+        for name in value.__slots__:
+            field = getattr(value, name)
+            if field is None and name in omit:
+                continue
+            result[name] = to_json(field)
+        return result
+    if isinstance(value, dict):
+        return {key: to_json(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_json(item) for item in value]
+    return value
@@ -0,0 +1,72 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set
+import logging
+
+logger = logging.getLogger(__name__)
+
+class SessionNotFound(LookupError):
+    """No live session with the requested ID"""
+
+
+class AnalysisSession:
+    """Last analysis of one animal: its record and every stage output
+
+    `targets` are the stage outputs the session was started for, so a full
+    rerun (e.g. after a species change) computes the same sections;
+    `uncertainty` records whether the session opted into that section.
+    """
+
+    def __init__(self, values: Dict, targets: Optional[Set[str]] = None, uncertainty: bool = False):
+        self.values = values
+        self.targets = targets
+        self.uncertainty = uncertainty
+        self.lock = threading.Lock()
+        self.touched = time.monotonic()
+
+    @property
+    def data(self) -> Dict:
+        return self.values['data']
+
+
+class SessionStore:
+    """In-memory analysis sessions keyed by session or animal ID
+
+    Least recently used sessions are evicted beyond `max_sessions`, and
+    sessions idle for longer than `ttl_seconds` expire.
+    """
+
+    def __init__(self, max_sessions: int = 1000, ttl_seconds: float = 3600):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._sessions: 'OrderedDict[str, AnalysisSession]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> Optional[AnalysisSession]:
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None
+            if now - session.touched > self.ttl_seconds:
+                del self._sessions[session_id]
+                return None
+            session.touched = now
+            self._sessions.move_to_end(session_id)
+            return session
+
+    def put(self, session_id: str, session: AnalysisSession) -> None:
+        with self._lock:
+            self._sessions[session_id] = session
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                evicted, _ = self._sessions.popitem(last=False)
+                logger.info("Evicted analysis session %s", evicted)
+
+    def discard(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def __len__(self) -> int:
+        return len(self._sessions)
@@ -1,24 +1,147 @@
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, request, jsonify, render_template, g
 from flask_cors import CORS
+import hmac
+import math
+import os
 import logging
+import time
+from typing import Dict
 from species_config import (
     get_species_config, get_species_category, get_all_species,
     get_species_vital_ranges, get_species_care_recommendations,
     get_critical_signs, get_environmental_factors
 )
-from species_metrics import SpeciesMetricsAnalyzer
-from disease_analysis import DiseaseAnalyzer
+from prediction_pipeline import (
+    build_prediction, parse_fields,
+    start_session, update_session, sessions, health_analyzer, find_similar_cases,
+    drift_monitor, reference_distributions, score_lookup, metrics_analyzer, disease_analyzer,
+    symptom_analyzer, uncertainty_analyzer, similar_cases as similar_case_index
+)
+from what_if_analysis import what_if
+from analysis_results import to_json
+from config import (
+    SIMILAR_CASES_MAX_K, WHAT_IF_MAX_POINTS, AUDIT_LOG_DIR, AUDIT_QUEUE_SIZE, AUDIT_BATCH_SIZE,
+    AUDIT_FLUSH_SECONDS, AUDIT_SEGMENT_BYTES, AUDIT_ENQUEUE_TIMEOUT,
+    LOG_LEVEL, LOG_JSON, LOG_QUEUE_SIZE, LOG_SAMPLE_BURST, LOG_SAMPLE_INTERVAL,
+    TRACE_SAMPLE_RATE, TRACE_FOLLOW_PARENT, TRACE_DIR, TRACE_FILE_BYTES, TRACE_MAX_FILES,
+    PROFILE_TOKEN, PROFILE_DIR, SAMPLING_PROFILER, SAMPLING_PROFILER_HZ, SAMPLING_PROFILER_WINDOW,
+    MEMORY_TRACKING, MEMORY_SAMPLE_RATE, MEMORY_SNAPSHOT_SECONDS, MEMORY_TRACE_FRAMES, ADMIN_TOKEN,
+    MODEL_PRELOAD
+)
+from analysis_sessions import SessionNotFound
+from utils.audit_log import AuditLog, AuditBacklogFull
+from utils.case_index import CaseIndexNotReady, CaseIndexUnavailable
+from utils.logging_setup import configure_logging
+from utils import tracing
+from utils.profiling import RequestProfile, SamplingProfiler
+from utils.memory_tracking import MemoryTracker, deep_sizeof
 
 app = Flask(__name__)
 CORS(app)
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging once for the whole process (app.py is the WSGI entry point)
+configure_logging(LOG_LEVEL, json_format=LOG_JSON, queue_size=LOG_QUEUE_SIZE,
+                  sample_burst=LOG_SAMPLE_BURST, sample_interval=LOG_SAMPLE_INTERVAL)
 logger = logging.getLogger(__name__)
 
-# Initialize analyzers
-metrics_analyzer = SpeciesMetricsAnalyzer()
-disease_analyzer = DiseaseAnalyzer()
+audit_log = AuditLog(
+    AUDIT_LOG_DIR, max_queue=AUDIT_QUEUE_SIZE, batch_size=AUDIT_BATCH_SIZE,
+    flush_interval=AUDIT_FLUSH_SECONDS, segment_bytes=AUDIT_SEGMENT_BYTES,
+    enqueue_timeout=AUDIT_ENQUEUE_TIMEOUT
+)
+
+tracer = tracing.configure_tracing(TRACE_SAMPLE_RATE, TRACE_DIR, TRACE_FILE_BYTES, TRACE_MAX_FILES,
+                                   follow_parent=TRACE_FOLLOW_PARENT)
+
+sampling_profiler = SamplingProfiler(os.path.join(PROFILE_DIR, 'stacks'), hz=SAMPLING_PROFILER_HZ,
+                                     window=SAMPLING_PROFILER_WINDOW) if SAMPLING_PROFILER else None
+
+@app.before_request
+def preload_models():
+    # In each forked worker, from its first request: a load started before
+    # the fork would leave the child with a held lock
+    if MODEL_PRELOAD:
+        health_analyzer.load_in_background()
+
+@app.before_request
+def start_similar_case_index():
+    # Built in the background from each worker's first request, so the
+    # first similar-case query does not pay for it
+    similar_case_index.start()
+
+@app.before_request
+def start_sampling_profiler():
+    # Started from the first request so it runs in each forked worker
+    if sampling_profiler is not None:
+        sampling_profiler.ensure_started()
+
+memory_tracker = MemoryTracker(MEMORY_TRACKING, frames=MEMORY_TRACE_FRAMES, sample_rate=MEMORY_SAMPLE_RATE,
+                               snapshot_interval=MEMORY_SNAPSHOT_SECONDS)
+memory_tracker.register('health_model', health_analyzer.memory_footprint)
+memory_tracker.register('sessions', lambda: deep_sizeof(sessions))
+memory_tracker.register('similar_cases', lambda: deep_sizeof(similar_case_index))
+memory_tracker.register('score_lookup', lambda: deep_sizeof(score_lookup))
+memory_tracker.register('reference_sketches', lambda: deep_sizeof(reference_distributions))
+memory_tracker.register('drift_monitor', lambda: deep_sizeof(drift_monitor))
+memory_tracker.register('rule_analyzers', lambda: deep_sizeof(
+    metrics_analyzer, disease_analyzer, symptom_analyzer, uncertainty_analyzer))
+
+@app.before_request
+def start_memory_tracking():
+    # Started from the first request so tracemalloc runs in each forked worker
+    memory_tracker.start()
+    g.memory_token = memory_tracker.before_request()
+
+@app.teardown_request
+def record_request_memory(exc):
+    token = g.pop('memory_token', None)
+    if token is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        memory_tracker.after_request(f"{request.method} {route}", token)
+
+def _profile_requested() -> bool:
+    """Whether the request carries a valid X-Profile-Token"""
+    token = request.headers.get('X-Profile-Token')
+    return bool(PROFILE_TOKEN and token and hmac.compare_digest(token, PROFILE_TOKEN))
+
+@app.before_request
+def start_trace():
+    """Root span of a sampled request; stages and model calls nest under it"""
+    if not tracer.enabled:
+        return
+    route = request.url_rule.rule if request.url_rule else request.path
+    root = tracer.start_trace(f"{request.method} {route}", request.headers.get('traceparent'),
+                              **{'http.method': request.method, 'http.route': route})
+    if root is not tracing.NOOP_SPAN:
+        g.trace_span = root.__enter__()
+
+@app.after_request
+def tag_trace(response):
+    root = g.get('trace_span')
+    if root is not None:
+        root.set_attribute('http.status_code', response.status_code)
+        if response.status_code >= 500:
+            root.error = f"HTTP {response.status_code}"
+        response.headers['X-Trace-Id'] = root.trace.trace_id
+    return response
+
+@app.teardown_request
+def end_trace(exc):
+    root = g.pop('trace_span', None)
+    if root is not None:
+        root.__exit__(type(exc) if exc else None, exc, None)
+
+def _flag(value: str) -> bool:
+    return value.lower() in ('1', 'true', 'yes')
+
+def _log_fields(data, start: float, status: int) -> Dict:
+    """Structured log fields for a request (see utils.logging_setup)"""
+    return {
+        'endpoint': request.path,
+        'species': data.get('Species') if isinstance(data, dict) else None,
+        'latency_ms': round((time.perf_counter() - start) * 1000, 2),
+        'status': status
+    }
 
 @app.route('/')
 def landing():
@@ -44,167 +167,195 @@ def get_species_info():
             }
         })
     except Exception as e:
-        logger.error(f"Error getting species info: {str(e)}")
+        logger.error("Error getting species info: %s", e)
         return jsonify({'error': 'Failed to get species information'}), 500
 
 @app.route('/predict', methods=['POST'])
 def predict():
+    start, data = time.perf_counter(), None
     try:
         data = request.get_json()
         if not data:
             raise ValueError("No data provided")
+        tracing.set_attribute('species', data.get('Species'))
+
+        # Optional projection, e.g. ?fields=prediction,diagnostic_insights.health_score
+        fields = parse_fields(request.args.get('fields'))
+
+        # ?uncertainty=1 adds score quantiles and status probabilities under measurement noise
+        uncertainty = request.args.get('uncertainty', type=_flag)
+        if _profile_requested():
+            # Profiled requests score the model in-thread, without micro-batching
+            with RequestProfile('predict') as profile:
+                response = build_prediction(data, fields, uncertainty=uncertainty)
+            profile_path = profile.save(PROFILE_DIR)
+            logger.info("Saved request profile %s", profile_path)
+        else:
+            profile = None
+            response = build_prediction(data, fields, uncertainty=uncertainty)
+        # Analysis records become plain dicts once, for the audit log and the body
+        response = to_json(response)
+
+        audit_log.record('/predict', data, response, {'fields': fields, 'uncertainty': uncertainty})
+        logger.debug("Prediction served", extra=_log_fields(data, start, 200))
+        result = jsonify(response)
+        if profile is not None:
+            result.headers['X-Profile-Id'] = profile.profile_id
+        return result
+
+    except AuditBacklogFull as abf:
+        logger.error("Refusing prediction: %s", abf, extra=_log_fields(data, start, 503))
+        return jsonify({'error': 'Service busy, try again'}), 503
+    except ValueError as ve:
+        logger.warning("Validation error: %s", ve, extra=_log_fields(data, start, 400))
+        return jsonify({'error': str(ve)}), 400
+    except Exception as e:
+        logger.error("Error processing request: %s", e, extra=_log_fields(data, start, 500))
+        return jsonify({'error': 'Internal server error'}), 500
+
+@app.route('/api/sessions/<session_id>', methods=['PUT'])
+def start_analysis_session(session_id):
+    """Analyze a full record and keep the analysis for incremental updates"""
+    try:
+        data = request.get_json()
+        if not data:
+            raise ValueError("No data provided")
+
+        fields = parse_fields(request.args.get('fields'))
+        uncertainty = request.args.get('uncertainty', type=_flag)
+        response = to_json(start_session(session_id, data, fields, uncertainty=uncertainty))
+
+        audit_log.record(f'/api/sessions/{session_id}', data, response,
+                         {'method': 'PUT', 'fields': fields, 'uncertainty': uncertainty})
+        return jsonify(response)
+
+    except AuditBacklogFull as abf:
+        logger.error("Refusing session %s: %s", session_id, abf)
+        return jsonify({'error': 'Service busy, try again'}), 503
+    except ValueError as ve:
+        logger.warning("Validation error: %s", ve)
+        return jsonify({'error': str(ve)}), 400
+    except Exception as e:
+        logger.error("Error starting session %s: %s", session_id, e)
+        return jsonify({'error': 'Internal server error'}), 500
+
+@app.route('/api/sessions/<session_id>', methods=['PATCH'])
+def update_analysis_session(session_id):
+    """Re-score a session after some fields changed, rerunning only affected stages"""
+    try:
+        changes = request.get_json()
+        if not changes:
+            raise ValueError("No data provided")
+
+        fields = parse_fields(request.args.get('fields'))
+        response = to_json(update_session(session_id, changes, fields))
 
-        species = data.get('Species')
-        if not species:
+        # Audit the full record the response was computed from, not just the changes
+        session = sessions.get(session_id)
+        record = dict(session.data) if session is not None else changes
+        audit_log.record(f'/api/sessions/{session_id}', record, response,
+                         {'method': 'PATCH', 'fields': fields, 'changes': changes})
+        return jsonify(response)
+
+    except AuditBacklogFull as abf:
+        logger.error("Refusing session update %s: %s", session_id, abf)
+        return jsonify({'error': 'Service busy, try again'}), 503
+    except SessionNotFound as snf:
+        return jsonify({'error': str(snf)}), 404
+    except ValueError as ve:
+        logger.warning("Validation error: %s", ve)
+        return jsonify({'error': str(ve)}), 400
+    except Exception as e:
+        logger.error("Error updating session %s: %s", session_id, e)
+        return jsonify({'error': 'Internal server error'}), 500
+
+@app.route('/api/sessions/<session_id>', methods=['DELETE'])
+def end_analysis_session(session_id):
+    """Forget a session's stored analysis"""
+    if not sessions.discard(session_id):
+        return jsonify({'error': f"Unknown session: {session_id}"}), 404
+    return '', 204
+
+@app.route('/api/similar-cases', methods=['POST'])
+def similar_cases():
+    """Most similar past cases of the same species, e.g. POST /api/similar-cases?k=5"""
+    try:
+        data = request.get_json()
+        if not data:
+            raise ValueError("No data provided")
+        if not data.get('Species'):
             raise ValueError("Species is required")
 
-        # Get species configuration
-        species_config = get_species_config(species)
-        if not species_config:
-            raise ValueError(f"Unsupported species: {species}")
-
-        # Get species category
-        category = get_species_category(species)
-
-        # Perform species-specific metrics analysis
-        metrics_analysis = metrics_analyzer.analyze_metrics(data)
-        
-        # Analyze disease risks
-        disease_risks = disease_analyzer.analyze_health_risks(data)
-
-        # Get species-specific care recommendations
-        care_recommendations = get_species_care_recommendations(species)
-
-        # Generate comprehensive response
-        response = {
-            'prediction': determine_health_status(metrics_analysis['health_score']),
-            'diagnostic_insights': {
-                'health_score': metrics_analysis['health_score'],
-                'species_category': category,
-                'vital_signs': metrics_analysis['vital_signs'],
-                'weight_analysis': metrics_analysis['weight_analysis'],
-                'age_analysis': metrics_analysis['age_analysis'],
-                'environmental_analysis': metrics_analysis['environmental_analysis'],
-                'diet_analysis': metrics_analysis['diet_analysis'],
-                'activity_analysis': metrics_analysis['activity_analysis'],
-                'risk_level': metrics_analysis['risk_level']
-            },
-            'disease_risks': disease_risks,
-            'recommendations': generate_recommendations(
-                data, 
-                metrics_analysis,
-                disease_risks,
-                species_config,
-                care_recommendations
-            )
-        }
-
-        logger.info(f"Generated prediction for {species}")
+        k = request.args.get('k', 5, type=int)
+        if not 1 <= k <= SIMILAR_CASES_MAX_K:
+            raise ValueError(f"k must be between 1 and {SIMILAR_CASES_MAX_K}")
+
+        response = find_similar_cases(data, k)
+        if response is None:
+            return jsonify({'error': f"No past cases for species: {data['Species']}"}), 404
         return jsonify(response)
 
+    except CaseIndexNotReady as nr:
+        return jsonify({'error': f"{nr}, try again"}), 503, {'Retry-After': '1'}
+    except CaseIndexUnavailable as ua:
+        return jsonify({'error': str(ua)}), 503, {'Retry-After': str(max(1, math.ceil(ua.retry_after)))}
     except ValueError as ve:
-        logger.warning(f"Validation error: {str(ve)}")
+        logger.warning("Validation error: %s", ve)
         return jsonify({'error': str(ve)}), 400
     except Exception as e:
-        logger.error(f"Error processing request: {str(e)}")
+        logger.error("Error finding similar cases: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
-def determine_health_status(health_score):
-    """Determine health status based on score"""
-    if health_score >= 90:
-        return {
-            'status': 'Healthy',
-            'description': 'Overall health is excellent',
-            'confidence': 'High'
-        }
-    elif health_score >= 75:
-        return {
-            'status': 'Minor Issue',
-            'description': 'Minor health concerns present',
-            'confidence': 'Medium'
-        }
-    elif health_score >= 60:
-        return {
-            'status': 'Requires Treatment',
-            'description': 'Medical attention recommended',
-            'confidence': 'Medium'
-        }
-    return {
-        'status': 'Critical',
-        'description': 'Immediate veterinary care needed',
-        'confidence': 'High'
-    }
+@app.route('/api/what-if', methods=['POST'])
+def what_if_sweep():
+    """Health score and status curve as one or two fields vary over a range"""
+    try:
+        data = request.get_json()
+        if not data:
+            raise ValueError("No data provided")
+        if 'record' not in data or 'sweep' not in data:
+            raise ValueError("record and sweep are required")
+
+        return jsonify(what_if(data['record'], data['sweep'], WHAT_IF_MAX_POINTS))
+
+    except ValueError as ve:
+        logger.warning("Validation error: %s", ve)
+        return jsonify({'error': str(ve)}), 400
+    except Exception as e:
+        logger.error("Error running what-if sweep: %s", e)
+        return jsonify({'error': 'Internal server error'}), 500
+
+@app.route('/api/metrics/inference', methods=['GET'])
+def inference_metrics():
+    """Micro-batcher batch sizes and queueing delay, species model pool counters"""
+    pool = health_analyzer.species_pool
+    return jsonify({
+        'batching': health_analyzer.batcher.stats(),
+        'species_models': pool.stats() if pool is not None else None,
+        'audit_log': audit_log.stats(),
+        'sampling_profiler': sampling_profiler.stats() if sampling_profiler is not None else None
+    })
 
-def generate_recommendations(data, metrics_analysis, disease_risks, species_config, care_recommendations):
-    """Generate comprehensive recommendations"""
+@app.route('/api/metrics/drift', methods=['GET'])
+def drift_metrics():
+    """PSI and KS of live features against the training distribution, per species"""
     try:
-        recommendations = {
-            'immediate_actions': [],
-            'lifestyle_changes': [],
-            'monitoring_plan': [],
-            'veterinary_care': []
-        }
-
-        # Add recommendations based on metrics analysis
-        if metrics_analysis['risk_level'] == 'High':
-            recommendations['immediate_actions'].extend([
-                {
-                    'recommendation': "Schedule immediate veterinary consultation",
-                    'urgency': 'High'
-                },
-                {
-                    'recommendation': "Monitor vital signs closely",
-                    'urgency': 'High'
-                }
-            ])
-
-        # Add weight-related recommendations
-        weight_analysis = metrics_analysis.get('weight_analysis', {})
-        if weight_analysis.get('status') != 'Normal':
-            recommendations['lifestyle_changes'].extend([
-                {
-                    'recommendation': rec,
-                    'urgency': weight_analysis.get('severity', 'Medium')
-                } for rec in weight_analysis.get('recommendations', [])
-            ])
-
-        # Add age-specific recommendations
-        age_analysis = metrics_analysis.get('age_analysis', {})
-        if age_analysis.get('specific_concerns'):
-            recommendations['monitoring_plan'].extend([
-                {
-                    'recommendation': concern,
-                    'urgency': age_analysis.get('risk_level', 'Medium')
-                } for concern in age_analysis['specific_concerns']
-            ])
-
-        # Add environmental recommendations
-        env_analysis = metrics_analysis.get('environmental_analysis', {})
-        if env_analysis.get('risk_level') in ['High', 'Moderate']:
-            recommendations['lifestyle_changes'].extend([
-                {
-                    'recommendation': concern,
-                    'urgency': env_analysis['risk_level']
-                } for concern in env_analysis.get('concerns', [])
-            ])
-
-        # Add species-specific care recommendations
-        for care in care_recommendations:
-            recommendations['veterinary_care'].append({
-                'recommendation': care,
-                'urgency': 'Medium'
-            })
-
-        return recommendations
+        return jsonify(drift_monitor.report())
+    except Exception as e:
+        logger.error("Error getting drift report: %s", e)
+        return jsonify({'error': 'Internal server error'}), 500
 
+@app.route('/api/admin/memory', methods=['GET'])
+def memory_report():
+    """Process memory, model and cache sizes, and allocation sites per endpoint"""
+    token = request.headers.get('X-Admin-Token')
+    if not (ADMIN_TOKEN and token and hmac.compare_digest(token, ADMIN_TOKEN)):
+        return jsonify({'error': 'Forbidden'}), 403
+    try:
+        return jsonify(memory_tracker.report())
     except Exception as e:
-        logger.error(f"Error generating recommendations: {str(e)}")
-        return {
-            'immediate_actions': [{'recommendation': "Contact veterinarian", 'urgency': 'High'}],
-            'lifestyle_changes': [],
-            'monitoring_plan': [],
-            'veterinary_care': []
-        }
+        logger.error("Error building memory report: %s", e)
+        return jsonify({'error': 'Internal server error'}), 500
 
 if __name__ == '__main__':
     app.run(debug=True) 
\ No newline at end of file
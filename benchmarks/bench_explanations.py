@@ -0,0 +1,55 @@
+"""Cost of per-prediction explanations versus plain predict_proba
+
+Needs a trained model (python train_model.py). Compares the forest's own
+predict_proba with ForestExplainer.explain, which returns the same
+probabilities plus per-feature contributions, for a few batch sizes.
+
+    python benchmarks/bench_explanations.py
+"""
+import argparse
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from train_model import TRAINING_DATA_PATH, MODEL_FILE, SCALER_FILE, LABEL_ENCODERS_FILE, prepare_data
+from utils.tree_explainer import ForestExplainer
+
+def ms_per_call(func, repeats):
+    func()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func()
+    return (time.perf_counter() - start) / repeats * 1000
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeats', type=int, default=50)
+    args = parser.parse_args()
+
+    model = joblib.load(MODEL_FILE)
+    scaler = joblib.load(SCALER_FILE)
+    X, _, _ = prepare_data(pd.read_csv(TRAINING_DATA_PATH), joblib.load(LABEL_ENCODERS_FILE))
+    X = scaler.transform(X)
+
+    start = time.perf_counter()
+    explainer = ForestExplainer(model)
+    print(f"built contribution tables for {len(model.estimators_)} trees "
+          f"in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    probabilities, contributions = explainer.explain(X)
+    error = np.abs(probabilities - model.predict_proba(X)).max()
+    print(f"max |probability - predict_proba| = {error:.1e}, "
+          f"max |bias + contributions - probability| = "
+          f"{np.abs(explainer.bias + contributions.sum(axis=1) - probabilities).max():.1e}")
+
+    for batch_size in (1, 32, 256):
+        batch = X[:batch_size]
+        proba_ms = ms_per_call(lambda: model.predict_proba(batch), args.repeats)
+        explain_ms = ms_per_call(lambda: explainer.explain(batch), args.repeats)
+        print(f"batch {batch_size:>4}: predict_proba {proba_ms:7.2f} ms   explain {explain_ms:7.2f} ms")
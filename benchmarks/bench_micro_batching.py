@@ -0,0 +1,65 @@
+"""Throughput and latency of concurrent model predictions with micro-batching
+
+Needs a trained model (python train_model.py). Runs N client threads that
+each score records back to back through HealthAnalyzer, once with batching
+disabled (max batch size 1) and once with the configured batcher.
+
+    python benchmarks/bench_micro_batching.py --clients 16 --requests 50
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from health_analysis import HealthAnalyzer
+from train_model import TRAINING_DATA_PATH
+
+def run_clients(analyzer, records, clients, requests):
+    latencies = [[] for _ in range(clients)]
+
+    def client(index):
+        for i in range(requests):
+            record = records[(index * requests + i) % len(records)]
+            start = time.perf_counter()
+            analyzer.predict_health_status(record)
+            latencies[index].append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    all_latencies = np.concatenate(latencies) * 1000
+    return clients * requests / elapsed, np.percentile(all_latencies, 50), np.percentile(all_latencies, 99)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=50)
+    args = parser.parse_args()
+
+    records = pd.read_csv(TRAINING_DATA_PATH, nrows=1000).to_dict('records')
+    analyzer = HealthAnalyzer()
+    analyzer.ensure_loaded()
+    if analyzer.models['base'] is None:
+        sys.exit("No trained model found, run train_model.py first")
+
+    configured = analyzer.batcher.max_batch_size
+    for label, batch_size in (('unbatched', 1), ('micro-batched', configured)):
+        analyzer.batcher.max_batch_size = batch_size
+        analyzer.predict_health_status(records[0])  # warm up
+        analyzer.batcher.reset_stats()
+        throughput, p50, p99 = run_clients(analyzer, records, args.clients, args.requests)
+        stats = analyzer.batcher.stats()
+        print(f"{label:<14} {throughput:8.1f} req/s  p50 {p50:7.1f} ms  p99 {p99:7.1f} ms  "
+              f"mean batch {stats['mean_batch_size']:5.1f}  "
+              f"queue p99 {stats['queue_delay_ms']['p99']:7.1f} ms")
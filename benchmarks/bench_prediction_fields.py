@@ -0,0 +1,58 @@
+"""CPU cost of /predict with and without field projection
+
+Runs the prediction pipeline in-process (no HTTP) so the numbers reflect the
+analysis stages only.
+
+    python benchmarks/bench_prediction_fields.py --iterations 20000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from prediction_pipeline import build_prediction, health_analyzer, parse_fields
+
+SAMPLE_RECORD = {
+    'Species': 'Dog',
+    'Age': 9,
+    'Weight': 31,
+    'heart_rate': 150,
+    'respiratory_rate': 24,
+    'temperature': 39.6,
+    'Diet_Type': 'Basic Commercial',
+    'Activity_Level': 'Moderate',
+    'Living_Environment': 'Mixed',
+    'Vaccination_Status': 'Up to Date'
+}
+
+SCENARIOS = [
+    ('full response', None),
+    ('prediction + health_score', 'prediction,diagnostic_insights.health_score'),
+    ('diagnostic_insights', 'prediction,diagnostic_insights'),
+    ('disease_risks only', 'disease_risks')
+]
+
+def cpu_us_per_request(fields, iterations, repeats=5):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.process_time()
+        for _ in range(iterations):
+            build_prediction(SAMPLE_RECORD, fields)
+        best = min(best, time.process_time() - start)
+    return best / iterations * 1e6
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=20000)
+    args = parser.parse_args()
+    health_analyzer.ensure_loaded()
+
+    baseline = None
+    for name, fields_param in SCENARIOS:
+        fields = parse_fields(fields_param)
+        build_prediction(SAMPLE_RECORD, fields)  # warm up
+        cost = cpu_us_per_request(fields, args.iterations)
+        baseline = baseline or cost
+        print(f"{name:<28} {cost:8.1f} us/request  ({(1 - cost / baseline) * 100:5.1f}% saved)")
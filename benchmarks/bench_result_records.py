@@ -0,0 +1,96 @@
+"""Memory and allocations per scored animal: result records versus their JSON dicts
+
+Scores records from the training data with the species metrics analyzer and
+the recommendation step, keeps every result alive, and reports per animal
+the bytes and blocks still allocated (tracemalloc), the CPU time and the gen0
+garbage collections. The same run keeping the `to_json` form instead (the
+response shape, which the analyzers used to build directly) is measured
+alongside.
+
+    python benchmarks/bench_result_records.py --records 2000
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from analysis_context import AnalysisContext
+from analysis_results import to_json
+from prediction_pipeline import generate_recommendations, metrics_analyzer
+from species_config import get_species_care_recommendations
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                         'data', 'training_data.csv')
+
+def load_records(count):
+    """Training records with a species configuration"""
+    records = pd.read_csv(DATA_PATH, nrows=count).to_dict('records')
+    # Missing values as None, vital signs under the names the analyzers read
+    records = [{key.lower() if key in ('Heart_Rate', 'Respiratory_Rate', 'Temperature') else key:
+                None if isinstance(value, float) and value != value else value
+                for key, value in record.items()} for record in records]
+    return [record for record in records if AnalysisContext(record).species_config]
+
+def care_for(species):
+    # As the pipeline's care stage, which falls back to no care items
+    try:
+        return get_species_care_recommendations(species)
+    except KeyError:
+        return []
+
+def score(record):
+    context = AnalysisContext(record)
+    analysis = metrics_analyzer.analyze_metrics(record, context=context)
+    care = care_for(context.species)
+    return analysis, generate_recommendations(record, analysis, [], context.species_config, care)
+
+def measure(build, items):
+    """Retained bytes and blocks, CPU microseconds and gen0 collections per item of `build`"""
+    gc.collect()
+    collections = gc.get_stats()[0]['collections']
+    start = time.process_time()
+    results = [build(item) for item in items]
+    elapsed = time.process_time() - start
+    gen0 = gc.get_stats()[0]['collections'] - collections
+    del results
+
+    # Allocations are counted in a second pass: tracemalloc slows the first down
+    gc.collect()
+    tracemalloc.start()
+    start_blocks = sys.getallocatedblocks()
+    results = [build(item) for item in items]
+    retained_bytes = tracemalloc.get_traced_memory()[0]
+    retained_blocks = sys.getallocatedblocks() - start_blocks
+    tracemalloc.stop()
+    return results, {
+        'bytes': retained_bytes / len(items),
+        'blocks': retained_blocks / len(items),
+        'cpu_us': elapsed / len(items) * 1e6,
+        'gen0': gen0
+    }
+
+def report(name, stats):
+    print(f"{name:<22} {stats['bytes']:7.0f} B/animal {stats['blocks']:6.1f} blocks/animal "
+          f"{stats['cpu_us']:7.1f} us/animal {stats['gen0']:5d} gen0 GCs")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--records', type=int, default=2000)
+    args = parser.parse_args()
+
+    records = load_records(args.records)
+    for record in records[:50]:
+        score(record)  # warm per-species caches so they are not counted
+
+    results, records_stats = measure(score, records)
+    report('records', records_stats)
+    _, dict_stats = measure(lambda record: to_json(score(record)), records)
+    report('records + to_json', dict_stats)
+    print(f"records hold {1 - records_stats['bytes'] / dict_stats['bytes']:.0%} fewer bytes and "
+          f"{1 - records_stats['blocks'] / dict_stats['blocks']:.0%} fewer blocks per animal than the dict shape")
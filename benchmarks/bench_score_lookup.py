@@ -0,0 +1,73 @@
+"""Rule-based health score: full computation versus lookup tables
+
+Scores random records of every species both ways, reports the largest
+difference against the configured error bound, the per-record time and
+the table sizes.
+
+    python benchmarks/bench_score_lookup.py --records 2000 --max-error 0.05
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis_context import AnalysisContext
+from health_score_lookup import HealthScoreLookup
+from species_config import get_all_species, get_species_config
+from species_metrics import SpeciesMetricsAnalyzer
+
+ENVIRONMENTS = ['Indoor Only', 'Outdoor Only', 'Mixed', 'Controlled Environment']
+
+def random_records(species, count, rng):
+    config = get_species_config(species)
+    weight_range, lifespan = config['weight_range'], config['lifespan']
+    records = []
+    for _ in range(count):
+        record = {
+            'Species': species,
+            'Weight': float(rng.uniform(0, weight_range[1] * 1.5)),
+            'Age': float(rng.uniform(0, lifespan * 1.2)),
+            'Living_Environment': ENVIRONMENTS[rng.integers(len(ENVIRONMENTS))]
+        }
+        for sign, (min_val, max_val) in config['vital_signs'].items():
+            record[sign] = float(rng.uniform(min_val * 0.5, max_val * 1.5))
+        records.append(record)
+    return records
+
+def exact_score(analyzer, record):
+    context = AnalysisContext(record)
+    analysis = {section: analyzer.analyze_section(section, context) for section in analyzer.CORE_SECTIONS}
+    return analyzer.summarize(analysis, context.category)['health_score']
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--records', type=int, default=2000, help='records per species')
+    parser.add_argument('--max-error', type=float, default=0.05)
+    args = parser.parse_args()
+
+    analyzer = SpeciesMetricsAnalyzer()
+    lookup = HealthScoreLookup(analyzer, max_error=args.max_error)
+    rng = np.random.default_rng(0)
+    records = [record for species in get_all_species() for record in random_records(species, args.records, rng)]
+
+    start = time.perf_counter()
+    for species in get_all_species():
+        lookup.table_for(species)
+    print(f"built {len(lookup.tables)} tables ({sum(len(t) for t in lookup.tables.values())} cells) "
+          f"in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    start = time.perf_counter()
+    exact = [exact_score(analyzer, record) for record in records]
+    exact_us = (time.perf_counter() - start) / len(records) * 1e6
+
+    start = time.perf_counter()
+    tabulated = [lookup.score(record) for record in records]
+    lookup_us = (time.perf_counter() - start) / len(records) * 1e6
+
+    error = np.abs(np.array(exact) - np.array(tabulated)).max()
+    print(f"max |lookup - exact| = {error:.4f} (bound {args.max_error})")
+    print(f"exact {exact_us:6.1f} us/record   lookup {lookup_us:6.1f} us/record")
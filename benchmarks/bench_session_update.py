@@ -0,0 +1,48 @@
+"""CPU cost of incremental session updates versus a full /predict
+
+Changes one field at a time on a stored session (in-process, no HTTP) and
+reports the CPU per update next to a full re-analysis of the same record.
+
+    python benchmarks/bench_session_update.py --iterations 20000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from prediction_pipeline import build_prediction, health_analyzer, start_session, update_session
+from bench_prediction_fields import SAMPLE_RECORD
+
+UPDATES = [
+    ('temperature', (39.6, 40.4)),
+    ('Weight', (31, 36)),
+    ('Diet_Type', ('Basic Commercial', 'Raw')),
+    ('Vaccination_Status', ('Up to Date', 'Overdue'))
+]
+
+def cpu_us(func, iterations, repeats=5):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.process_time()
+        for i in range(iterations):
+            func(i)
+        best = min(best, time.process_time() - start)
+    return best / iterations * 1e6
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=20000)
+    args = parser.parse_args()
+    health_analyzer.ensure_loaded()
+
+    full = cpu_us(lambda i: build_prediction(SAMPLE_RECORD), args.iterations)
+    print(f"{'full /predict':<28} {full:8.1f} us/request")
+
+    for field, (first, second) in UPDATES:
+        start_session('bench', SAMPLE_RECORD)
+        stages = update_session('bench', {field: second})['recomputed_stages']
+        cost = cpu_us(lambda i: update_session('bench', {field: first if i % 2 else second}),
+                      args.iterations)
+        print(f"{'PATCH ' + field:<28} {cost:8.1f} us/request  reruns {', '.join(stages) or 'nothing'}")
@@ -0,0 +1,53 @@
+"""Similar-case lookup latency, exact ball tree versus clustered index
+
+Enlarges one species' training cases with jittered copies, builds both
+index kinds over them and measures per-query latency and the clustered
+index's recall of the exact top k.
+
+    python benchmarks/bench_similar_cases.py --species Dog --copies 300
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from train_model import TRAINING_DATA_PATH
+from utils.case_index import NUMERIC_COLUMNS, SpeciesCaseIndex
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--species', default='Dog')
+    parser.add_argument('--copies', type=int, default=300)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('-k', type=int, default=10)
+    args = parser.parse_args()
+
+    df = pd.read_csv(TRAINING_DATA_PATH)
+    cases = pd.concat([df[df['Species'] == args.species]] * args.copies, ignore_index=True)
+    rng = np.random.default_rng(0)
+    for column in NUMERIC_COLUMNS:
+        cases[column] *= 1 + rng.normal(0, 0.05, len(cases))
+    queries = cases.sample(args.queries, random_state=1).to_dict('records')
+    print(f"{len(cases)} {args.species} cases")
+
+    indexes = {}
+    for label, approximate_above in (('ball tree', len(cases)), ('clustered', 0)):
+        start = time.perf_counter()
+        indexes[label] = SpeciesCaseIndex(cases, approximate_above=approximate_above)
+        build_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        for record in queries:
+            indexes[label].query(record, args.k)
+        query_ms = (time.perf_counter() - start) / len(queries) * 1000
+        print(f"{label:<10} build {build_ms:8.0f} ms   query {query_ms:6.2f} ms")
+
+    recall = np.mean([
+        len({d for d, _ in indexes['ball tree'].query(r, args.k)} & {d for d, _ in indexes['clustered'].query(r, args.k)}) / args.k
+        for r in queries
+    ])
+    print(f"clustered recall@{args.k}: {recall:.3f}")
@@ -0,0 +1,95 @@
+"""Cold start check: a fresh process must serve the rule-based API within a time budget
+
+    python benchmarks/check_cold_start.py --budget 1.5 --runs 3
+
+Each run starts a new interpreter, imports the app and sends a species-info
+request and a rule-based /predict (no model sections). The time from
+process start to the second response is compared with the budget (median
+of the runs). Up to the second response, neither importing the app nor
+serving the requests may import scikit-learn, scipy, pandas or joblib.
+Imports made by background (daemon) threads do not count. The runs set
+MODEL_PRELOAD=0: the preload thread would import those modules first and
+hide an import on the serving path. Exits non-zero on failure.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.startup_timing import HEAVY_MODULES, REPO_DIR
+
+RECORD = {
+    'Species': 'Dog', 'Breed': 'Labrador', 'Age': 5, 'Weight': 30, 'heart_rate': 100,
+    'respiratory_rate': 20, 'temperature': 38.5, 'Living_Environment': 'Urban'
+}
+RULE_FIELDS = 'diagnostic_insights,disease_risks,recommendations'
+
+CHILD = f"""
+import json, sys, threading, time
+
+class HeavyImportWatch:
+    # Records heavy modules imported outside background (daemon) threads
+    found = set()
+
+    def find_spec(self, name, path=None, target=None):
+        top = name.split('.')[0]
+        if top in {HEAVY_MODULES!r} and not threading.current_thread().daemon:
+            self.found.add(top)
+        return None
+
+watch = HeavyImportWatch()
+sys.meta_path.insert(0, watch)
+from app import app
+imported = time.time()
+client = app.test_client()
+assert client.get('/api/species-info').status_code == 200
+response = client.post('/predict?fields={RULE_FIELDS}', json={RECORD!r})
+assert response.status_code == 200, response.get_data(as_text=True)
+served = time.time()
+print(json.dumps({{'imported': imported, 'served': served, 'heavy_when_served': sorted(watch.found)}}))
+sys.stdout.flush()
+"""
+
+
+def cold_start() -> dict:
+    started = time.time()
+    env = dict(os.environ, MODEL_PRELOAD='0')
+    result = subprocess.run([sys.executable, '-c', CHILD], cwd=REPO_DIR, env=env,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"cold start run failed:\n{result.stderr[-2000:]}")
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    return {
+        'import_s': timings['imported'] - started,
+        'serving_s': timings['served'] - started,
+        'heavy_when_served': timings['heavy_when_served']
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--budget', type=float, default=1.5, help='Seconds from process start to serving')
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    runs = [cold_start() for _ in range(args.runs)]
+    for run in runs:
+        print(f"import {run['import_s']:.3f} s, serving {run['serving_s']:.3f} s")
+    median = statistics.median(run['serving_s'] for run in runs)
+    heavy = sorted({name for run in runs for name in run['heavy_when_served']})
+
+    failures = []
+    if median > args.budget:
+        failures.append(f"median time to serve {median:.3f} s exceeds the {args.budget:.3f} s budget")
+    if heavy:
+        failures.append(f"heavy modules imported before serving: {', '.join(heavy)}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print(f"OK: serving after {median:.3f} s (budget {args.budget:.3f} s)")
@@ -0,0 +1,38 @@
+"""Show how often each derived quantity is computed for one record
+
+Runs every analyzer (metrics, species health, disease risks) against a shared
+AnalysisContext and prints the per-quantity compute counts, which should all
+be 1.
+
+    python benchmarks/profile_analysis_context.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis_context import AnalysisContext
+from disease_analysis import DiseaseAnalyzer
+from species_analysis import SpeciesHealthAnalyzer
+from species_metrics import SpeciesMetricsAnalyzer
+
+SAMPLE_RECORD = {
+    'Species': 'Dog',
+    'Age': 10,
+    'Weight': 95,
+    'heart_rate': 150,
+    'respiratory_rate': 24,
+    'temperature': 39.6,
+    'Diet_Type': 'Basic Commercial',
+    'Activity_Level': 'Sedentary',
+    'Living_Environment': 'Outdoor Only'
+}
+
+if __name__ == '__main__':
+    context = AnalysisContext(SAMPLE_RECORD)
+    SpeciesMetricsAnalyzer().analyze_metrics(SAMPLE_RECORD, context=context)
+    SpeciesHealthAnalyzer().analyze_health(SAMPLE_RECORD, context=context)
+    DiseaseAnalyzer().analyze_health_risks(SAMPLE_RECORD, context=context)
+
+    for key, count in sorted(context.compute_counts.items()):
+        print(f"{key:<40} computed {count}x")
@@ -5,6 +5,133 @@ STATIC_DIR = os.path.join(BASE_DIR, 'static')
 MODEL_PATH = os.path.join(BASE_DIR, 'models', 'model.pkl')
 DATASET_PATH = os.path.join(BASE_DIR, 'data', 'veterinary_data.csv')
 METRICS_PATH = os.path.join(BASE_DIR, 'models', 'metrics.json')
+DATASET_CACHE_DIR = os.path.join(BASE_DIR, 'data', 'cache')
+# Optional visit date column of the dataset, for load_data(date_range=...).
+# The generated dataset has none; date filters raise ValueError without it.
+DATASET_DATE_COLUMN = os.environ.get('DATASET_DATE_COLUMN') or None
+
+# Incremental re-scoring sessions (PUT/PATCH /api/sessions/<id>)
+SESSION_MAX_COUNT = int(os.environ.get('SESSION_MAX_COUNT', 1000))
+SESSION_TTL_SECONDS = float(os.environ.get('SESSION_TTL_SECONDS', 3600))
+
+# Micro-batching of concurrent model predictions
+INFERENCE_BATCH_MAX_SIZE = int(os.environ.get('INFERENCE_BATCH_MAX_SIZE', 32))
+INFERENCE_BATCH_MAX_DELAY = float(os.environ.get('INFERENCE_BATCH_MAX_DELAY_MS', 2)) / 1000
+MODEL_STAGE_TIMEOUT = float(os.environ.get('MODEL_STAGE_TIMEOUT_MS', 500)) / 1000
+
+# Per-species models are loaded on first use and evicted LRU beyond this budget
+SPECIES_MODEL_MEMORY_BUDGET = int(os.environ.get('SPECIES_MODEL_MEMORY_MB', 512)) * 1024 * 1024
+
+# Similar past cases (/api/similar-cases), indexed per species from the training data
+SIMILAR_CASES_DATA_PATH = os.path.join(BASE_DIR, 'data', 'training_data.csv')
+SIMILAR_CASES_MAX_K = int(os.environ.get('SIMILAR_CASES_MAX_K', 50))
+SIMILAR_CASES_REFRESH_SECONDS = float(os.environ.get('SIMILAR_CASES_REFRESH_SECONDS', 5))
+
+# Answer rule-based health scores from precomputed per-species tables,
+# within HEALTH_SCORE_MAX_ERROR points of the full computation
+HEALTH_SCORE_LOOKUP = os.environ.get('HEALTH_SCORE_LOOKUP', '').lower() in ('1', 'true', 'yes')
+HEALTH_SCORE_MAX_ERROR = float(os.environ.get('HEALTH_SCORE_MAX_ERROR', 0.05))
+
+# Most points a /api/what-if sweep may score
+WHAT_IF_MAX_POINTS = int(os.environ.get('WHAT_IF_MAX_POINTS', 10000))
+
+# Measurement noise per instrument for health score uncertainty bands
+# (/predict?uncertainty=1): a normal error with standard deviation `sd`
+# plus `relative_sd` times the reading
+INSTRUMENT_NOISE = {
+    'digital_thermometer': {'sd': 0.1},
+    'infrared_thermometer': {'sd': 0.5},
+    'manual_count': {'relative_sd': 0.08},
+    'pulse_oximeter': {'relative_sd': 0.02},
+    'ecg_monitor': {'sd': 1.0},
+    'scale': {'relative_sd': 0.01},
+    'weight_tape': {'relative_sd': 0.1}
+}
+# Instrument assumed for each field unless the record's Instruments says otherwise
+DEFAULT_INSTRUMENTS = {
+    'temperature': 'digital_thermometer',
+    'heart_rate': 'manual_count',
+    'respiratory_rate': 'manual_count',
+    'Weight': 'scale'
+}
+UNCERTAINTY_SAMPLES = int(os.environ.get('UNCERTAINTY_SAMPLES', 2000))
+
+# Per-species population percentiles of submitted vitals, from streaming
+# quantile sketches each worker persists to REFERENCE_SKETCH_DIR
+REFERENCE_SKETCH_DIR = os.environ.get('REFERENCE_SKETCH_DIR', os.path.join(BASE_DIR, 'data', 'reference_sketches'))
+REFERENCE_SKETCH_K = int(os.environ.get('REFERENCE_SKETCH_K', 200))
+REFERENCE_PERSIST_SECONDS = float(os.environ.get('REFERENCE_PERSIST_SECONDS', 60))
+# Percentiles are reported once a population has this many values
+REFERENCE_MIN_COUNT = int(os.environ.get('REFERENCE_MIN_COUNT', 30))
+REFERENCE_MAX_BREEDS = int(os.environ.get('REFERENCE_MAX_BREEDS', 50))
+
+# Drift monitor (/api/metrics/drift): live feature histograms compared with
+# the training snapshot every DRIFT_CHECK_SECONDS, per species once it has
+# DRIFT_MIN_COUNT live records
+DRIFT_REFERENCE_PATH = os.path.join(BASE_DIR, 'models', 'drift_reference.pkl')
+DRIFT_CHECK_SECONDS = float(os.environ.get('DRIFT_CHECK_SECONDS', 60))
+DRIFT_MIN_COUNT = int(os.environ.get('DRIFT_MIN_COUNT', 100))
+
+# Prediction audit log: inputs and outputs written in batches by a
+# background thread to gzip NDJSON segments (see read_audit_log.py)
+AUDIT_LOG_DIR = os.environ.get('AUDIT_LOG_DIR', os.path.join(BASE_DIR, 'data', 'audit'))
+AUDIT_QUEUE_SIZE = int(os.environ.get('AUDIT_QUEUE_SIZE', 10000))
+AUDIT_BATCH_SIZE = int(os.environ.get('AUDIT_BATCH_SIZE', 256))
+AUDIT_FLUSH_SECONDS = float(os.environ.get('AUDIT_FLUSH_SECONDS', 1))
+AUDIT_SEGMENT_BYTES = int(os.environ.get('AUDIT_SEGMENT_MB', 64)) * 1024 * 1024
+# How long a request waits for room in a full audit queue before it is refused (503)
+AUDIT_ENQUEUE_TIMEOUT = float(os.environ.get('AUDIT_ENQUEUE_TIMEOUT_MS', 1000)) / 1000
+
+# Logging (utils/logging_setup.py): records go through a queue to a
+# background writer; repeated warnings and errors are limited to
+# LOG_SAMPLE_BURST per message every LOG_SAMPLE_INTERVAL_SECONDS
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+LOG_JSON = os.environ.get('LOG_FORMAT', 'json').lower() == 'json'
+LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', 10000))
+LOG_SAMPLE_BURST = int(os.environ.get('LOG_SAMPLE_BURST', 10))
+LOG_SAMPLE_INTERVAL = float(os.environ.get('LOG_SAMPLE_INTERVAL_SECONDS', 60))
+
+# Request tracing: TRACE_SAMPLE_RATE of requests (0 = off) get per-stage
+# spans, written as OTLP/JSON lines to size-rotated files in TRACE_DIR.
+# With TRACE_FOLLOW_PARENT, requests with a sampled W3C traceparent header
+# are always traced
+TRACE_SAMPLE_RATE = float(os.environ.get('TRACE_SAMPLE_RATE', 0))
+TRACE_FOLLOW_PARENT = os.environ.get('TRACE_FOLLOW_PARENT', '').lower() in ('1', 'true', 'yes')
+TRACE_DIR = os.environ.get('TRACE_DIR', os.path.join(BASE_DIR, 'data', 'traces'))
+TRACE_FILE_BYTES = int(os.environ.get('TRACE_FILE_MB', 32)) * 1024 * 1024
+TRACE_MAX_FILES = int(os.environ.get('TRACE_MAX_FILES', 10))
+
+# Profiling. A /predict sent with an X-Profile-Token header equal to
+# PROFILE_TOKEN runs under cProfile and its profile is saved in PROFILE_DIR
+# (unset token = disabled). SAMPLING_PROFILER=1 also samples all thread
+# stacks at SAMPLING_PROFILER_HZ into a collapsed-stack file per window
+PROFILE_TOKEN = os.environ.get('PROFILE_TOKEN')
+PROFILE_DIR = os.environ.get('PROFILE_DIR', os.path.join(BASE_DIR, 'data', 'profiles'))
+SAMPLING_PROFILER = os.environ.get('SAMPLING_PROFILER', '').lower() in ('1', 'true', 'yes')
+SAMPLING_PROFILER_HZ = float(os.environ.get('SAMPLING_PROFILER_HZ', 100))
+SAMPLING_PROFILER_WINDOW = float(os.environ.get('SAMPLING_PROFILER_WINDOW_SECONDS', 60))
+
+# Number of published model versions kept under models/versions/; older
+# version directories are deleted by the next publish
+MODEL_VERSIONS_KEEP = int(os.environ.get('MODEL_VERSIONS_KEEP', 10))
+
+# Models are loaded on first use so the rule-based API serves right after
+# startup. MODEL_PRELOAD=1 (default) starts loading them in the background
+# on a worker's first request; MODEL_PRELOAD=0 waits for the first request
+# that needs a model
+MODEL_PRELOAD = os.environ.get('MODEL_PRELOAD', '1').lower() in ('1', 'true', 'yes')
+
+# Memory tracking. MEMORY_TRACKING=1 runs tracemalloc (keeping
+# MEMORY_TRACE_FRAMES frames per allocation), snapshots
+# MEMORY_SAMPLE_RATE of requests to find the lines each endpoint leaves
+# memory allocated at, and snapshots the heap every MEMORY_SNAPSHOT_SECONDS.
+# GET /api/admin/memory reports it with model and cache sizes, for requests
+# with an X-Admin-Token header equal to ADMIN_TOKEN (unset = disabled)
+MEMORY_TRACKING = os.environ.get('MEMORY_TRACKING', '').lower() in ('1', 'true', 'yes')
+MEMORY_SAMPLE_RATE = float(os.environ.get('MEMORY_SAMPLE_RATE', 0.01))
+MEMORY_SNAPSHOT_SECONDS = float(os.environ.get('MEMORY_SNAPSHOT_SECONDS', 300))
+MEMORY_TRACE_FRAMES = int(os.environ.get('MEMORY_TRACE_FRAMES', 1))
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
 
 # Model configuration
 RANDOM_STATE = 42
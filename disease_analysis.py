@@ -1,12 +1,16 @@
 import logging
 from typing import Dict, List, Optional
-from species_config import SPECIES_CONFIG, get_species_category
+from species_config import SPECIES_CONFIG, get_species_category, get_species_config
+from analysis_context import AnalysisContext
 
 logger = logging.getLogger(__name__)
 
 class DiseaseAnalyzer:
     """Analyzes disease risks and provides health recommendations for different species"""
 
+    # Record fields the risk factors read, besides Species
+    RECORD_FIELDS = ('Age', 'Weight', 'Living_Environment', 'Activity_Level')
+
     def __init__(self):
         self.disease_database = {
             'Mammals': {
@@ -92,11 +96,12 @@ class DiseaseAnalyzer:
             }
         }
 
-    def analyze_health_risks(self, animal_data: Dict) -> Dict:
+    def analyze_health_risks(self, animal_data: Dict, context: Optional[AnalysisContext] = None) -> Dict:
         """Analyze health risks and provide recommendations"""
         try:
-            species = animal_data.get('Species')
-            category = get_species_category(species)
+            context = context or AnalysisContext(animal_data)
+            species = context.species
+            category = context.category
             
             if not category:
                 raise ValueError(f"Unknown species category for: {species}")
@@ -114,7 +119,7 @@ class DiseaseAnalyzer:
             # Analyze common diseases for the category
             common_diseases = category_diseases.get('common_diseases', {})
             for disease, info in common_diseases.items():
-                risk_level = self._calculate_risk_level(animal_data, info['risk_factors'])
+                risk_level = self._calculate_risk_level(context, info['risk_factors'])
                 if risk_level > 0.5:
                     risks['disease_risks'].append({
                         'disease': disease,
@@ -126,7 +131,7 @@ class DiseaseAnalyzer:
             # Analyze species-specific diseases
             species_diseases = category_diseases.get('species_specific', {}).get(species, {})
             for disease, info in species_diseases.items():
-                risk_level = self._calculate_risk_level(animal_data, info['risk_factors'])
+                risk_level = self._calculate_risk_level(context, info['risk_factors'])
                 if risk_level > 0.5:
                     risks['disease_risks'].append({
                         'disease': disease,
@@ -146,7 +151,7 @@ class DiseaseAnalyzer:
             return risks
 
         except Exception as e:
-            logger.error(f"Error in health risk analysis: {str(e)}")
+            logger.error("Error in health risk analysis: %s", e)
             return {
                 'disease_risks': [],
                 'preventive_measures': ['Consult with veterinarian'],
@@ -154,27 +159,27 @@ class DiseaseAnalyzer:
                 'long_term_monitoring': []
             }
 
-    def _calculate_risk_level(self, data: Dict, risk_factors: List[str]) -> float:
+    def _calculate_risk_level(self, context: AnalysisContext, risk_factors: List[str]) -> float:
         """Calculate risk level based on risk factors"""
         try:
+            data = context.data
             risk_score = 0.0
             applicable_factors = 0
 
             for factor in risk_factors:
                 if factor == 'age':
-                    age = float(data.get('Age', 0))
-                    species_lifespan = self._get_species_lifespan(data['Species'])
-                    if age > species_lifespan * 0.75:
+                    age_ratio = context.age_ratio
+                    if age_ratio is None:
+                        age_ratio = float(data.get('Age', 0)) / self._get_species_lifespan(context)
+                    if age_ratio > 0.75:
                         risk_score += 1.0
-                    elif age > species_lifespan * 0.5:
+                    elif age_ratio > 0.5:
                         risk_score += 0.5
                     applicable_factors += 1
 
                 elif factor == 'weight':
                     if 'Weight' in data:
-                        weight = float(data['Weight'])
-                        weight_range = self._get_weight_range(data['Species'])
-                        if weight > weight_range[1] or weight < weight_range[0]:
+                        if context.weight_status['status'] != 'Normal':
                             risk_score += 1.0
                         applicable_factors += 1
 
@@ -197,14 +202,9 @@ class DiseaseAnalyzer:
             return risk_score / max(applicable_factors, 1)
 
         except Exception as e:
-            logger.error(f"Error calculating risk level: {str(e)}")
+            logger.error("Error calculating risk level: %s", e)
             return 0.0
-    def _get_species_lifespan(self, species: str) -> float:
+    def _get_species_lifespan(self, context: AnalysisContext) -> float:
         """Get species lifespan from config"""
-        species_config = get_species_config(species)
+        species_config = context.species_config
         return species_config.get('lifespan', 15) if species_config else 15
-
-    def _get_weight_range(self, species: str) -> tuple:
-        """Get species weight range from config"""
-        species_config = get_species_config(species)
-        return species_config.get('weight_range', (0, 1000)) if species_config else (0, 1000)
@@ -80,7 +80,7 @@ class DiseasePredictor:
             return risks
 
         except Exception as e:
-            logger.error(f"Error in health risk analysis: {str(e)}")
+            logger.error("Error in health risk analysis: %s", e)
             return {
                 'error': 'Failed to analyze health risks',
                 'message': str(e)
@@ -0,0 +1,80 @@
+import pandas as pd
+import numpy as np
+from sklearn.model_selection import train_test_split
+import argparse
+import joblib
+import json
+import logging
+from create_sample_data import generate_sample_data
+from train_model import prepare_data, TRAINING_DATA_PATH, MODEL_FILE, SCALER_FILE, LABEL_ENCODERS_FILE
+from utils.distillation import DistilledClassifier, compare_models
+from utils.model_store import publish_models
+from utils.logging_setup import configure_logging
+
+logger = logging.getLogger(__name__)
+
+STUDENT_MODEL_FILE = 'models/student_model.pkl'
+DISTILLATION_REPORT_FILE = 'models/distillation_report.json'
+
+def distill_model(synthetic_samples=5000, n_estimators=20, max_depth=8, publish=False):
+    """Distill the deployed forest into a compact student model"""
+    try:
+        teacher = joblib.load(MODEL_FILE)
+        scaler = joblib.load(SCALER_FILE)
+        label_encoders = joblib.load(LABEL_ENCODERS_FILE)
+
+        # Transfer set: real training records plus synthetic samples
+        df = pd.read_csv(TRAINING_DATA_PATH)
+        synthetic_df = generate_sample_data(n_samples=synthetic_samples)
+        X_real, _, _ = prepare_data(df, label_encoders)
+        X_synthetic, _, _ = prepare_data(synthetic_df, label_encoders)
+        X = scaler.transform(pd.concat([X_real, X_synthetic[X_real.columns]], ignore_index=True))
+        logger.info("Distilling on %s real and %s synthetic samples", len(X_real), len(X_synthetic))
+
+        X_train, X_eval = train_test_split(X, test_size=0.2, random_state=42)
+
+        # Soft targets from the teacher
+        soft_targets = teacher.predict_proba(X_train)
+
+        student = DistilledClassifier(
+            teacher.classes_,
+            n_estimators=n_estimators,
+            max_depth=max_depth
+        ).fit(X_train, soft_targets)
+
+        report = compare_models(teacher, student, X_eval)
+        report['student_params'] = {'n_estimators': n_estimators, 'max_depth': max_depth}
+        logger.info("Student agreement with teacher: %.3f", report['agreement'])
+        logger.info("Size reduction: %sx, single-row speedup: %sx",
+                    report['size_bytes']['reduction'], report['latency_ms']['single_speedup'])
+
+        joblib.dump(student, STUDENT_MODEL_FILE)
+        with open(DISTILLATION_REPORT_FILE, 'w') as f:
+            json.dump(report, f, indent=4)
+        logger.info("Student model saved to %s", STUDENT_MODEL_FILE)
+
+        if publish:
+            publish_models({
+                MODEL_FILE: student,
+                SCALER_FILE: scaler,
+                LABEL_ENCODERS_FILE: label_encoders
+            }, metadata={'mode': 'distilled', 'agreement': report['agreement']})
+
+        return report
+
+    except Exception as e:
+        logger.error("Error distilling model: %s", e)
+        raise
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Distill the health analysis forest into a compact model')
+    parser.add_argument('--synthetic-samples', type=int, default=5000,
+                        help='Synthetic records from create_sample_data added to the transfer set')
+    parser.add_argument('--n-estimators', type=int, default=20)
+    parser.add_argument('--max-depth', type=int, default=8)
+    parser.add_argument('--publish', action='store_true',
+                        help='Publish the student as the live model (e.g. on edge boxes)')
+    args = parser.parse_args()
+    configure_logging(json_format=False)
+
+    distill_model(args.synthetic_samples, args.n_estimators, args.max_depth, args.publish)
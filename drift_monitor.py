@@ -0,0 +1,267 @@
+import logging
+import os
+import threading
+import time
+from bisect import bisect_right
+from typing import Dict, List, Optional
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Model input columns the monitor tracks; vital signs may also arrive under
+# the lowercase keys the rule analyzers use
+NUMERIC_FEATURES = ['Age', 'Weight', 'Heart_Rate', 'Respiratory_Rate', 'Temperature']
+CATEGORICAL_FEATURES = ['Diet_Type', 'Activity_Level', 'Living_Environment', 'Vaccination_Status', 'Breed']
+
+# Usual PSI reading: below 0.1 stable, above 0.25 a significant shift
+PSI_THRESHOLDS = ((0.25, 'significant'), (0.1, 'moderate'), (0.0, 'stable'))
+# Proportion given to empty bins, so PSI stays finite
+PSI_EPSILON = 1e-4
+
+
+def _histogram(values: np.ndarray, edges: List[float]) -> List[int]:
+    """Counts in the bins (-inf, e0), [e0, e1), ..., [e_last, inf), as bisect_right assigns them"""
+    return np.bincount(np.searchsorted(edges, values, side='right'), minlength=len(edges) + 1).tolist()
+
+
+def build_reference(df, bins: int = 10) -> Dict:
+    """Per-species histograms of the training features
+
+    Numeric bins have edges at the species' training quantiles, so each
+    holds about 1 / `bins` of the training rows. Categorical features get
+    one bin per training category plus one for anything else. Call this
+    with the raw (not yet label-encoded) training frame.
+    """
+    reference = {'bins': bins, 'species': {}}
+    for species, species_df in df.groupby('Species'):
+        features = {}
+        for feature in NUMERIC_FEATURES:
+            if feature not in species_df:
+                continue
+            values = species_df[feature].dropna().to_numpy(dtype=float)
+            if not len(values):
+                continue
+            edges = np.unique(np.quantile(values, np.linspace(0, 1, bins + 1)[1:-1])).tolist()
+            features[feature] = {'edges': edges, 'counts': _histogram(values, edges)}
+        for feature in CATEGORICAL_FEATURES:
+            if feature not in species_df:
+                continue
+            counts = species_df[feature].dropna().astype(str).value_counts()
+            features[feature] = {'categories': counts.index.tolist(), 'counts': counts.tolist() + [0]}
+        reference['species'][species] = {'samples': len(species_df), 'features': features}
+    return reference
+
+
+def update_reference(reference: Dict, df) -> Dict:
+    """Add the rows of `df` to a copy of `reference`'s histograms
+
+    Counts go into the existing bins: numeric edges stay at the original
+    training quantiles and categories not in the reference count in the
+    catch-all bin. Species and features the reference lacks are built from
+    `df` alone. Call this with the raw (not yet label-encoded) new rows.
+    """
+    bins = reference.get('bins', 10)
+    merged = {'bins': bins, 'species': dict(reference['species'])}
+    for species, species_df in df.groupby('Species'):
+        spec = merged['species'].get(species)
+        if spec is None:
+            merged['species'].update(build_reference(species_df, bins)['species'])
+            continue
+
+        features = dict(spec['features'])
+        built = None
+        for feature in NUMERIC_FEATURES + CATEGORICAL_FEATURES:
+            if feature not in species_df:
+                continue
+            old = features.get(feature)
+            if old is None:
+                if built is None:
+                    built = build_reference(species_df, bins)['species'][species]['features']
+                if feature in built:
+                    features[feature] = built[feature]
+                continue
+
+            values = species_df[feature].dropna()
+            if 'edges' in old:
+                added = _histogram(values.to_numpy(dtype=float), old['edges'])
+            else:
+                positions = {category: i for i, category in enumerate(old['categories'])}
+                added = [0] * len(old['counts'])
+                for category, count in values.astype(str).value_counts().items():
+                    added[positions.get(category, len(added) - 1)] += int(count)
+            features[feature] = dict(old, counts=[a + b for a, b in zip(old['counts'], added)])
+        merged['species'][species] = {'samples': spec['samples'] + len(species_df), 'features': features}
+    return merged
+
+
+def psi(expected: np.ndarray, actual: np.ndarray) -> float:
+    """Population stability index between two histograms over the same bins"""
+    e = np.maximum(expected / expected.sum(), PSI_EPSILON)
+    a = np.maximum(actual / actual.sum(), PSI_EPSILON)
+    return float(np.sum((a - e) * np.log(a / e)))
+
+
+def binned_ks(expected: np.ndarray, actual: np.ndarray) -> float:
+    """Kolmogorov-Smirnov distance evaluated at the bin edges
+
+    Exact for categorical bins in training order, and a lower bound of the
+    continuous statistic for numeric bins.
+    """
+    return float(np.max(np.abs(np.cumsum(expected) / expected.sum() - np.cumsum(actual) / actual.sum())))
+
+
+def drift_level(value: float) -> str:
+    for threshold, level in PSI_THRESHOLDS:
+        if value >= threshold:
+            return level
+    return 'stable'
+
+
+class _LiveHistograms:
+    """Live counts of one species, in the bins of its training histograms"""
+
+    def __init__(self, features: Dict):
+        self.numeric = {
+            feature: (spec['edges'], [0] * len(spec['counts']))
+            for feature, spec in features.items() if 'edges' in spec
+        }
+        self.categorical = {
+            feature: ({category: i for i, category in enumerate(spec['categories'])}, [0] * len(spec['counts']))
+            for feature, spec in features.items() if 'categories' in spec
+        }
+        self.count = 0
+
+    def add(self, data: Dict) -> None:
+        self.count += 1
+        for feature, (edges, counts) in self.numeric.items():
+            value = data.get(feature)
+            if value is None:
+                value = data.get(feature.lower())
+            if value is None or value == '':
+                continue
+            try:
+                counts[bisect_right(edges, float(value))] += 1
+            except (TypeError, ValueError):
+                continue
+        for feature, (index, counts) in self.categorical.items():
+            value = data.get(feature)
+            if value is not None:
+                counts[index.get(str(value), -1)] += 1
+
+    def counts(self) -> Dict[str, List[int]]:
+        result = {feature: list(counts) for feature, (_, counts) in self.numeric.items()}
+        result.update({feature: list(counts) for feature, (_, counts) in self.categorical.items()})
+        return result
+
+
+class DriftMonitor:
+    """Compares live /predict traffic with the training feature distribution
+
+    Requests only increment a counter per feature (a bisect into the
+    training bins). A background thread computes PSI and binned KS per
+    species and feature every `check_interval` seconds and keeps the last
+    report for /api/metrics/drift. Live counts start over whenever a newly
+    trained reference snapshot is published.
+    """
+
+    def __init__(self, reference_path: str, check_interval: float = 60.0, min_count: int = 100):
+        self.reference_path = reference_path
+        self.check_interval = check_interval
+        self.min_count = min_count
+        self.reference: Optional[Dict] = None
+        self.live: Dict[str, _LiveHistograms] = {}
+        self.last_report: Optional[Dict] = None
+        self._reference_mtime = None
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _ensure_started(self) -> None:
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='drift-monitor', daemon=True)
+                    self._thread.start()
+
+    def _load_reference(self) -> None:
+        """(Re)load the training snapshot if it changed, resetting the live counts"""
+        try:
+            mtime = os.stat(self.reference_path).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime == self._reference_mtime:
+            return
+        import joblib
+        reference = joblib.load(self.reference_path)
+        with self._lock:
+            self.reference = reference
+            self.live = {
+                species: _LiveHistograms(spec['features'])
+                for species, spec in reference['species'].items()
+            }
+            self._reference_mtime = mtime
+        logger.info("Loaded drift reference for %s species", len(self.live))
+
+    def observe(self, data: Dict) -> None:
+        """Count a record's features into its species' live histograms"""
+        self._ensure_started()
+        histograms = self.live.get(data.get('Species'))
+        if histograms is not None:
+            with self._lock:
+                histograms.add(data)
+
+    def _run(self) -> None:
+        # Loaded here rather than in the request that starts the monitor;
+        # records observed until it is loaded are not counted
+        try:
+            self._load_reference()
+        except Exception as e:
+            logger.error("Error loading drift reference: %s", e)
+        while not self._stop.wait(self.check_interval):
+            try:
+                self._load_reference()
+                self.last_report = self.check()
+            except Exception as e:
+                logger.error("Error computing drift statistics: %s", e)
+
+    def check(self) -> Dict:
+        """PSI and KS of every tracked feature, per species with enough live records"""
+        with self._lock:
+            reference = self.reference
+            live = {species: (histograms.count, histograms.counts()) for species, histograms in self.live.items()}
+
+        report = {'checked_at': time.time(), 'min_count': self.min_count, 'species': {}}
+        if reference is None:
+            report['error'] = 'No drift reference; train the model to create one'
+            return report
+
+        for species, (count, live_counts) in live.items():
+            spec = reference['species'][species]
+            entry = {'live_samples': count, 'training_samples': spec['samples'], 'features': {}}
+            if count >= self.min_count:
+                for feature, counts in live_counts.items():
+                    actual = np.array(counts, dtype=float)
+                    if not actual.sum():
+                        continue
+                    expected = np.array(spec['features'][feature]['counts'], dtype=float)
+                    value = psi(expected, actual)
+                    entry['features'][feature] = {
+                        'psi': round(value, 4),
+                        'ks': round(binned_ks(expected, actual), 4),
+                        'drift': drift_level(value)
+                    }
+                worst = max((f['psi'] for f in entry['features'].values()), default=0.0)
+                entry['drift'] = drift_level(worst)
+            report['species'][species] = entry
+        return report
+
+    def report(self) -> Dict:
+        """Latest scheduled report (computed now if none has run yet)"""
+        self._ensure_started()
+        if self.last_report is None:
+            self.last_report = self.check()
+        return self.last_report
+
+    def close(self) -> None:
+        self._stop.set()
@@ -1,53 +1,175 @@
 import numpy as np
 from typing import Dict, List, Optional
 import logging
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
-from sklearn.preprocessing import StandardScaler
-import joblib
+import os
+import threading
+import time
+import weakref
 from datetime import datetime, timedelta
+from utils.model_store import ModelWatcher, read_manifest, version_dir
+from utils.inference_batcher import MicroBatcher
+from utils.model_pool import SpeciesModelPool, species_key
+from utils import tracing, profiling
+from utils.memory_tracking import deep_sizeof
+from species_config import get_species_config
+from config import INFERENCE_BATCH_MAX_SIZE, INFERENCE_BATCH_MAX_DELAY, SPECIES_MODEL_MEMORY_BUDGET
 
 logger = logging.getLogger(__name__)
 
+# Training feature columns (see train_model.prepare_data), used when the
+# scaler does not record them
+MODEL_FEATURES = [
+    'Species', 'Age', 'Weight', 'Diet_Type', 'Activity_Level', 'Living_Environment',
+    'Vaccination_Status', 'Heart_Rate', 'Respiratory_Rate', 'Temperature', 'Breed'
+]
+VITAL_SIGN_FEATURES = ['Heart_Rate', 'Respiratory_Rate', 'Temperature']
+
 class HealthAnalyzer:
     """Advanced health analysis system with enhanced prediction capabilities"""
 
+    # Record fields the model reads; vital signs may also use the lowercase
+    # keys of the rule analyzers
+    RECORD_FIELDS = tuple(MODEL_FEATURES) + tuple(feature.lower() for feature in VITAL_SIGN_FEATURES)
+
     def __init__(self):
         self.models = {
             'base': None,
-            'species_specific': {},
             'temporal': None
         }
         self.scalers = {}
+        self.species_pool: Optional[SpeciesModelPool] = None
+        self.category_codes = {}
+        self.feature_names = list(MODEL_FEATURES)
         self.feature_importances = {}
-        self.load_models()
+        # Per-model contribution tables, built once when a model is loaded
+        self._explainers = weakref.WeakKeyDictionary()
+        self.model_watcher = ModelWatcher()
+        self._loaded = False
+        self._load_lock = threading.Lock()
+        self._preload: Optional[threading.Thread] = None
+        # Concurrent single-record predictions share one predict_proba call
+        self.batcher = MicroBatcher(
+            self._predict_batch,
+            max_batch_size=INFERENCE_BATCH_MAX_SIZE,
+            max_delay=INFERENCE_BATCH_MAX_DELAY,
+            name='health-model'
+        )
+
+    def ensure_loaded(self) -> None:
+        """Load the models on first use
+
+        Unpickling the models imports scikit-learn, which takes longer than
+        the rest of the app's startup, so nothing is loaded until a model is
+        needed (or `load_in_background` is called).
+        """
+        if not self._loaded:
+            with self._load_lock:
+                if not self._loaded:
+                    self.load_models()
+                    self._loaded = True
+
+    def load_in_background(self) -> None:
+        """Start loading the models on a daemon thread; model calls wait for it"""
+        if not self._loaded and self._preload is None:
+            self._preload = threading.Thread(target=self.ensure_loaded, name='model-preload', daemon=True)
+            self._preload.start()
 
     def load_models(self):
-        """Load trained models and scalers"""
+        """Load trained models and scalers
+
+        Models are loaded into fresh dicts which replace the live ones in a
+        single assignment, so requests in flight keep using a consistent
+        model/scaler pair while a new version is swapped in. Every file is
+        read from the published version's directory, never the live paths
+        a publish may be replacing. Per-species models are only discovered
+        here; the species pool loads them on first use.
+        """
+        import joblib
+
+        manifest = read_manifest()
+        model_dir = version_dir(manifest)
+        models = {
+            'base': None,
+            'temporal': self.models.get('temporal')
+        }
+        scalers = {}
         try:
             # Load base model
-            self.models['base'] = joblib.load('models/health_analysis_model.pkl')
-            self.scalers['base'] = joblib.load('models/scaler.pkl')
-
-            # Load species-specific models if available
-            species_models = {
-                'Dog': 'models/dog_model.pkl',
-                'Cat': 'models/cat_model.pkl',
-                'Horse': 'models/horse_model.pkl'
-            }
-            
-            for species, model_path in species_models.items():
-                try:
-                    self.models['species_specific'][species] = joblib.load(model_path)
-                    self.scalers[species] = joblib.load(f'models/{species.lower()}_scaler.pkl')
-                except:
-                    logger.warning(f"Species-specific model for {species} not found")
-
+            models['base'] = joblib.load(os.path.join(model_dir, 'health_analysis_model.pkl'))
+            scalers['base'] = joblib.load(os.path.join(model_dir, 'scaler.pkl'))
+            category_codes = self._category_codes(joblib.load(os.path.join(model_dir, 'label_encoders.pkl')))
+            feature_names = list(getattr(scalers['base'], 'feature_names_in_', MODEL_FEATURES))
+
+            self._explainer_for(models['base'])
+            species_pool = SpeciesModelPool(model_dir, memory_budget=SPECIES_MODEL_MEMORY_BUDGET,
+                                            on_load=self._explainer_for)
+
+            previous_pool = self.species_pool
+            self.models, self.scalers, self.species_pool = models, scalers, species_pool
+            self.category_codes, self.feature_names = category_codes, feature_names
+            self.feature_importances = self._sorted_importances(models['base'], feature_names)
+            if previous_pool is not None:
+                previous_pool.close()
+            self.model_watcher.mark_loaded(manifest.get('version') if manifest else None)
+
+        except FileNotFoundError as e:
+            logger.warning("Health model not available, model predictions disabled: %s", e)
         except Exception as e:
-            logger.error(f"Error loading models: {str(e)}")
+            logger.error("Error loading models: %s", e)
+
+    def _explainer_for(self, model):
+        """Contribution tables for `model`, built on first use (None if unsupported)"""
+        from utils.tree_explainer import ForestExplainer, can_explain
+
+        explainer = self._explainers.get(model)
+        if explainer is None and can_explain(model):
+            explainer = self._explainers[model] = ForestExplainer(model)
+        return explainer
+
+    def memory_footprint(self) -> Dict[str, int]:
+        """Approximate live bytes of the loaded models, scalers and explainer tables"""
+        pool = self.species_pool
+        models = deep_sizeof(self.models, self.scalers)
+        # Explainers share the base model's trees, which are counted under models
+        explainers = deep_sizeof(self.models, self.scalers, list(self._explainers.values())) - models
+        return {
+            'models': models,
+            'species_models': pool.resident_bytes if pool is not None else 0,
+            'explainers': explainers
+        }
+
+    @staticmethod
+    def _sorted_importances(model, feature_names: List[str]) -> Dict[str, float]:
+        """Global feature importances, most important first"""
+        importances = getattr(model, 'feature_importances_', None)
+        if importances is None:
+            return {}
+        return dict(sorted(zip(feature_names, map(float, importances)),
+                           key=lambda item: item[1], reverse=True))
+
+    @staticmethod
+    def _category_codes(label_encoders: Dict) -> Dict[str, Dict]:
+        """Plain dict lookups for each label encoder's categories"""
+        return {
+            column: {category: code for code, category in enumerate(encoder.classes_)}
+            for column, encoder in label_encoders.items()
+        }
+
+    def reload_if_updated(self) -> bool:
+        """Hot-swap models when a new version has been published"""
+        self.ensure_loaded()
+        new_version = self.model_watcher.poll(time.time())
+        if not new_version:
+            return False
+
+        logger.info("Loading published model version %s", new_version)
+        self.load_models()
+        return self.model_watcher.current_version == new_version
 
     def analyze_health(self, data: Dict) -> Dict:
         """Perform comprehensive health analysis"""
         try:
+            self.reload_if_updated()
             results = {
                 'base_prediction': self._get_base_prediction(data),
                 'species_prediction': self._get_species_prediction(data),
@@ -63,34 +185,120 @@ class HealthAnalyzer:
             return results
 
         except Exception as e:
-            logger.error(f"Error in health analysis: {str(e)}")
+            logger.error("Error in health analysis: %s", e)
             return {'error': str(e)}
 
+    def predict_health_status(self, data: Dict, timeout: Optional[float] = None) -> Optional[Dict]:
+        """Model health status for one record (None if no model is deployed)
+
+        Uses the species model when it is resident and the base model
+        otherwise (including while the species model is still loading). The
+        call goes through the micro-batcher, so records scored at the same
+        moment by different requests share one predict_proba call per model.
+        """
+        self.reload_if_updated()
+        if self.models['base'] is None:
+            return None
+
+        species = data.get('Species')
+        key = None
+        if self.species_pool is not None and self.species_pool.get(species) is not None:
+            key = species_key(species)
+
+        with tracing.span('model.predict', model=key or 'base') as span:
+            features = self._prepare_features(data)
+            if profiling.active() is not None:
+                # Score in this thread so the profile includes the model code
+                result = self._predict_batch(features, key)[0]
+            else:
+                result = self.batcher.predict(features, key, timeout)
+            span.set_attribute('model.source', result['source'])
+        classes, probabilities = result['classes'], result['probabilities']
+        best = int(probabilities.argmax())
+        prediction = {
+            'prediction': str(classes[best]),
+            'probability': float(probabilities[best]),
+            'probabilities': {str(label): float(p) for label, p in zip(classes, probabilities)},
+            'model': result['source']
+        }
+        if result['contributions'] is not None:
+            prediction['explanation'] = self._explanation(result['bias'], result['contributions'], best)
+        return prediction
+
+    def _explanation(self, bias: np.ndarray, contributions: np.ndarray, class_index: int) -> Dict:
+        """How much each feature moved the predicted class probability
+
+        `baseline` is the forest's average probability for the class before
+        any split; baseline plus all contributions gives the probability.
+        """
+        values = contributions[:, class_index]
+        order = np.argsort(-np.abs(values))
+        return {
+            'baseline': float(bias[class_index]),
+            'contributions': {self.feature_names[i]: float(values[i]) for i in order},
+            'top_factors': [self.feature_names[i] for i in order[:5]]
+        }
+
+    def _predict_batch(self, features: np.ndarray, species: Optional[str] = None) -> List[Dict]:
+        """Scale and score (and explain) a stacked feature matrix with a live model
+
+        `species` selects a resident species model; if it was evicted since
+        the rows were queued the base model is used instead. Forests are
+        scored through their explainer, which yields probabilities and
+        per-feature contributions from the same tree traversal.
+        """
+        model, scaler, source = self.models['base'], self.scalers.get('base'), 'base'
+        resident = self.species_pool.peek(species) if species and self.species_pool else None
+        if resident is not None:
+            (model, scaler), source = resident, species
+        if model is None:
+            raise RuntimeError("Health model not loaded")
+
+        features = self._scale(scaler, features)
+        explainer = self._explainers.get(model)
+        if explainer is not None:
+            probabilities, contributions = explainer.explain(features)
+        else:
+            probabilities, contributions = model.predict_proba(features), [None] * len(features)
+        bias = explainer.bias if explainer is not None else None
+        return [
+            {'source': source, 'classes': model.classes_, 'probabilities': row,
+             'contributions': row_contributions, 'bias': bias}
+            for row, row_contributions in zip(probabilities, contributions)
+        ]
+
+    @staticmethod
+    def _scale(scaler, features: np.ndarray) -> np.ndarray:
+        # Same as scaler.transform, without the per-call input validation
+        if scaler is None:
+            return features
+        return (features - scaler.mean_) / scaler.scale_
+
     def _get_base_prediction(self, data: Dict) -> Dict:
         """Get prediction from base model"""
         try:
-            features = self._prepare_features(data)
-            scaled_features = self.scalers['base'].transform([features])
-            prediction = self.models['base'].predict_proba([features])[0]
-            
+            prediction = self.predict_health_status(data)
+            if prediction is None:
+                return {}
+
             return {
-                'prediction': self.models['base'].classes_[prediction.argmax()],
-                'probability': float(prediction.max()),
-                'feature_importance': self._get_feature_importance(features)
+                'prediction': prediction['prediction'],
+                'probability': prediction['probability'],
+                'feature_importance': prediction.get('explanation', {})
             }
         except Exception as e:
-            logger.error(f"Error in base prediction: {str(e)}")
+            logger.error("Error in base prediction: %s", e)
             return {}
 
     def _get_species_prediction(self, data: Dict) -> Dict:
         """Get species-specific prediction"""
         species = data.get('Species')
-        if species in self.models['species_specific']:
+        resident = self.species_pool.get(species) if self.species_pool is not None else None
+        if resident is not None:
             try:
                 features = self._prepare_features(data)
-                model = self.models['species_specific'][species]
-                scaled_features = self.scalers[species].transform([features])
-                prediction = model.predict_proba([features])[0]
+                model, scaler = resident
+                prediction = model.predict_proba(self._scale(scaler, features))[0]
                 
                 return {
                     'prediction': model.classes_[prediction.argmax()],
@@ -98,7 +306,7 @@ class HealthAnalyzer:
                     'species_specific_risks': self._get_species_risks(species, data)
                 }
             except Exception as e:
-                logger.error(f"Error in species prediction: {str(e)}")
+                logger.error("Error in species prediction: %s", e)
         
         return {}
 
@@ -121,7 +329,7 @@ class HealthAnalyzer:
             }
 
         except Exception as e:
-            logger.error(f"Error in temporal analysis: {str(e)}")
+            logger.error("Error in temporal analysis: %s", e)
             return {}
 
     def _analyze_interactions(self, data: Dict) -> List[Dict]:
@@ -163,7 +371,7 @@ class HealthAnalyzer:
             return interactions
 
         except Exception as e:
-            logger.error(f"Error analyzing interactions: {str(e)}")
+            logger.error("Error analyzing interactions: %s", e)
             return []
 
     def _calculate_confidence(self, results: Dict) -> float:
@@ -188,80 +396,46 @@ class HealthAnalyzer:
             return min(1.0, confidence)
 
         except Exception as e:
-            logger.error(f"Error calculating confidence: {str(e)}")
+            logger.error("Error calculating confidence: %s", e)
             return 0.0
 
-    def _prepare_features(self, data: Dict) -> List:
-        """Prepare feature vector for prediction"""
+    def _prepare_features(self, data: Dict) -> np.ndarray:
+        """Encode a record as a (1, n_features) row in training column order
+
+        Categories unseen in training are encoded as -1. Missing vital signs
+        default to the middle of the species' normal range.
+        """
         try:
-            features = []
-            feature_order = [
-                'Species', 'Age', 'Weight', 'Heart_Rate', 'Respiratory_Rate', 
-                'Temperature', 'Body_Condition_Score', 'Diet_Type', 'Activity_Level',
-                'Living_Environment', 'Stress_Level', 'Vaccination_Status',
-                'Genetic_Predisposition', 'Recent_Behavior_Changes',
-                'Chronic_Conditions', 'Previous_Surgeries'
-            ]
-            
-            for feature in feature_order:
+            row = np.zeros((1, len(self.feature_names)))
+            for i, feature in enumerate(self.feature_names):
                 value = data.get(feature)
-                
-                # Handle missing values
-                if value is None:
-                    if feature in ['Heart_Rate', 'Respiratory_Rate', 'Temperature']:
-                        # Use species-specific averages for vital signs
-                        species_config = self._get_species_config(data['Species'])
-                        if species_config and feature.lower() in species_config['vital_signs']:
-                            min_val, max_val = species_config['vital_signs'][feature.lower()]
-                            value = (min_val + max_val) / 2
-                        else:
-                            value = 0
-                    elif feature in ['Body_Condition_Score']:
-                        value = 5  # Default to middle score
-                    elif feature in ['Stress_Level', 'Genetic_Predisposition']:
-                        value = 'Low'  # Default to low risk
-                    else:
-                        value = 0 if isinstance(value, (int, float)) else 'Unknown'
-                
-                features.append(value)
-                
-            return features
+                if value is None and feature in VITAL_SIGN_FEATURES:
+                    value = data.get(feature.lower())
 
-        except Exception as e:
-            logger.error(f"Error preparing features: {str(e)}")
-            return []
+                codes = self.category_codes.get(feature)
+                if codes is not None:
+                    row[0, i] = codes.get(value, -1)
+                    continue
 
-    def _get_feature_importance(self, features: List) -> Dict:
-        """Get importance of each feature in prediction"""
-        try:
-            feature_names = [
-                'Species', 'Age', 'Weight', 'Heart_Rate', 'Respiratory_Rate',
-                'Temperature', 'Body_Condition_Score', 'Diet_Type', 'Activity_Level',
-                'Living_Environment', 'Stress_Level', 'Vaccination_Status',
-                'Genetic_Predisposition', 'Recent_Behavior_Changes',
-                'Chronic_Conditions', 'Previous_Surgeries'
-            ]
-            
-            importances = self.models['base'].feature_importances_
-            importance_dict = dict(zip(feature_names, importances))
-            
-            # Sort by importance
-            sorted_importances = {
-                k: v for k, v in sorted(
-                    importance_dict.items(), 
-                    key=lambda item: item[1], 
-                    reverse=True
-                )
-            }
-            
-            return {
-                'feature_importances': sorted_importances,
-                'top_factors': list(sorted_importances.keys())[:5]
-            }
+                if value is None or value == '':
+                    value = self._default_value(feature, data)
+                row[0, i] = float(value)
+
+            return row
 
         except Exception as e:
-            logger.error(f"Error calculating feature importance: {str(e)}")
-            return {}
+            logger.error("Error preparing features: %s", e)
+            raise
+
+    @staticmethod
+    def _default_value(feature: str, data: Dict) -> float:
+        """Fallback for a missing numeric feature"""
+        if feature in VITAL_SIGN_FEATURES:
+            species_config = get_species_config(data.get('Species'))
+            if species_config and feature.lower() in species_config['vital_signs']:
+                min_val, max_val = species_config['vital_signs'][feature.lower()]
+                return (min_val + max_val) / 2
+        return 0.0
 
     def _analyze_weight_trend(self, history: List) -> Dict:
         """Analyze weight changes over time"""
@@ -284,7 +458,7 @@ class HealthAnalyzer:
             }
 
         except Exception as e:
-            logger.error(f"Error analyzing weight trend: {str(e)}")
+            logger.error("Error analyzing weight trend: %s", e)
             return {'error': str(e)}
 
     def _analyze_activity_trend(self, history: List) -> Dict:
@@ -314,7 +488,7 @@ class HealthAnalyzer:
             }
 
         except Exception as e:
-            logger.error(f"Error analyzing activity trend: {str(e)}")
+            logger.error("Error analyzing activity trend: %s", e)
             return {'error': str(e)}
 
     def _analyze_vital_signs_trend(self, history: List) -> Dict:
@@ -348,7 +522,7 @@ class HealthAnalyzer:
             return trends
 
         except Exception as e:
-            logger.error(f"Error analyzing vital signs trend: {str(e)}")
+            logger.error("Error analyzing vital signs trend: %s", e)
             return {'error': str(e)}
 
     def _calculate_risk_progression(self, trends: Dict) -> Dict:
@@ -390,7 +564,7 @@ class HealthAnalyzer:
             }
 
         except Exception as e:
-            logger.error(f"Error calculating risk progression: {str(e)}")
+            logger.error("Error calculating risk progression: %s", e)
             return {'error': str(e)}
 
     def _get_risk_recommendations(self, risk_level: str, risk_factors: List[str]) -> Dict[str, List[str]]:
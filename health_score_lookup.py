@@ -0,0 +1,170 @@
+import logging
+import math
+from array import array
+import threading
+from typing import Dict, Optional, Tuple
+import numpy as np
+from species_config import get_species_category, get_species_config
+from species_metrics import SpeciesMetricsAnalyzer
+
+logger = logging.getLogger(__name__)
+
+class GridTable:
+    """One input's score deduction, tabulated at the midpoints of a uniform grid
+
+    Cells the deduction is linear over store its midpoint value, which is
+    within `slope * step / 2` of the exact deduction anywhere in the cell.
+    Cells containing a breakpoint (a range limit) store NaN, and inputs
+    falling in them, or outside the grid, are computed exactly instead.
+    """
+
+    def __init__(self, func, start: float, stop: float, step: float, breakpoints: Tuple[float, ...]):
+        self.func = func
+        self.start = start
+        self.inverse_step = 1 / step
+        n_cells = max(1, int(math.ceil((stop - start) / step)))
+        edges = start + np.arange(n_cells + 1) * step
+        values = func(edges[:-1] + step / 2)
+        for point in breakpoints:
+            # The cells on both sides of a breakpoint that lies on an edge
+            cells = np.nonzero((edges[:-1] <= point + step * 1e-9) & (edges[1:] >= point - step * 1e-9))[0]
+            values[cells] = np.nan
+        # Indexing an array('d') is cheaper than a numpy array for single
+        # lookups, and it is as compact
+        self.values = array('d', values.tolist())
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def lookup(self, x: float) -> float:
+        i = int((x - self.start) * self.inverse_step)
+        if 0 <= i < len(self.values) and x >= self.start:
+            value = self.values[i]
+            if value == value:
+                return value
+        return float(self.func(np.array([x]))[0])
+
+
+class SpeciesScoreTable:
+    """Tabulated health score deductions for one species
+
+    The rule-based score is 100 minus a sum of per-input deductions
+    (each vital sign, weight, age, environment), clipped to [0, 100], so
+    one table per input is enough. Vital sign grids are sized so that the
+    summed interpolation error stays within `max_error` score points;
+    weight and age deductions are step functions and are exact.
+    """
+
+    def __init__(self, analyzer: SpeciesMetricsAnalyzer, category: str, config: Dict, max_error: float,
+                 step_cells: int = 256):
+        self.category = category
+        self.fingerprint = self.fingerprint_of(analyzer, category, config)
+        self.max_error = max_error
+
+        importance = analyzer.vital_signs_importance.get(category, {})
+        vital_signs = config.get('vital_signs', {})
+        error_per_sign = max_error / max(len(vital_signs), 1)
+        self.vital_signs: Dict[str, GridTable] = {}
+        for sign, (min_val, max_val) in vital_signs.items():
+            weight = importance.get(sign, 0.33)
+            # Steepest slope of the deduction, below the range
+            slope = 100 * weight / min(min_val, max_val)
+            step = 2 * error_per_sign / slope
+            # Past max_val * (1 + 1 / weight) this deduction alone reaches 100
+            stop = max_val * (1 + 1 / weight) if weight > 0 else max_val * 2
+            self.vital_signs[sign] = GridTable(
+                lambda values, r=(min_val, max_val), w=weight: analyzer.vital_sign_deductions(values, r, w),
+                0.0, stop, step, breakpoints=(0.0, min_val, max_val)
+            )
+
+        weight_range = config.get('weight_range', (0, 0))
+        self.weight = GridTable(
+            lambda values: analyzer.weight_deductions(values, weight_range),
+            0.0, weight_range[1] * 2, max(weight_range[1] * 2, 1) / step_cells, breakpoints=tuple(weight_range)
+        )
+
+        lifespan = config.get('lifespan', 0)
+        senior_age = 0.75 * lifespan
+        self.age = GridTable(
+            lambda values: analyzer.age_deductions(values, lifespan),
+            0.0, max(senior_age * 2, 1), max(senior_age * 2, 1) / step_cells, breakpoints=(senior_age,)
+        )
+
+        self.environment = {
+            environment: analyzer.environment_deduction(environment, category)
+            for environment in analyzer.ENVIRONMENT_RISKS.get(category, {})
+        }
+
+    @staticmethod
+    def fingerprint_of(analyzer: SpeciesMetricsAnalyzer, category: str, config: Dict) -> Tuple:
+        """Copy of everything in the configuration the score depends on"""
+        return (
+            category,
+            dict(config.get('vital_signs', {})),
+            tuple(config.get('weight_range', (0, 0))),
+            config.get('lifespan', 0),
+            dict(analyzer.vital_signs_importance.get(category, {}))
+        )
+
+    def matches(self, analyzer: SpeciesMetricsAnalyzer, category: str, config: Dict) -> bool:
+        fingerprint = self.fingerprint
+        return (
+            fingerprint[0] == category
+            and fingerprint[1] == config.get('vital_signs', {})
+            and fingerprint[2] == tuple(config.get('weight_range', (0, 0)))
+            and fingerprint[3] == config.get('lifespan', 0)
+            and fingerprint[4] == analyzer.vital_signs_importance.get(category, {})
+        )
+
+    def __len__(self) -> int:
+        return sum(len(table) for table in self.vital_signs.values()) + len(self.weight) + len(self.age)
+
+    def score(self, data: Dict) -> float:
+        deductions = 0.0
+        for sign, table in self.vital_signs.items():
+            value = data.get(sign)
+            if value:
+                deductions += table.lookup(float(value))
+        deductions += self.weight.lookup(float(data.get('Weight', 0)))
+        deductions += self.age.lookup(float(data.get('Age', 0)))
+        deductions += self.environment.get(data.get('Living_Environment'), 0)
+        return max(0, min(100, 100 - deductions))
+
+
+class HealthScoreLookup:
+    """Constant-time rule-based health scores from per-species tables
+
+    Tables are built on first use of a species. Before answering, the
+    species' current SPECIES_CONFIG entry is compared with the one its
+    table was built from, and a table for a changed configuration is
+    regenerated. Scores are within `max_error` points of
+    SpeciesMetricsAnalyzer's.
+    """
+
+    def __init__(self, analyzer: SpeciesMetricsAnalyzer, max_error: float = 0.05):
+        self.analyzer = analyzer
+        self.max_error = max_error
+        self.tables: Dict[str, SpeciesScoreTable] = {}
+        self._lock = threading.Lock()
+        self.builds = 0
+
+    def table_for(self, species: str) -> Optional[SpeciesScoreTable]:
+        config = get_species_config(species)
+        if not config:
+            return None
+        category = get_species_category(species)
+        table = self.tables.get(species)
+        if table is None or not table.matches(self.analyzer, category, config):
+            with self._lock:
+                table = self.tables.get(species)
+                if table is None or not table.matches(self.analyzer, category, config):
+                    table = SpeciesScoreTable(self.analyzer, category, config, self.max_error)
+                    self.tables[species] = table
+                    self.builds += 1
+                    logger.info("Built health score table for %s (%s cells)", species, len(table))
+        return table
+
+    def score(self, data: Dict) -> Optional[float]:
+        """Health score for a record, None for an unknown species"""
+        table = self.table_for(data.get('Species'))
+        return None if table is None else table.score(data)
@@ -0,0 +1,472 @@
+import logging
+from typing import Dict, List, Optional
+from species_config import get_species_care_recommendations, get_all_vital_signs
+from analysis_context import AnalysisContext
+from analysis_results import Recommendation
+from species_metrics import SpeciesMetricsAnalyzer, health_statuses
+from health_score_lookup import HealthScoreLookup
+from disease_analysis import DiseaseAnalyzer
+from symptom_analysis import SymptomAnalyzer
+from uncertainty_analysis import UncertaintyAnalyzer
+from health_analysis import HealthAnalyzer
+from stage_scheduler import Stage, StageGraph, StageScheduler
+from analysis_sessions import AnalysisSession, SessionNotFound, SessionStore
+from utils.case_index import SimilarCaseIndex, OUTCOME_COLUMNS
+from reference_distributions import ReferenceDistributions, REFERENCE_FIELDS
+from drift_monitor import DriftMonitor
+from config import (
+    SESSION_MAX_COUNT, SESSION_TTL_SECONDS, MODEL_STAGE_TIMEOUT,
+    SIMILAR_CASES_DATA_PATH, SIMILAR_CASES_REFRESH_SECONDS,
+    HEALTH_SCORE_LOOKUP, HEALTH_SCORE_MAX_ERROR, UNCERTAINTY_SAMPLES,
+    REFERENCE_SKETCH_DIR, REFERENCE_SKETCH_K, REFERENCE_PERSIST_SECONDS,
+    REFERENCE_MIN_COUNT, REFERENCE_MAX_BREEDS,
+    DRIFT_REFERENCE_PATH, DRIFT_CHECK_SECONDS, DRIFT_MIN_COUNT
+)
+
+logger = logging.getLogger(__name__)
+
+metrics_analyzer = SpeciesMetricsAnalyzer()
+score_lookup = HealthScoreLookup(metrics_analyzer, max_error=HEALTH_SCORE_MAX_ERROR)
+uncertainty_analyzer = UncertaintyAnalyzer(metrics_analyzer, samples=UNCERTAINTY_SAMPLES)
+disease_analyzer = DiseaseAnalyzer()
+symptom_analyzer = SymptomAnalyzer(disease_analyzer.disease_database)
+health_analyzer = HealthAnalyzer()
+reference_distributions = ReferenceDistributions(
+    REFERENCE_SKETCH_DIR, k=REFERENCE_SKETCH_K, persist_interval=REFERENCE_PERSIST_SECONDS,
+    min_count=REFERENCE_MIN_COUNT, max_breeds=REFERENCE_MAX_BREEDS
+)
+drift_monitor = DriftMonitor(DRIFT_REFERENCE_PATH, check_interval=DRIFT_CHECK_SECONDS, min_count=DRIFT_MIN_COUNT)
+
+DIAGNOSTIC_FIELDS = [
+    'health_score', 'species_category', 'vital_signs', 'weight_analysis',
+    'age_analysis', 'environmental_analysis', 'diet_analysis',
+    'activity_analysis', 'risk_level'
+]
+TOP_LEVEL_FIELDS = ['prediction', 'diagnostic_insights', 'disease_risks', 'symptom_risks',
+                    'population_percentiles', 'recommendations', 'model_assessment']
+# Sections only computed when asked for (?uncertainty=1 or ?fields=uncertainty)
+OPT_IN_FIELDS = ['uncertainty']
+
+# Stage outputs each response field is built from. Requesting a subset of
+# fields (?fields=...) only runs the stages these outputs depend on.
+FIELD_OUTPUTS = {
+    'prediction': ['health_score'],
+    'diagnostic_insights': ['health_score', 'risk_level'] + list(SpeciesMetricsAnalyzer.CORE_SECTIONS)
+                           + list(SpeciesMetricsAnalyzer.OPTIONAL_SECTIONS),
+    'disease_risks': ['disease_risks'],
+    'symptom_risks': ['symptom_risks'],
+    'population_percentiles': ['population_percentiles'],
+    'recommendations': ['recommendations'],
+    'model_assessment': ['model_assessment'],
+    'uncertainty': ['uncertainty']
+}
+FIELD_OUTPUTS.update({
+    f'diagnostic_insights.{field}': [field] for field in DIAGNOSTIC_FIELDS
+})
+FIELD_OUTPUTS['diagnostic_insights.species_category'] = []
+
+def _metrics_section_stage(section: str) -> Stage:
+    return Stage(
+        section,
+        lambda inputs: {section: metrics_analyzer.analyze_section(section, inputs['context'])},
+        inputs=['context'],
+        outputs=[section],
+        reads=SpeciesMetricsAnalyzer.SECTION_FIELDS[section]
+    )
+
+def _score_stage(inputs: Dict) -> Dict:
+    return metrics_analyzer.summarize(inputs, inputs['category'])
+
+def _lookup_score_stage(inputs: Dict) -> Dict:
+    return metrics_analyzer.score_summary(score_lookup.score(inputs['data']))
+
+def _uncertainty_stage(inputs: Dict) -> Dict:
+    return {'uncertainty': uncertainty_analyzer.analyze(inputs['data'])}
+
+def _disease_stage(inputs: Dict) -> Dict:
+    return {'disease_risks': disease_analyzer.analyze_health_risks(inputs['data'], context=inputs['context'])}
+
+def _symptom_stage(inputs: Dict) -> Dict:
+    return {'symptom_risks': symptom_analyzer.analyze_symptoms(inputs['data'], context=inputs['context'])}
+
+def _percentiles_stage(inputs: Dict) -> Dict:
+    return {'population_percentiles': reference_distributions.percentiles(inputs['data'])}
+
+def _model_stage(inputs: Dict) -> Dict:
+    return {'model_assessment': health_analyzer.predict_health_status(inputs['data'])}
+
+def _care_stage(inputs: Dict) -> Dict:
+    return {'care_recommendations': get_species_care_recommendations(inputs['species'])}
+
+def _recommendations_stage(inputs: Dict) -> Dict:
+    # generate_recommendations does not read disease risks, so the stage
+    # does not wait for them
+    return {'recommendations': generate_recommendations(
+        inputs['data'],
+        inputs,
+        None,
+        inputs['species_config'],
+        inputs['care_recommendations']
+    )}
+
+CONTACT_VETERINARIAN = Recommendation("Contact veterinarian", 'High')
+HIGH_RISK_ACTIONS = (
+    Recommendation("Schedule immediate veterinary consultation", 'High'),
+    Recommendation("Monitor vital signs closely", 'High')
+)
+
+FALLBACK_RECOMMENDATIONS = {
+    'immediate_actions': [CONTACT_VETERINARIAN],
+    'lifestyle_changes': [],
+    'monitoring_plan': [],
+    'veterinary_care': []
+}
+
+def build_stage_graph() -> StageGraph:
+    """Declare the /predict analysis stages and their data dependencies"""
+    graph = StageGraph()
+    for section in SpeciesMetricsAnalyzer.CORE_SECTIONS + SpeciesMetricsAnalyzer.OPTIONAL_SECTIONS:
+        graph.add(_metrics_section_stage(section))
+    if HEALTH_SCORE_LOOKUP:
+        # Scores straight from the record, without the sections
+        graph.add(Stage(
+            'health_score', _lookup_score_stage,
+            inputs=['data'],
+            outputs=['health_score', 'risk_level'],
+            reads=tuple(get_all_vital_signs()) + ('Weight', 'Age', 'Living_Environment')
+        ))
+    else:
+        graph.add(Stage(
+            'health_score', _score_stage,
+            inputs=['category'] + list(SpeciesMetricsAnalyzer.CORE_SECTIONS),
+            outputs=['health_score', 'risk_level'],
+            reads=()
+        ))
+    graph.add(Stage(
+        'uncertainty', _uncertainty_stage,
+        inputs=['data', 'species_config'],
+        outputs=['uncertainty'],
+        reads=tuple(get_all_vital_signs()) + ('Weight', 'Age', 'Living_Environment', 'Instruments'),
+        fallback={'uncertainty': None}
+    ))
+    graph.add(Stage(
+        'disease_risks', _disease_stage,
+        inputs=['data', 'context'],
+        outputs=['disease_risks'],
+        reads=DiseaseAnalyzer.RECORD_FIELDS,
+        fallback={'disease_risks': {
+            'disease_risks': [],
+            'preventive_measures': ['Consult with veterinarian'],
+            'immediate_concerns': [],
+            'long_term_monitoring': []
+        }}
+    ))
+    graph.add(Stage(
+        'symptom_risks', _symptom_stage,
+        inputs=['data', 'context'],
+        outputs=['symptom_risks'],
+        reads=('Symptoms', 'symptoms'),
+        fallback={'symptom_risks': {
+            'reported_symptoms': [],
+            'unrecognized_symptoms': [],
+            'severity_score': 0.0,
+            'matches': []
+        }}
+    ))
+    graph.add(Stage(
+        'population_percentiles', _percentiles_stage,
+        inputs=['data'],
+        outputs=['population_percentiles'],
+        reads=tuple(key for keys in REFERENCE_FIELDS.values() for key in keys) + ('Breed',),
+        fallback={'population_percentiles': None}
+    ))
+    graph.add(Stage(
+        'model_assessment', _model_stage,
+        inputs=['data'],
+        outputs=['model_assessment'],
+        inline=False,
+        timeout=MODEL_STAGE_TIMEOUT,
+        fallback={'model_assessment': None},
+        reads=HealthAnalyzer.RECORD_FIELDS
+    ))
+    graph.add(Stage(
+        'care_recommendations', _care_stage,
+        inputs=['species'],
+        outputs=['care_recommendations'],
+        reads=(),
+        fallback={'care_recommendations': []}
+    ))
+    graph.add(Stage(
+        'recommendations', _recommendations_stage,
+        inputs=['data', 'species_config', 'care_recommendations', 'risk_level',
+                'environmental_analysis'],
+        outputs=['recommendations'],
+        reads=(),
+        fallback={'recommendations': FALLBACK_RECOMMENDATIONS}
+    ))
+    return graph
+
+stage_graph = build_stage_graph()
+scheduler = StageScheduler(stage_graph)
+# Whether the plan for a target set (None = all stages) runs the model stage
+_plans_with_model: Dict[Optional[frozenset], bool] = {}
+# Values seeded by initial_values rather than produced by a stage
+INITIAL_INPUTS = ('data', 'context', 'species', 'category', 'species_config')
+sessions = SessionStore(max_sessions=SESSION_MAX_COUNT, ttl_seconds=SESSION_TTL_SECONDS)
+similar_cases = SimilarCaseIndex(SIMILAR_CASES_DATA_PATH, refresh_interval=SIMILAR_CASES_REFRESH_SECONDS)
+
+def parse_fields(fields_param: Optional[str]) -> Optional[List[str]]:
+    """Parse and validate a comma-separated field projection"""
+    if not fields_param:
+        return None
+
+    fields = [field.strip() for field in fields_param.split(',') if field.strip()]
+    for field in fields:
+        if field not in FIELD_OUTPUTS:
+            raise ValueError(f"Unknown field: {field}")
+    return fields
+
+def with_uncertainty(fields: Optional[List[str]]) -> List[str]:
+    """Add the opt-in uncertainty section to a field projection (None = default sections)"""
+    fields = list(TOP_LEVEL_FIELDS if fields is None else fields)
+    return fields if 'uncertainty' in fields else fields + ['uncertainty']
+
+def required_outputs(fields: Optional[List[str]]) -> set:
+    """Stage outputs needed to produce the requested fields (None = default sections)"""
+    if fields is None:
+        fields = TOP_LEVEL_FIELDS
+
+    outputs = set()
+    for field in fields:
+        outputs.update(FIELD_OUTPUTS[field])
+    return outputs
+
+def project_response(response: Dict, fields: Optional[List[str]]) -> Dict:
+    """Keep only the requested (possibly dotted) fields of a response"""
+    if fields is None:
+        return response
+
+    projected = {}
+    for field in fields:
+        top, _, sub = field.partition('.')
+        if not sub:
+            projected[top] = response[top]
+
+    for field in fields:
+        top, _, sub = field.partition('.')
+        if sub and top not in fields:
+            projected.setdefault(top, {})[sub] = response[top][sub]
+
+    if 'degraded_stages' in response:
+        projected['degraded_stages'] = response['degraded_stages']
+    return projected
+
+def assemble_response(values: Dict) -> Dict:
+    """Build the /predict response from whichever stage outputs are present"""
+    response = {}
+    if 'health_score' in values:
+        response['prediction'] = determine_health_status(values['health_score'])
+
+    diagnostic_insights = {}
+    for field in DIAGNOSTIC_FIELDS:
+        key = 'category' if field == 'species_category' else field
+        if key in values:
+            diagnostic_insights[field] = values[key]
+    response['diagnostic_insights'] = diagnostic_insights
+
+    for field in ('disease_risks', 'symptom_risks', 'population_percentiles', 'recommendations',
+                  'model_assessment', 'uncertainty'):
+        if field in values:
+            response[field] = values[field]
+
+    if values.get('_degraded'):
+        response['degraded_stages'] = values['_degraded']
+    return response
+
+def initial_values(data: Dict) -> Dict:
+    """Validate the record and seed the stage inputs shared by every stage"""
+    species = data.get('Species')
+    if not species:
+        raise ValueError("Species is required")
+
+    # One context per request: category, config and derived quantities are
+    # computed once and shared by all analyzers
+    context = AnalysisContext(data)
+    if not context.species_config:
+        raise ValueError(f"Unsupported species: {species}")
+
+    return {
+        'data': data,
+        'context': context,
+        'species': species,
+        'category': context.category,
+        'species_config': context.species_config
+    }
+
+def wait_for_model(targets: Optional[set]) -> None:
+    """Finish loading the health model before a run that includes the model stage
+
+    The model stage's timeout is meant for inference. Unpickling the model
+    on a worker's first request takes seconds, and counting it against
+    the timeout would degrade that request's model_assessment.
+    """
+    key = None if targets is None else frozenset(targets)
+    needed = _plans_with_model.get(key)
+    if needed is None:
+        needed = _plans_with_model[key] = any(
+            stage.name == 'model_assessment' for stage in stage_graph.plan(targets, INITIAL_INPUTS))
+    if needed:
+        health_analyzer.ensure_loaded()
+
+def build_prediction(data: Dict, fields: Optional[List[str]] = None, uncertainty: bool = False) -> Dict:
+    """Run the analysis stages needed for `fields` and assemble the response"""
+    if uncertainty:
+        fields = with_uncertainty(fields)
+    if fields is not None and 'uncertainty' in fields:
+        # Reject unknown instruments up front rather than degrading the stage
+        uncertainty_analyzer.instruments_for(data)
+    initial, targets = initial_values(data), required_outputs(fields)
+    wait_for_model(targets)
+    values = scheduler.run(initial, targets)
+    # Percentiles above come from the reference snapshot, so the record
+    # itself only counts towards later requests
+    reference_distributions.observe(data)
+    drift_monitor.observe(data)
+    return project_response(assemble_response(values), fields)
+
+_MISSING = object()
+
+def start_session(session_id: str, data: Dict, fields: Optional[List[str]] = None,
+                  uncertainty: bool = False) -> Dict:
+    """Run the full analysis for a record and keep it for later updates
+
+    With `uncertainty` the session also keeps the uncertainty section up to
+    date on later updates.
+    """
+    sections = None
+    if uncertainty:
+        uncertainty_analyzer.instruments_for(data)
+        sections = with_uncertainty(None)
+        if fields is not None:
+            fields = with_uncertainty(fields)
+    initial, targets = initial_values(dict(data)), required_outputs(sections)
+    wait_for_model(targets)
+    values = scheduler.run(initial, targets)
+    sessions.put(session_id, AnalysisSession(values, targets, uncertainty))
+    return project_response(assemble_response(values), fields)
+
+def update_session(session_id: str, changes: Dict, fields: Optional[List[str]] = None) -> Dict:
+    """Apply changed fields to a session and rerun only the stages they affect
+
+    `changes` may be the whole form; fields equal to the stored values are
+    ignored. The response lists the stages that were recomputed.
+    """
+    session = sessions.get(session_id)
+    if session is None:
+        raise SessionNotFound(f"Unknown session: {session_id}")
+
+    with session.lock:
+        changed = {field: value for field, value in changes.items()
+                   if session.data.get(field, _MISSING) != value}
+        if changed and session.uncertainty:
+            uncertainty_analyzer.instruments_for(dict(session.data, **changed))
+        if changed:
+            wait_for_model(session.targets)
+
+        if 'Species' in changed:
+            # Species determines the config every stage depends on; rerun
+            # the sections the session was started for, no more
+            values = scheduler.run(initial_values(dict(session.data, **changed)), session.targets)
+            recomputed = list(values['_timings'])
+        elif changed:
+            session.values['context'].update(changed)
+            values = scheduler.rerun(session.values, changed)
+            recomputed = values['_rerun']
+        else:
+            values = session.values
+            recomputed = []
+        session.values = values
+
+    response = project_response(assemble_response(values), fields)
+    response['recomputed_stages'] = recomputed
+    return response
+
+def find_similar_cases(data: Dict, k: int = 5) -> Optional[Dict]:
+    """Closest historical cases of the same species with their outcomes
+
+    Returns None when there are no cases for the species.
+    """
+    found = similar_cases.find(data, k)
+    if found is None:
+        return None
+
+    cases = []
+    for distance, record in found:
+        cases.append({
+            'distance': round(distance, 4),
+            'record': {field: value for field, value in record.items() if field not in OUTCOME_COLUMNS},
+            'outcome': {field: record.get(field) for field in OUTCOME_COLUMNS}
+        })
+    return {'species': data.get('Species'), 'k': k, 'cases': cases}
+
+def determine_health_status(health_score):
+    """Determine health status based on score"""
+    if health_score >= 90:
+        return {
+            'status': 'Healthy',
+            'description': 'Overall health is excellent',
+            'confidence': 'High'
+        }
+    elif health_score >= 75:
+        return {
+            'status': 'Minor Issue',
+            'description': 'Minor health concerns present',
+            'confidence': 'Medium'
+        }
+    elif health_score >= 60:
+        return {
+            'status': 'Requires Treatment',
+            'description': 'Medical attention recommended',
+            'confidence': 'Medium'
+        }
+    return {
+        'status': 'Critical',
+        'description': 'Immediate veterinary care needed',
+        'confidence': 'High'
+    }
+
+def generate_recommendations(data, metrics_analysis, disease_risks, species_config, care_recommendations):
+    """Generate comprehensive recommendations (lists of Recommendation records)"""
+    try:
+        recommendations = {
+            'immediate_actions': [],
+            'lifestyle_changes': [],
+            'monitoring_plan': [],
+            'veterinary_care': []
+        }
+
+        # Add recommendations based on metrics analysis
+        if metrics_analysis['risk_level'] == 'High':
+            recommendations['immediate_actions'].extend(HIGH_RISK_ACTIONS)
+
+        # Add environmental recommendations
+        env_analysis = metrics_analysis.get('environmental_analysis')
+        if env_analysis is not None and env_analysis.risk_level in ('High', 'Moderate'):
+            recommendations['lifestyle_changes'].extend(
+                Recommendation(concern, env_analysis.risk_level) for concern in env_analysis.concerns
+            )
+
+        # Add species-specific care recommendations
+        for care in care_recommendations:
+            recommendations['veterinary_care'].append(Recommendation(care, 'Medium'))
+
+        return recommendations
+
+    except Exception as e:
+        logger.error("Error generating recommendations: %s", e)
+        return {
+            'immediate_actions': [CONTACT_VETERINARIAN],
+            'lifestyle_changes': [],
+            'monitoring_plan': [],
+            'veterinary_care': []
+        }
@@ -0,0 +1,32 @@
+import argparse
+import json
+import sys
+from utils.audit_log import read_records
+from config import AUDIT_LOG_DIR
+
+
+def _day_bound(value: str) -> str:
+    """Accept a date (2024-05-01) or an ISO timestamp"""
+    return value if 'T' in value else value + 'T00:00:00'
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Print prediction audit records as NDJSON')
+    parser.add_argument('--dir', default=AUDIT_LOG_DIR, help='Audit segment directory')
+    parser.add_argument('--since', help='First date or UTC timestamp to include')
+    parser.add_argument('--until', help='Date or UTC timestamp to stop before')
+    parser.add_argument('--species', help='Only records for this species')
+    parser.add_argument('--count', action='store_true', help='Print the number of matching records only')
+    args = parser.parse_args()
+
+    records = read_records(
+        args.dir,
+        since=_day_bound(args.since) if args.since else None,
+        until=_day_bound(args.until) if args.until else None,
+        species=args.species
+    )
+    if args.count:
+        print(sum(1 for _ in records))
+    else:
+        for entry in records:
+            sys.stdout.write(json.dumps(entry) + '\n')
@@ -0,0 +1,273 @@
+import atexit
+import json
+import logging
+import os
+import socket
+import tempfile
+import threading
+from typing import Dict, Optional, Tuple
+from utils.quantile_sketch import KLLSketch
+
+logger = logging.getLogger(__name__)
+
+# Sketched fields and the record keys they may be submitted under
+REFERENCE_FIELDS = {
+    'heart_rate': ('heart_rate', 'Heart_Rate'),
+    'respiratory_rate': ('respiratory_rate', 'Respiratory_Rate'),
+    'temperature': ('temperature', 'Temperature'),
+    'Weight': ('Weight',)
+}
+MERGED_FILE = 'merged.json'
+
+try:
+    import fcntl
+except ImportError:  # Windows: consolidation is skipped
+    fcntl = None
+
+
+def _record_value(data: Dict, keys: Tuple[str, ...]) -> Optional[float]:
+    for key in keys:
+        value = data.get(key)
+        if value not in (None, ''):
+            try:
+                return float(value)
+            except (TypeError, ValueError):
+                return None
+    return None
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _load_sketches(path: str) -> Dict[str, Dict[str, KLLSketch]]:
+    with open(path) as f:
+        state = json.load(f)
+    return {
+        key: {field: KLLSketch.from_dict(sketch) for field, sketch in fields.items()}
+        for key, fields in state.get('sketches', {}).items()
+    }
+
+
+def _merge_into(target: Dict[str, Dict[str, KLLSketch]], source: Dict[str, Dict[str, KLLSketch]]) -> None:
+    for key, fields in source.items():
+        for field, sketch in fields.items():
+            existing = target.setdefault(key, {}).get(field)
+            if existing is None:
+                target[key][field] = KLLSketch.from_dict(sketch.to_dict())
+            else:
+                existing.merge(sketch)
+
+
+class ReferenceDistributions:
+    """Population distributions of vitals and weight, per species and breed
+
+    Every prediction's values go into per-worker KLL sketches (bounded
+    memory whatever the traffic; breeds beyond `max_breeds` per species
+    are only counted at species level). A background thread writes this
+    worker's sketches to `<directory>/<host>-<pid>.json` every
+    `persist_interval` seconds. It then rebuilds the reference that
+    percentiles are read from by merging every worker's file with the
+    live sketches. Requests only read that snapshot. At startup, files
+    left by workers that are no longer running on this host are folded
+    into `merged.json`.
+    """
+
+    def __init__(self, directory: str, k: int = 200, persist_interval: float = 60.0,
+                 min_count: int = 30, max_breeds: int = 50):
+        self.directory = directory
+        self.k = k
+        self.persist_interval = persist_interval
+        self.min_count = min_count
+        self.max_breeds = max_breeds
+        self.worker = f'{socket.gethostname()}-{os.getpid()}'
+        self.path = os.path.join(directory, f'{self.worker}.json')
+
+        self.live: Dict[str, Dict[str, KLLSketch]] = {}
+        self.reference: Dict[str, Dict[str, KLLSketch]] = {}
+        self._breeds: Dict[str, set] = {}
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._dirty = False
+
+    def _ensure_started(self) -> None:
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._consolidate()
+                    self._refresh()
+                    self._thread = threading.Thread(target=self._run, name='reference-sketches', daemon=True)
+                    self._thread.start()
+                    atexit.register(self.close)
+
+    @staticmethod
+    def breed_key(species: str, breed: str) -> str:
+        return f'{species}/{breed}'
+
+    def observe(self, data: Dict) -> None:
+        """Add a record's vitals and weight to its species (and breed) sketches"""
+        species = data.get('Species')
+        if not species:
+            return
+        self._ensure_started()
+        values = {field: _record_value(data, keys) for field, keys in REFERENCE_FIELDS.items()}
+        values = {field: value for field, value in values.items() if value is not None}
+        if not values:
+            return
+
+        keys = [species]
+        breed = data.get('Breed')
+        with self._lock:
+            if breed:
+                breeds = self._breeds.setdefault(species, set())
+                if breed in breeds or len(breeds) < self.max_breeds:
+                    breeds.add(breed)
+                    keys.append(self.breed_key(species, breed))
+            for key in keys:
+                sketches = self.live.setdefault(key, {})
+                for field, value in values.items():
+                    sketch = sketches.get(field)
+                    if sketch is None:
+                        sketch = sketches[field] = KLLSketch(self.k)
+                    sketch.update(value)
+            self._dirty = True
+
+    def _percentiles(self, key: str, values: Dict[str, float]) -> Dict[str, Dict]:
+        sketches = self.reference.get(key, {})
+        result = {}
+        for field, value in values.items():
+            sketch = sketches.get(field)
+            count = sketch.n if sketch is not None else 0
+            percentile = None
+            if count >= self.min_count:
+                # Mid-rank, so a value shared by many animals lands in the middle of its tie
+                percentile = round(50 * (sketch.weight_below(value) + sketch.weight_at_most(value))
+                                   / sketch.total_weight(), 1)
+            result[field] = {'value': value, 'percentile': percentile, 'count': count}
+        return result
+
+    def percentiles(self, data: Dict) -> Dict:
+        """Where each submitted vital and the weight fall in the population seen so far
+
+        Percentiles are None until a population has `min_count` values.
+        """
+        self._ensure_started()
+        species = data.get('Species')
+        values = {field: _record_value(data, keys) for field, keys in REFERENCE_FIELDS.items()}
+        values = {field: value for field, value in values.items() if value is not None}
+        breed = data.get('Breed')
+        return {
+            'species': self._percentiles(species, values),
+            'breed': self._percentiles(self.breed_key(species, breed), values) if breed else None
+        }
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.persist_interval):
+            try:
+                self.persist()
+                self._refresh()
+            except Exception as e:
+                logger.error("Error persisting reference distributions: %s", e)
+
+    def _snapshot(self) -> Dict:
+        with self._lock:
+            self._dirty = False
+            return {key: {field: sketch.to_dict() for field, sketch in fields.items()}
+                    for key, fields in self.live.items()}
+
+    def persist(self) -> None:
+        """Write this worker's sketches to its file (atomically)"""
+        if not self._dirty:
+            return
+        state = {'worker': self.worker, 'sketches': self._snapshot()}
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _refresh(self) -> None:
+        """Rebuild the reference from every persisted file plus the live sketches"""
+        reference: Dict[str, Dict[str, KLLSketch]] = {}
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            names = []
+        for name in names:
+            if not name.endswith('.json') or name == f'{self.worker}.json':
+                continue
+            try:
+                _merge_into(reference, _load_sketches(os.path.join(self.directory, name)))
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning("Skipping unreadable reference sketch file %s: %s", name, e)
+
+        with self._lock:
+            live = {key: dict(fields) for key, fields in self.live.items()}
+            _merge_into(reference, live)
+        self.reference = reference
+
+    def _consolidate(self) -> None:
+        """Fold files of workers no longer running on this host into merged.json"""
+        if fcntl is None or not os.path.isdir(self.directory):
+            return
+        host = socket.gethostname()
+        with open(os.path.join(self.directory, '.lock'), 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            stale = []
+            for name in os.listdir(self.directory):
+                worker, ext = os.path.splitext(name)
+                owner, _, pid = worker.rpartition('-')
+                if ext == '.json' and owner == host and pid.isdigit() and not _pid_alive(int(pid)):
+                    stale.append(name)
+            if not stale:
+                return
+
+            merged_path = os.path.join(self.directory, MERGED_FILE)
+            merged = _load_sketches(merged_path) if os.path.exists(merged_path) else {}
+            for name in stale:
+                try:
+                    _merge_into(merged, _load_sketches(os.path.join(self.directory, name)))
+                except (OSError, ValueError, KeyError) as e:
+                    logger.warning("Dropping unreadable reference sketch file %s: %s", name, e)
+
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'worker': 'merged', 'sketches': {
+                    key: {field: sketch.to_dict() for field, sketch in fields.items()}
+                    for key, fields in merged.items()
+                }}, f)
+            os.replace(tmp_path, merged_path)
+            for name in stale:
+                os.remove(os.path.join(self.directory, name))
+            logger.info("Merged %s reference sketch files from stopped workers", len(stale))
+
+    def close(self) -> None:
+        """Stop the background thread and write the sketches one last time"""
+        self._stop.set()
+        try:
+            self.persist()
+        except Exception as e:
+            logger.error("Error persisting reference distributions: %s", e)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'worker': self.worker,
+                'populations': len(self.live),
+                'observations': {key: max((s.n for s in fields.values()), default=0)
+                                 for key, fields in self.live.items() if '/' not in key},
+                'sketch_items': sum(len(s) for fields in self.live.values() for s in fields.values())
+            }
@@ -1,6 +1,7 @@
 import logging
 from typing import Dict, List, Optional
 from species_config import SPECIES_CONFIG, get_species_category, get_species_config
+from analysis_context import AnalysisContext
 import numpy as np
 
 logger = logging.getLogger(__name__)
@@ -33,23 +34,22 @@ class SpeciesHealthAnalyzer:
             }
         }
 
-    def analyze_health(self, data: Dict) -> Dict:
+    def analyze_health(self, data: Dict, context: Optional[AnalysisContext] = None) -> Dict:
         """Perform species-specific health analysis"""
         try:
-            species = data.get('Species')
-            category = get_species_category(species)
+            context = context or AnalysisContext(data)
+            species = context.species
+            category = context.category
             
             if not category or not species:
                 raise ValueError(f"Invalid species: {species}")
 
-            species_config = get_species_config(species)
-            
             analysis = {
-                'vital_signs': self._analyze_vital_signs(data, species_config, category),
-                'physical_condition': self._analyze_physical_condition(data, species_config),
-                'environmental_factors': self._analyze_environmental_factors(data, category),
-                'age_assessment': self._analyze_age(data, species_config),
-                'risk_factors': self._identify_risk_factors(data, species_config, category)
+                'vital_signs': self._analyze_vital_signs(context, category),
+                'physical_condition': self._physical_condition(context),
+                'environmental_factors': self._environmental_factors(context),
+                'age_assessment': self._age_assessment(context),
+                'risk_factors': self._identify_risk_factors(context)
             }
 
             # Calculate overall health score
@@ -58,50 +58,57 @@ class SpeciesHealthAnalyzer:
             return analysis
 
         except Exception as e:
-            logger.error(f"Error in species health analysis: {str(e)}")
+            logger.error("Error in species health analysis: %s", e)
             return {'error': str(e)}
 
-    def _analyze_vital_signs(self, data: Dict, species_config: Dict, category: str) -> Dict:
+    def _analyze_vital_signs(self, context: AnalysisContext, category: str) -> Dict:
         """Analyze vital signs based on species-specific ranges"""
         vital_signs = {}
         weights = self.vital_signs_weights.get(category, {})
         
-        for sign, (min_val, max_val) in species_config['vital_signs'].items():
-            if sign in data and data[sign]:
-                value = float(data[sign])
-                deviation = 0
-                
-                if value < min_val:
-                    deviation = (min_val - value) / min_val
-                elif value > max_val:
-                    deviation = (value - max_val) / max_val
-                
-                status = 'Normal' if deviation == 0 else 'Abnormal'
-                severity = self._calculate_severity(deviation)
-                
-                vital_signs[sign] = {
-                    'value': value,
-                    'range': (min_val, max_val),
-                    'status': status,
-                    'severity': severity,
-                    'weight': weights.get(sign, 0.33),
-                    'deviation': deviation
-                }
+        for sign, vital in context.vital_deviations.items():
+            deviation = vital['deviation']
+            status = 'Normal' if deviation == 0 else 'Abnormal'
+            severity = self._calculate_severity(deviation)
+            
+            vital_signs[sign] = {
+                'value': vital['value'],
+                'range': vital['range'],
+                'status': status,
+                'severity': severity,
+                'weight': weights.get(sign, 0.33),
+                'deviation': deviation
+            }
         
         return vital_signs
 
-    def _analyze_physical_condition(self, data: Dict, species_config: Dict) -> Dict:
+    def _physical_condition(self, context: AnalysisContext) -> Dict:
+        return context.memo(
+            'species_health.physical_condition',
+            lambda: self._analyze_physical_condition(context.weight_status['status'])
+        )
+
+    def _environmental_factors(self, context: AnalysisContext) -> Dict:
+        return context.memo(
+            'species_health.environmental_factors',
+            lambda: self._analyze_environmental_factors(context.data, context.category)
+        )
+
+    def _age_assessment(self, context: AnalysisContext) -> Dict:
+        return context.memo(
+            'species_health.age_assessment',
+            lambda: self._analyze_age(context.data, context.species_config, context.age_ratio)
+        )
+
+    def _analyze_physical_condition(self, weight_status: str) -> Dict:
         """Analyze physical condition based on species characteristics"""
-        weight = float(data.get('Weight', 0))
-        weight_range = species_config.get('weight_range', (0, 0))
-        
         condition = {
             'weight_status': 'Normal',
             'severity': 'Low',
             'recommendations': []
         }
         
-        if weight < weight_range[0]:
+        if weight_status == 'Underweight':
             condition.update({
                 'weight_status': 'Underweight',
                 'severity': 'High',
@@ -111,7 +118,7 @@ class SpeciesHealthAnalyzer:
                     'Monitor weight gain progress'
                 ]
             })
-        elif weight > weight_range[1]:
+        elif weight_status == 'Overweight':
             condition.update({
                 'weight_status': 'Overweight',
                 'severity': 'High',
@@ -152,15 +159,16 @@ class SpeciesHealthAnalyzer:
         
         return category_env.get(environment, {'risk': 'Unknown', 'concerns': []})
 
-    def _analyze_age(self, data: Dict, species_config: Dict) -> Dict:
+    def _analyze_age(self, data: Dict, species_config: Dict, age_ratio: Optional[float] = None) -> Dict:
         """Analyze age relative to species lifespan"""
-        age = float(data.get('Age', 0))
-        lifespan = species_config.get('lifespan', 0)
-        
-        if lifespan == 0:
-            return {'status': 'Unknown'}
+        if age_ratio is None:
+            age = float(data.get('Age', 0))
+            lifespan = species_config.get('lifespan', 0)
             
-        age_ratio = age / lifespan
+            if lifespan == 0:
+                return {'status': 'Unknown'}
+                
+            age_ratio = age / lifespan
         
         if age_ratio < 0.25:
             return {
@@ -181,12 +189,12 @@ class SpeciesHealthAnalyzer:
                 'specific_concerns': ['Age-related conditions', 'Mobility issues']
             }
 
-    def _identify_risk_factors(self, data: Dict, species_config: Dict, category: str) -> List[Dict]:
+    def _identify_risk_factors(self, context: AnalysisContext) -> List[Dict]:
         """Identify species-specific risk factors"""
         risk_factors = []
         
-        # Age-related risks
-        age_analysis = self._analyze_age(data, species_config)
+        # Age-related risks (sections are shared with analyze_health via the context)
+        age_analysis = self._age_assessment(context)
         if age_analysis['status'] == 'Senior':
             risk_factors.append({
                 'factor': 'Age',
@@ -195,7 +203,7 @@ class SpeciesHealthAnalyzer:
             })
         
         # Environment risks
-        env_analysis = self._analyze_environmental_factors(data, category)
+        env_analysis = self._environmental_factors(context)
         if env_analysis['risk'] in ['High', 'Moderate']:
             risk_factors.append({
                 'factor': 'Environment',
@@ -204,7 +212,7 @@ class SpeciesHealthAnalyzer:
             })
         
         # Weight risks
-        weight_analysis = self._analyze_physical_condition(data, species_config)
+        weight_analysis = self._physical_condition(context)
         if weight_analysis['weight_status'] != 'Normal':
             risk_factors.append({
                 'factor': 'Weight',
@@ -254,5 +262,5 @@ class SpeciesHealthAnalyzer:
             return max(0, min(100, base_score - deductions))
             
         except Exception as e:
-            logger.error(f"Error calculating health score: {str(e)}")
+            logger.error("Error calculating health score: %s", e)
             return 0 
\ No newline at end of file
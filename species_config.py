@@ -229,6 +229,14 @@ def get_all_species():
         species_list.extend(SPECIES_CONFIG[category].keys())
     return species_list
 
+def get_all_vital_signs():
+    """Get the names of all vital signs measured for any species"""
+    vital_signs = set()
+    for category in SPECIES_CONFIG.values():
+        for config in category.values():
+            vital_signs.update(config.get('vital_signs', {}))
+    return sorted(vital_signs)
+
 def get_species_vital_ranges(species):
     """Get vital sign ranges for specific species"""
     category = get_species_category(species)
@@ -1,9 +1,25 @@
 import logging
-from typing import Dict, List, Optional
-from species_config import SPECIES_CONFIG, get_species_category, get_species_config
+from typing import Dict, Optional, Tuple
+import numpy as np
+from species_config import SPECIES_CONFIG, get_species_category, get_species_config, get_all_vital_signs
+from analysis_context import AnalysisContext
+from analysis_results import (
+    VitalSignResult, WeightAnalysis, AgeAnalysis, EnvironmentAnalysis, Appropriateness, DietAnalysis,
+    ActivityAnalysis
+)
 
 logger = logging.getLogger(__name__)
 
+# Lowest score of each health status, best first; anything lower is Critical.
+# Same thresholds as prediction_pipeline.determine_health_status.
+HEALTH_STATUS_THRESHOLDS = ((90, 'Healthy'), (75, 'Minor Issue'), (60, 'Requires Treatment'))
+
+def health_statuses(scores: np.ndarray) -> np.ndarray:
+    """Health status label for every score in an array"""
+    scores = np.asarray(scores)
+    return np.select([scores >= threshold for threshold, _ in HEALTH_STATUS_THRESHOLDS],
+                     [status for _, status in HEALTH_STATUS_THRESHOLDS], 'Critical')
+
 class SpeciesMetricsAnalyzer:
     """Handles species-specific health metrics analysis"""
 
@@ -32,171 +48,229 @@ class SpeciesMetricsAnalyzer:
             }
         }
 
-    def analyze_metrics(self, data: Dict) -> Dict:
-        """Analyze health metrics based on species"""
+    CORE_SECTIONS = ('vital_signs', 'weight_analysis', 'age_analysis', 'environmental_analysis')
+    OPTIONAL_SECTIONS = ('diet_analysis', 'activity_analysis')
+
+    # Risk of each living environment per species category
+    ENVIRONMENT_RISKS = {
+        'Mammals': {
+            'Indoor Only': {'risk': 'Low', 'concerns': ['Limited exercise']},
+            'Outdoor Only': {'risk': 'High', 'concerns': ['Weather exposure', 'Parasites']},
+            'Mixed': {'risk': 'Moderate', 'concerns': ['Temperature changes']}
+        },
+        'Birds': {
+            'Indoor Only': {'risk': 'Low', 'concerns': ['Air quality']},
+            'Outdoor Only': {'risk': 'High', 'concerns': ['Predators']},
+            'Mixed': {'risk': 'Moderate', 'concerns': ['Temperature changes']}
+        },
+        'Reptiles': {
+            'Indoor Only': {'risk': 'Low', 'concerns': ['UV exposure']},
+            'Controlled Environment': {'risk': 'Low', 'concerns': ['Temperature regulation']}
+        },
+        'Aquatic': {
+            'Controlled Environment': {'risk': 'Low', 'concerns': ['Water quality']},
+            'Mixed': {'risk': 'High', 'concerns': ['Temperature fluctuation']}
+        }
+    }
+
+    # Age analysis by life stage (age as a fraction of lifespan); the same
+    # record serves every animal at that stage
+    AGE_UNKNOWN = AgeAnalysis('Unknown')
+    AGE_YOUNG = AgeAnalysis('Young', 'Juvenile', 'Low', ('Growth monitoring', 'Vaccination schedule'))
+    AGE_ADULT = AgeAnalysis('Adult', 'Mature', 'Moderate', ('Regular health maintenance',))
+    AGE_SENIOR = AgeAnalysis('Senior', 'Geriatric', 'High', ('Age-related conditions', 'Mobility issues'))
+
+    DIET_RECOMMENDATIONS = {
+        'Dog': (
+            'Feed age-appropriate food',
+            'Maintain consistent feeding schedule',
+            'Monitor portion sizes',
+            'Ensure fresh water available'
+        ),
+        'Cat': (
+            'High protein diet recommended',
+            'Multiple small meals daily',
+            'Fresh water in multiple locations',
+            'Monitor food intake'
+        )
+    }
+    DEFAULT_DIET_RECOMMENDATIONS = ('Consult veterinarian for dietary advice',)
+
+    ACTIVITY_RECOMMENDATIONS = {
+        'Dog': (
+            'Regular daily walks',
+            'Interactive play sessions',
+            'Mental stimulation activities',
+            'Age-appropriate exercise'
+        ),
+        'Cat': (
+            'Interactive play sessions',
+            'Climbing opportunities',
+            'Environmental enrichment',
+            'Puzzle feeders'
+        )
+    }
+    DEFAULT_ACTIVITY_RECOMMENDATIONS = ('Consult veterinarian for activity guidelines',)
+
+    # Appropriateness of each diet and activity level per species
+    DIET_APPROPRIATENESS = {
+        'Dog': {
+            'Premium Commercial': Appropriateness('High', 'Well-balanced nutrition', DIET_RECOMMENDATIONS['Dog']),
+            'Basic Commercial': Appropriateness('Moderate', 'May need supplements', DIET_RECOMMENDATIONS['Dog']),
+            'Home-Prepared': Appropriateness('Moderate', 'Ensure balanced nutrients', DIET_RECOMMENDATIONS['Dog']),
+            'Raw Diet': Appropriateness('Moderate', 'Monitor for pathogens', DIET_RECOMMENDATIONS['Dog']),
+            'Prescription': Appropriateness('High', 'Follow vet recommendations', DIET_RECOMMENDATIONS['Dog'])
+        },
+        'Cat': {
+            'Premium Commercial': Appropriateness('High', 'Good protein content', DIET_RECOMMENDATIONS['Cat']),
+            'Basic Commercial': Appropriateness('Moderate', 'Check taurine levels', DIET_RECOMMENDATIONS['Cat']),
+            'Home-Prepared': Appropriateness('Low', 'Risk of nutrient deficiency', DIET_RECOMMENDATIONS['Cat']),
+            'Raw Diet': Appropriateness('Moderate', 'Ensure proper handling', DIET_RECOMMENDATIONS['Cat']),
+            'Prescription': Appropriateness('High', 'Follow vet guidelines', DIET_RECOMMENDATIONS['Cat'])
+        }
+    }
+    ACTIVITY_APPROPRIATENESS = {
+        'Dog': {
+            'Very Active': Appropriateness('High', 'Excellent for most healthy dogs',
+                                           ACTIVITY_RECOMMENDATIONS['Dog']),
+            'Active': Appropriateness('High', 'Good activity level', ACTIVITY_RECOMMENDATIONS['Dog']),
+            'Moderate': Appropriateness('Moderate', 'May need more exercise', ACTIVITY_RECOMMENDATIONS['Dog']),
+            'Sedentary': Appropriateness('Low', 'Increase activity if possible', ACTIVITY_RECOMMENDATIONS['Dog'])
+        },
+        'Cat': {
+            'Very Active': Appropriateness('High', 'Great for indoor cats', ACTIVITY_RECOMMENDATIONS['Cat']),
+            'Active': Appropriateness('High', 'Good activity level', ACTIVITY_RECOMMENDATIONS['Cat']),
+            'Moderate': Appropriateness('Moderate', 'Encourage more play', ACTIVITY_RECOMMENDATIONS['Cat']),
+            'Sedentary': Appropriateness('Low', 'Add enrichment activities', ACTIVITY_RECOMMENDATIONS['Cat'])
+        }
+    }
+
+    # Health score deductions
+    WEIGHT_DEDUCTIONS = {'High': 15}  # by weight severity, 8 otherwise
+    SENIOR_AGE_DEDUCTION = 10
+    ENVIRONMENT_DEDUCTIONS = {'High': 15, 'Moderate': 8}
+
+    # Record fields each section reads, besides Species
+    SECTION_FIELDS = {
+        'vital_signs': tuple(get_all_vital_signs()),
+        'weight_analysis': ('Weight',),
+        'age_analysis': ('Age',),
+        'environmental_analysis': ('Living_Environment',),
+        'diet_analysis': ('Diet_Type',),
+        'activity_analysis': ('Activity_Level',)
+    }
+
+    def analyze_metrics(self, data: Dict, sections: Optional[set] = None,
+                        context: Optional[AnalysisContext] = None) -> Dict:
+        """Analyze health metrics based on species
+
+        `sections` limits the optional sections (diet/activity analysis) that
+        are computed; the sections feeding the health score always are.
+        `context` shares derived quantities with the other analyzers.
+        """
         try:
-            species = data.get('Species')
-            category = get_species_category(species)
-            species_config = get_species_config(species)
+            context = context or AnalysisContext(data)
+            species = context.species
 
-            if not species_config:
+            if not context.species_config:
                 raise ValueError(f"No configuration found for species: {species}")
 
             analysis = {
-                'vital_signs': self._analyze_vital_signs(data, species_config, category),
-                'weight_analysis': self._analyze_weight(data, species_config),
-                'age_analysis': self._analyze_age(data, species_config),
-                'environmental_analysis': self._analyze_environment(data, category),
-                'diet_analysis': self._analyze_diet(data, species),
-                'activity_analysis': self._analyze_activity(data, species)
+                section: self.analyze_section(section, context)
+                for section in self.CORE_SECTIONS
             }
+            for section in self.OPTIONAL_SECTIONS:
+                if sections is None or section in sections:
+                    analysis[section] = self.analyze_section(section, context)
 
             # Calculate overall health score
-            analysis['health_score'] = self._calculate_health_score(analysis, category)
-            analysis['risk_level'] = self._determine_risk_level(analysis)
+            analysis.update(self.summarize(analysis, context.category))
 
             return analysis
 
         except Exception as e:
-            logger.error(f"Error in species metrics analysis: {str(e)}")
+            logger.error("Error in species metrics analysis: %s", e)
             return {'error': str(e)}
 
-    def _analyze_vital_signs(self, data: Dict, species_config: Dict, category: str) -> Dict:
+    def analyze_section(self, section: str, context: AnalysisContext):
+        """Compute a single analysis section (a record, see analysis_results) for the record in `context`"""
+        if section == 'vital_signs':
+            return self._analyze_vital_signs(context, context.category)
+        if section == 'weight_analysis':
+            return self._analyze_weight(context)
+        if section == 'age_analysis':
+            return self._analyze_age(context)
+        if section == 'environmental_analysis':
+            return self._analyze_environment(context.data, context.category)
+        if section == 'diet_analysis':
+            return self._analyze_diet(context.data, context.species)
+        if section == 'activity_analysis':
+            return self._analyze_activity(context.data, context.species)
+        raise ValueError(f"Unknown metrics section: {section}")
+
+    def summarize(self, analysis: Dict, category: str) -> Dict:
+        """Health score and risk level from the core sections"""
+        return self.score_summary(self._calculate_health_score(analysis, category))
+
+    def score_summary(self, health_score: float) -> Dict:
+        """Health score with the risk level it implies"""
+        return {
+            'health_score': health_score,
+            'risk_level': self._determine_risk_level({'health_score': health_score})
+        }
+
+    def _analyze_vital_signs(self, context: AnalysisContext, category: str) -> Dict[str, VitalSignResult]:
         """Analyze vital signs based on species-specific ranges"""
         vital_signs = {}
         weights = self.vital_signs_importance.get(category, {})
 
-        for sign, (min_val, max_val) in species_config['vital_signs'].items():
-            if sign in data and data[sign]:
-                value = float(data[sign])
-                deviation = 0
-
-                if value < min_val:
-                    deviation = (min_val - value) / min_val
-                elif value > max_val:
-                    deviation = (value - max_val) / max_val
-
-                vital_signs[sign] = {
-                    'value': value,
-                    'range': (min_val, max_val),
-                    'status': 'Normal' if deviation == 0 else 'Abnormal',
-                    'deviation': deviation,
-                    'weight': weights.get(sign, 0.33),
-                    'severity': self._calculate_severity(deviation)
-                }
+        for sign, vital in context.vital_deviations.items():
+            deviation = vital['deviation']
+            vital_signs[sign] = VitalSignResult(
+                vital['value'], vital['range'], 'Normal' if deviation == 0 else 'Abnormal', deviation,
+                weights.get(sign, 0.33), self._calculate_severity(deviation)
+            )
 
         return vital_signs
 
-    def _analyze_weight(self, data: Dict, species_config: Dict) -> Dict:
+    def _analyze_weight(self, context: AnalysisContext) -> WeightAnalysis:
         """Analyze weight based on species-specific ranges"""
-        weight = float(data.get('Weight', 0))
-        weight_range = species_config.get('weight_range', (0, 0))
-
-        if weight < weight_range[0]:
-            status = 'Underweight'
-            severity = 'High'
-            deviation = (weight_range[0] - weight) / weight_range[0]
-        elif weight > weight_range[1]:
-            status = 'Overweight'
-            severity = 'High'
-            deviation = (weight - weight_range[1]) / weight_range[1]
-        else:
-            status = 'Normal'
-            severity = 'Low'
-            deviation = 0
-
-        return {
-            'value': weight,
-            'range': weight_range,
-            'status': status,
-            'severity': severity,
-            'deviation': deviation
-        }
+        weight_status = context.weight_status
+        status = weight_status['status']
+        return WeightAnalysis(weight_status['value'], weight_status['range'], status,
+                              'Low' if status == 'Normal' else 'High', weight_status['deviation'])
 
-    def _analyze_age(self, data: Dict, species_config: Dict) -> Dict:
+    def _analyze_age(self, context: AnalysisContext) -> AgeAnalysis:
         """Analyze age relative to species lifespan"""
-        age = float(data.get('Age', 0))
-        lifespan = species_config.get('lifespan', 0)
-
-        if lifespan == 0:
-            return {'status': 'Unknown'}
+        age_ratio = context.age_ratio
 
-        age_ratio = age / lifespan
+        if age_ratio is None:
+            return self.AGE_UNKNOWN
         if age_ratio < 0.25:
-            return {
-                'status': 'Young',
-                'life_stage': 'Juvenile',
-                'risk_level': 'Low',
-                'concerns': ['Growth monitoring', 'Vaccination schedule']
-            }
+            return self.AGE_YOUNG
         elif age_ratio < 0.75:
-            return {
-                'status': 'Adult',
-                'life_stage': 'Mature',
-                'risk_level': 'Moderate',
-                'concerns': ['Regular health maintenance']
-            }
-        else:
-            return {
-                'status': 'Senior',
-                'life_stage': 'Geriatric',
-                'risk_level': 'High',
-                'concerns': ['Age-related conditions', 'Mobility issues']
-            }
+            return self.AGE_ADULT
+        return self.AGE_SENIOR
 
-    def _analyze_environment(self, data: Dict, category: str) -> Dict:
+    def _analyze_environment(self, data: Dict, category: str) -> EnvironmentAnalysis:
         """Analyze environmental factors based on species category"""
         environment = data.get('Living_Environment')
-        
-        env_risks = {
-            'Mammals': {
-                'Indoor Only': {'risk': 'Low', 'concerns': ['Limited exercise']},
-                'Outdoor Only': {'risk': 'High', 'concerns': ['Weather exposure', 'Parasites']},
-                'Mixed': {'risk': 'Moderate', 'concerns': ['Temperature changes']}
-            },
-            'Birds': {
-                'Indoor Only': {'risk': 'Low', 'concerns': ['Air quality']},
-                'Outdoor Only': {'risk': 'High', 'concerns': ['Predators']},
-                'Mixed': {'risk': 'Moderate', 'concerns': ['Temperature changes']}
-            },
-            'Reptiles': {
-                'Indoor Only': {'risk': 'Low', 'concerns': ['UV exposure']},
-                'Controlled Environment': {'risk': 'Low', 'concerns': ['Temperature regulation']}
-            },
-            'Aquatic': {
-                'Controlled Environment': {'risk': 'Low', 'concerns': ['Water quality']},
-                'Mixed': {'risk': 'High', 'concerns': ['Temperature fluctuation']}
-            }
-        }
 
-        category_risks = env_risks.get(category, {})
-        env_assessment = category_risks.get(environment, {'risk': 'Unknown', 'concerns': []})
-        
-        return {
-            'environment': environment,
-            'risk_level': env_assessment['risk'],
-            'concerns': env_assessment['concerns']
-        }
+        category_risks = self.ENVIRONMENT_RISKS.get(category, {})
+        env_assessment = category_risks.get(environment, {'risk': 'Unknown', 'concerns': ()})
+        return EnvironmentAnalysis(environment, env_assessment['risk'], env_assessment['concerns'])
 
-    def _analyze_diet(self, data: Dict, species: str) -> Dict:
+    def _analyze_diet(self, data: Dict, species: str) -> DietAnalysis:
         """Analyze diet based on species requirements"""
         diet_type = data.get('Diet_Type')
-        
-        return {
-            'diet_type': diet_type,
-            'appropriateness': self._evaluate_diet_appropriateness(diet_type, species),
-            'recommendations': self._get_diet_recommendations(species)
-        }
+        return DietAnalysis(diet_type, self._evaluate_diet_appropriateness(diet_type, species),
+                            self._get_diet_recommendations(species))
 
-    def _analyze_activity(self, data: Dict, species: str) -> Dict:
+    def _analyze_activity(self, data: Dict, species: str) -> ActivityAnalysis:
         """Analyze activity level based on species needs"""
         activity_level = data.get('Activity_Level')
-        
-        return {
-            'activity_level': activity_level,
-            'appropriateness': self._evaluate_activity_appropriateness(activity_level, species),
-            'recommendations': self._get_activity_recommendations(species)
-        }
+        return ActivityAnalysis(activity_level, self._evaluate_activity_appropriateness(activity_level, species),
+                                self._get_activity_recommendations(species))
 
     def _calculate_severity(self, deviation: float) -> str:
         """Calculate severity level based on deviation"""
@@ -217,34 +291,97 @@ class SpeciesMetricsAnalyzer:
             
             # Vital signs deductions
             vital_signs = analysis.get('vital_signs', {})
-            for sign, data in vital_signs.items():
-                if data['status'] == 'Abnormal':
-                    deduction = data['deviation'] * 100 * data['weight']
+            for sign, result in vital_signs.items():
+                if result.status == 'Abnormal':
+                    deduction = result.deviation * 100 * result.weight
                     deductions += deduction
             
-            # Weight deductions
-            weight_analysis = analysis.get('weight_analysis', {})
-            if weight_analysis.get('status') != 'Normal':
-                deductions += 15 if weight_analysis.get('severity') == 'High' else 8
+            # Weight deductions (a missing section counts as abnormal)
+            weight_analysis = analysis.get('weight_analysis')
+            if getattr(weight_analysis, 'status', None) != 'Normal':
+                deductions += self.WEIGHT_DEDUCTIONS.get(getattr(weight_analysis, 'severity', None), 8)
             
             # Age-related deductions
-            age_analysis = analysis.get('age_analysis', {})
-            if age_analysis.get('risk_level') == 'High':
-                deductions += 10
+            age_analysis = analysis.get('age_analysis')
+            if getattr(age_analysis, 'risk_level', None) == 'High':
+                deductions += self.SENIOR_AGE_DEDUCTION
             
             # Environmental deductions
-            env_analysis = analysis.get('environmental_analysis', {})
-            if env_analysis.get('risk_level') == 'High':
-                deductions += 15
-            elif env_analysis.get('risk_level') == 'Moderate':
-                deductions += 8
+            env_analysis = analysis.get('environmental_analysis')
+            deductions += self.ENVIRONMENT_DEDUCTIONS.get(getattr(env_analysis, 'risk_level', None), 0)
             
             return max(0, min(100, base_score - deductions))
             
         except Exception as e:
-            logger.error(f"Error calculating health score: {str(e)}")
+            logger.error("Error calculating health score: %s", e)
             return 0
 
+    # Vectorized forms of the deductions above, one input at a time. They
+    # match _calculate_health_score for every value, including a vital sign
+    # of 0 counting as not reported.
+
+    @staticmethod
+    def vital_sign_deductions(values: np.ndarray, vital_range: Tuple[float, float], weight: float) -> np.ndarray:
+        """Score deduction for each value of one vital sign"""
+        values = np.asarray(values, dtype=float)
+        min_val, max_val = vital_range
+        with np.errstate(divide='ignore', invalid='ignore'):
+            deviation = np.where(values < min_val, (min_val - values) / min_val,
+                                 np.where(values > max_val, (values - max_val) / max_val, 0.0))
+        return np.where(values != 0, deviation * 100 * weight, 0.0)
+
+    def weight_deductions(self, values: np.ndarray, weight_range: Tuple[float, float]) -> np.ndarray:
+        """Score deduction for each body weight"""
+        values = np.asarray(values, dtype=float)
+        outside = (values < weight_range[0]) | (values > weight_range[1])
+        return np.where(outside, self.WEIGHT_DEDUCTIONS['High'], 0.0)
+
+    def age_deductions(self, values: np.ndarray, lifespan: float) -> np.ndarray:
+        """Score deduction for each age"""
+        values = np.asarray(values, dtype=float)
+        if not lifespan:
+            return np.zeros_like(values)
+        return np.where(values / lifespan >= 0.75, self.SENIOR_AGE_DEDUCTION, 0.0)
+
+    def environment_deduction(self, environment: Optional[str], category: str) -> float:
+        """Score deduction for a living environment"""
+        risk = self.ENVIRONMENT_RISKS.get(category, {}).get(environment, {}).get('risk')
+        return self.ENVIRONMENT_DEDUCTIONS.get(risk, 0)
+
+    def health_scores(self, data: Dict, overrides: Optional[Dict[str, np.ndarray]] = None) -> np.ndarray:
+        """Health scores for a record with numeric fields replaced by arrays
+
+        `overrides` maps vital signs, 'Weight' or 'Age' to arrays that
+        broadcast against each other, e.g. shapes (n, 1) and (1, m) score an
+        n x m grid. One vectorized pass gives the same scores as
+        analyze_metrics on each combination.
+        """
+        species = data.get('Species')
+        config = get_species_config(species)
+        if not config:
+            raise ValueError(f"No configuration found for species: {species}")
+        category = get_species_category(species)
+        overrides = overrides or {}
+        weights = self.vital_signs_importance.get(category, {})
+
+        deductions = np.zeros(())
+        for sign, vital_range in config['vital_signs'].items():
+            if sign in overrides:
+                values = overrides[sign]
+            elif sign in data and data[sign]:
+                values = float(data[sign])
+            else:
+                continue
+            deductions = deductions + self.vital_sign_deductions(values, vital_range, weights.get(sign, 0.33))
+
+        weight = overrides.get('Weight', float(data.get('Weight', 0)))
+        age = overrides.get('Age', float(data.get('Age', 0)))
+        deductions = (deductions
+                      + self.weight_deductions(weight, config.get('weight_range', (0, 0)))
+                      + self.age_deductions(age, config.get('lifespan', 0))
+                      + self.environment_deduction(data.get('Living_Environment'), category))
+        return np.clip(100 - deductions, 0, 100)
+
     def _determine_risk_level(self, analysis: Dict) -> str:
         """Determine overall risk level based on analysis"""
         health_score = analysis.get('health_score', 0)
@@ -256,117 +393,36 @@ class SpeciesMetricsAnalyzer:
         else:
             return 'High'
 
-    def _evaluate_diet_appropriateness(self, diet_type: str, species: str) -> Dict:
+    def _evaluate_diet_appropriateness(self, diet_type: str, species: str) -> Appropriateness:
         """Evaluate appropriateness of diet for species"""
         try:
-            diet_recommendations = {
-                'Dog': {
-                    'Premium Commercial': {'appropriateness': 'High', 'notes': 'Well-balanced nutrition'},
-                    'Basic Commercial': {'appropriateness': 'Moderate', 'notes': 'May need supplements'},
-                    'Home-Prepared': {'appropriateness': 'Moderate', 'notes': 'Ensure balanced nutrients'},
-                    'Raw Diet': {'appropriateness': 'Moderate', 'notes': 'Monitor for pathogens'},
-                    'Prescription': {'appropriateness': 'High', 'notes': 'Follow vet recommendations'}
-                },
-                'Cat': {
-                    'Premium Commercial': {'appropriateness': 'High', 'notes': 'Good protein content'},
-                    'Basic Commercial': {'appropriateness': 'Moderate', 'notes': 'Check taurine levels'},
-                    'Home-Prepared': {'appropriateness': 'Low', 'notes': 'Risk of nutrient deficiency'},
-                    'Raw Diet': {'appropriateness': 'Moderate', 'notes': 'Ensure proper handling'},
-                    'Prescription': {'appropriateness': 'High', 'notes': 'Follow vet guidelines'}
-                }
-            }
-
-            species_diet = diet_recommendations.get(species, {})
-            diet_eval = species_diet.get(diet_type, {
-                'appropriateness': 'Unknown',
-                'notes': 'No specific recommendations available'
-            })
-
-            return {
-                'appropriateness': diet_eval['appropriateness'],
-                'notes': diet_eval['notes'],
-                'recommendations': self._get_diet_recommendations(species)
-            }
+            evaluation = self.DIET_APPROPRIATENESS.get(species, {}).get(diet_type)
+            if evaluation is None:
+                evaluation = Appropriateness('Unknown', 'No specific recommendations available',
+                                             self._get_diet_recommendations(species))
+            return evaluation
 
         except Exception as e:
-            logger.error(f"Error evaluating diet: {str(e)}")
-            return {
-                'appropriateness': 'Unknown',
-                'notes': 'Error evaluating diet',
-                'recommendations': []
-            }
+            logger.error("Error evaluating diet: %s", e)
+            return Appropriateness('Unknown', 'Error evaluating diet', ())
 
-    def _evaluate_activity_appropriateness(self, activity_level: str, species: str) -> Dict:
+    def _evaluate_activity_appropriateness(self, activity_level: str, species: str) -> Appropriateness:
         """Evaluate appropriateness of activity level for species"""
         try:
-            activity_recommendations = {
-                'Dog': {
-                    'Very Active': {'appropriateness': 'High', 'notes': 'Excellent for most healthy dogs'},
-                    'Active': {'appropriateness': 'High', 'notes': 'Good activity level'},
-                    'Moderate': {'appropriateness': 'Moderate', 'notes': 'May need more exercise'},
-                    'Sedentary': {'appropriateness': 'Low', 'notes': 'Increase activity if possible'}
-                },
-                'Cat': {
-                    'Very Active': {'appropriateness': 'High', 'notes': 'Great for indoor cats'},
-                    'Active': {'appropriateness': 'High', 'notes': 'Good activity level'},
-                    'Moderate': {'appropriateness': 'Moderate', 'notes': 'Encourage more play'},
-                    'Sedentary': {'appropriateness': 'Low', 'notes': 'Add enrichment activities'}
-                }
-            }
-
-            species_activity = activity_recommendations.get(species, {})
-            activity_eval = species_activity.get(activity_level, {
-                'appropriateness': 'Unknown',
-                'notes': 'No specific recommendations available'
-            })
-
-            return {
-                'appropriateness': activity_eval['appropriateness'],
-                'notes': activity_eval['notes'],
-                'recommendations': self._get_activity_recommendations(species)
-            }
+            evaluation = self.ACTIVITY_APPROPRIATENESS.get(species, {}).get(activity_level)
+            if evaluation is None:
+                evaluation = Appropriateness('Unknown', 'No specific recommendations available',
+                                             self._get_activity_recommendations(species))
+            return evaluation
 
         except Exception as e:
-            logger.error(f"Error evaluating activity: {str(e)}")
-            return {
-                'appropriateness': 'Unknown',
-                'notes': 'Error evaluating activity',
-                'recommendations': []
-            }
+            logger.error("Error evaluating activity: %s", e)
+            return Appropriateness('Unknown', 'Error evaluating activity', ())
 
-    def _get_diet_recommendations(self, species: str) -> List[str]:
+    def _get_diet_recommendations(self, species: str) -> Tuple[str, ...]:
         """Get diet recommendations for species"""
-        recommendations = {
-            'Dog': [
-                'Feed age-appropriate food',
-                'Maintain consistent feeding schedule',
-                'Monitor portion sizes',
-                'Ensure fresh water available'
-            ],
-            'Cat': [
-                'High protein diet recommended',
-                'Multiple small meals daily',
-                'Fresh water in multiple locations',
-                'Monitor food intake'
-            ]
-        }
-        return recommendations.get(species, ['Consult veterinarian for dietary advice'])
+        return self.DIET_RECOMMENDATIONS.get(species, self.DEFAULT_DIET_RECOMMENDATIONS)
 
-    def _get_activity_recommendations(self, species: str) -> List[str]:
+    def _get_activity_recommendations(self, species: str) -> Tuple[str, ...]:
         """Get activity recommendations for species"""
-        recommendations = {
-            'Dog': [
-                'Regular daily walks',
-                'Interactive play sessions',
-                'Mental stimulation activities',
-                'Age-appropriate exercise'
-            ],
-            'Cat': [
-                'Interactive play sessions',
-                'Climbing opportunities',
-                'Environmental enrichment',
-                'Puzzle feeders'
-            ]
-        }
-        return recommendations.get(species, ['Consult veterinarian for activity guidelines'])
-  
\ No newline at end of file
+        return self.ACTIVITY_RECOMMENDATIONS.get(species, self.DEFAULT_ACTIVITY_RECOMMENDATIONS)
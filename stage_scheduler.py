@@ -0,0 +1,301 @@
+import logging
+import time
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Dict, Iterable, List, Optional, Set
+from utils import tracing, profiling
+
+logger = logging.getLogger(__name__)
+
+# Bookkeeping entries the scheduler adds to the values it returns
+RUN_METADATA = ('_degraded', '_timings', '_rerun')
+
+class Stage:
+    """One analysis step with declared inputs and outputs
+
+    `func` receives a mapping holding (at least) the declared inputs and
+    returns a dict with the declared outputs. Inline stages run in the calling
+    thread (cheap rule evaluation) and read straight from the run's values.
+    The others are submitted to the thread pool (model calls, I/O) with a
+    copy of just their inputs and are subject to `timeout`. When a stage fails or times out
+    its outputs are taken from `fallback` and the stage is reported as
+    degraded. `reads` names the record fields the stage looks at (None means
+    it may read any of them) and decides what reruns when a field changes.
+    """
+
+    def __init__(self, name: str, func: Callable[[Dict], Dict], inputs: Iterable[str],
+                 outputs: Iterable[str], inline: bool = True, timeout: Optional[float] = None,
+                 fallback: Optional[Dict] = None, reads: Optional[Iterable[str]] = None):
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        self.inline = inline
+        self.timeout = timeout
+        self.fallback = fallback
+        self.reads = None if reads is None else frozenset(reads)
+
+    def __repr__(self):
+        return f"Stage({self.name!r})"
+
+
+def _traced(stage: Stage) -> Callable[[Dict], Dict]:
+    """The stage function, recording a span per call"""
+    def call(inputs: Dict) -> Dict:
+        with tracing.span(stage.name, inline=stage.inline):
+            return stage.func(inputs)
+    return call
+
+
+class StageGraph:
+    """Dependency graph of stages, keyed by the values they produce"""
+
+    def __init__(self, stages: Iterable[Stage] = ()):
+        self.stages: Dict[str, Stage] = {}
+        self.producers: Dict[str, Stage] = {}
+        self.consumers: Dict[str, List[Stage]] = {}
+        for stage in stages:
+            self.add(stage)
+
+    def add(self, stage: Stage) -> None:
+        if stage.name in self.stages:
+            raise ValueError(f"Duplicate stage: {stage.name}")
+        for output in stage.outputs:
+            if output in self.producers:
+                raise ValueError(f"Output {output} already produced by {self.producers[output].name}")
+        self.stages[stage.name] = stage
+        for output in stage.outputs:
+            self.producers[output] = stage
+        for name in stage.inputs:
+            self.consumers.setdefault(name, []).append(stage)
+
+    def plan(self, targets: Optional[Iterable[str]], available: Iterable[str] = ()) -> List[Stage]:
+        """Stages needed for `targets` (all stages if None), in dependency order"""
+        available = set(available)
+        if targets is None:
+            targets = [output for output in self.producers]
+
+        ordered, visiting, done = [], set(), set()
+
+        def visit(stage: Stage):
+            if stage.name in done:
+                return
+            if stage.name in visiting:
+                raise ValueError(f"Cycle detected at stage {stage.name}")
+            visiting.add(stage.name)
+            for name in stage.inputs:
+                if name in available:
+                    continue
+                producer = self.producers.get(name)
+                if producer is None:
+                    raise ValueError(f"Stage {stage.name} needs {name}, which nothing produces")
+                visit(producer)
+            visiting.discard(stage.name)
+            done.add(stage.name)
+            ordered.append(stage)
+
+        for target in targets:
+            if target in available:
+                continue
+            if target not in self.producers:
+                raise ValueError(f"Unknown output: {target}")
+            visit(self.producers[target])
+        return ordered
+
+
+    def affected(self, fields: Iterable[str]) -> Set[str]:
+        """Stages whose results may change when the given record fields change"""
+        fields = set(fields)
+        pending = [stage for stage in self.stages.values()
+                   if stage.reads is None or not fields.isdisjoint(stage.reads)]
+        affected = set()
+        while pending:
+            stage = pending.pop()
+            if stage.name in affected:
+                continue
+            affected.add(stage.name)
+            for output in stage.outputs:
+                pending.extend(self.consumers.get(output, ()))
+        return affected
+
+
+class StageScheduler:
+    """Runs a StageGraph, overlapping independent pool stages
+
+    Pool stages are submitted as soon as their inputs are ready; inline
+    stages run in the caller's thread in the meantime, so independent work
+    never waits on a slow model call it does not depend on. Plans are cached
+    per target set, so steady-state scheduling is a walk over precomputed
+    dependency counts.
+    """
+
+    def __init__(self, graph: StageGraph, max_workers: int = 4):
+        self.graph = graph
+        self.max_workers = max_workers
+        self._executor = None
+        self._plans = {}
+        self._affected = {}
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                thread_name_prefix='stage')
+        return self._executor
+
+    def _plan(self, targets: Optional[Iterable[str]], available: Iterable[str]):
+        key = (None if targets is None else frozenset(targets), frozenset(available))
+        plan = self._plans.get(key)
+        if plan is None:
+            stages = self.graph.plan(targets, available)
+            produced = {output: stage for stage in stages for output in stage.outputs}
+            waiting = {
+                stage.name: sum(1 for name in stage.inputs if name in produced)
+                for stage in stages
+            }
+            dependents = {stage.name: [] for stage in stages}
+            for stage in stages:
+                for name in stage.inputs:
+                    if name in produced:
+                        dependents[produced[name].name].append(stage)
+            # Plans made only of inline stages run straight through in
+            # dependency order, without any readiness bookkeeping
+            all_inline = all(stage.inline for stage in stages)
+            plan = (stages, waiting, dependents, all_inline)
+            self._plans[key] = plan
+        return plan
+
+    def run(self, initial: Dict, targets: Optional[Iterable[str]] = None) -> Dict:
+        """Execute the stages needed for `targets` and return all values
+
+        The returned dict holds the initial values plus every stage output;
+        `_degraded` lists stages that failed or timed out and `_timings`
+        their wall time in milliseconds.
+        """
+        stages, waiting, dependents, all_inline = self._plan(targets, initial.keys())
+        values = dict(initial)
+        degraded, timings = [], {}
+        # Untraced runs (the common case) call stage functions directly
+        traced = tracing.active()
+        # Profiled requests run every stage in this thread, where the
+        # request's profiler is: a second cProfile profiler cannot be enabled
+        # in a pool thread on Python 3.12+. Stage timeouts do not apply then
+        if all_inline or profiling.active() is not None:
+            self._run_inline(stages, values, degraded, timings, traced)
+            values['_degraded'] = degraded
+            values['_timings'] = timings
+            return values
+
+        waiting = waiting.copy()
+        ready = [stage for stage in stages if not waiting[stage.name]]
+        running = {}  # future -> (stage, start, deadline)
+
+        def complete(stage: Stage, result: Dict):
+            values.update(result)
+            for dependent in dependents[stage.name]:
+                waiting[dependent.name] -= 1
+                if not waiting[dependent.name]:
+                    ready.append(dependent)
+
+        while ready or running:
+            # Submit pool stages first so they overlap with inline work
+            inline_ready = []
+            for stage in ready:
+                if stage.inline:
+                    inline_ready.append(stage)
+                    continue
+                start = time.perf_counter()
+                deadline = start + stage.timeout if stage.timeout else None
+                inputs = {name: values[name] for name in stage.inputs}
+                func = _traced(stage) if traced else stage.func
+                future = self.executor.submit(contextvars.copy_context().run, func, inputs)
+                running[future] = (stage, start, deadline)
+            ready.clear()
+
+            start = time.perf_counter()
+            for stage in inline_ready:
+                try:
+                    result = (_traced(stage) if traced else stage.func)(values)
+                except Exception as e:
+                    result = self._degrade(stage, str(e), degraded)
+                end = time.perf_counter()
+                timings[stage.name] = (end - start) * 1000
+                start = end
+                complete(stage, result)
+
+            if ready or not running:
+                continue
+
+            # Wait for the next pool stage to finish or for the nearest deadline
+            deadlines = [deadline for _, _, deadline in running.values() if deadline]
+            timeout = max(0.0, min(deadlines) - time.perf_counter()) if deadlines else None
+            done, _ = wait(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
+
+            now = time.perf_counter()
+            for future in done:
+                stage, start, _ = running.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = self._degrade(stage, str(e), degraded)
+                timings[stage.name] = (now - start) * 1000
+                complete(stage, result)
+
+            for future, (stage, start, deadline) in list(running.items()):
+                if deadline and now >= deadline:
+                    running.pop(future)
+                    future.cancel()
+                    timings[stage.name] = (now - start) * 1000
+                    complete(stage, self._degrade(stage, f"timed out after {stage.timeout}s", degraded))
+
+        values['_degraded'] = degraded
+        values['_timings'] = timings
+        return values
+
+    def rerun(self, values: Dict, changed_fields: Iterable[str]) -> Dict:
+        """Recompute only the stages of an earlier run that changed fields affect
+
+        `values` is what run() returned; the record and any shared state in
+        it must already reflect the changes. Stages that did not take part
+        in the earlier run stay skipped. `_rerun` lists the stages that ran.
+        """
+        key = frozenset(changed_fields)
+        affected = self._affected.get(key)
+        if affected is None:
+            affected = self._affected[key] = self.graph.affected(key)
+
+        stale = {output for name in affected for output in self.graph.stages[name].outputs
+                 if output in values}
+        if not stale:
+            return dict(values, _rerun=[])
+
+        initial = {name: value for name, value in values.items()
+                   if name not in stale and name not in RUN_METADATA}
+        result = self.run(initial, stale)
+        rerun = list(result['_timings'])
+        result['_degraded'] = [name for name in values.get('_degraded', ()) if name not in rerun] \
+            + result['_degraded']
+        result['_rerun'] = rerun
+        return result
+
+    def _run_inline(self, stages: List[Stage], values: Dict, degraded: List[str], timings: Dict,
+                    traced: bool = False) -> None:
+        """Run already-ordered inline stages one after another"""
+        start = time.perf_counter()
+        for stage in stages:
+            try:
+                result = (_traced(stage) if traced else stage.func)(values)
+            except Exception as e:
+                result = self._degrade(stage, str(e), degraded)
+            values.update(result)
+            end = time.perf_counter()
+            timings[stage.name] = (end - start) * 1000
+            start = end
+
+    @staticmethod
+    def _degrade(stage: Stage, error: str, degraded: List[str]) -> Dict:
+        """Record a failed stage and return its fallback outputs"""
+        logger.warning("Stage %s degraded: %s", stage.name, error, extra={'stage': stage.name})
+        degraded.append(stage.name)
+        fallback = stage.fallback or {}
+        return {output: fallback.get(output) for output in stage.outputs}
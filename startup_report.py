@@ -0,0 +1,24 @@
+import argparse
+import json
+from utils.startup_timing import import_report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Report where import time goes when a module starts up cold')
+    parser.add_argument('--module', default='app', help='Module to import (default: app)')
+    parser.add_argument('--top', type=int, default=25, help='Number of modules and packages to list')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    args = parser.parse_args()
+
+    report = import_report(args.module, top=args.top)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"import {report['module']}: {report['total_ms']:.0f} ms")
+        print(f"heavy modules imported: {', '.join(report['heavy_modules']) or 'none'}")
+        print('\nslowest modules (cumulative / self ms):')
+        for entry in report['slowest']:
+            print(f"  {entry['cumulative_ms']:8.1f} {entry['self_ms']:8.1f}  {entry['module']}")
+        print('\nself time by package (ms):')
+        for name, ms in report['packages_ms'].items():
+            print(f"  {ms:8.1f}  {name}")
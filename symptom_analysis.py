@@ -0,0 +1,169 @@
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from config import SYMPTOM_SEVERITY
+from analysis_context import AnalysisContext
+
+logger = logging.getLogger(__name__)
+
+# Set bits in every byte value, for popcounts over uint64 masks viewed as bytes
+_POPCOUNT8 = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def normalize_symptom(name: str) -> str:
+    """Canonical symptom name ('Difficulty Breathing' -> 'difficulty_breathing')"""
+    return '_'.join(str(name).strip().lower().replace('-', ' ').split())
+
+
+def popcount(masks: np.ndarray) -> np.ndarray:
+    """Number of set bits in each element of a uint64 array"""
+    masks = np.ascontiguousarray(masks, dtype=np.uint64)
+    return _POPCOUNT8[masks.view(np.uint8)].reshape(masks.shape + (8,)).sum(axis=-1)
+
+
+class DiseaseProfiles:
+    """Symptom profiles of the diseases that apply to one species
+
+    `masks[d]` has a bit set for every symptom of disease d; `weights[s, d]`
+    is symptom s's severity if it belongs to disease d and 0 otherwise.
+    """
+
+    def __init__(self, diseases: List[Tuple[str, Dict]], index: Dict[str, int], severities: np.ndarray):
+        self.names = [name for name, _ in diseases]
+        self.severity = [info.get('severity') for _, info in diseases]
+        self.masks = np.zeros(len(diseases), dtype=np.uint64)
+        self.weights = np.zeros((len(severities), len(diseases)))
+        for d, (_, info) in enumerate(diseases):
+            for symptom in info.get('symptoms', []):
+                bit = index[normalize_symptom(symptom)]
+                self.masks[d] |= np.uint64(1) << np.uint64(bit)
+                self.weights[bit, d] = severities[bit]
+        self.total_weights = self.weights.sum(axis=0)
+
+
+class SymptomAnalyzer:
+    """Ranks the diseases an animal's reported symptoms point to
+
+    Symptoms are bits over a fixed vocabulary: the symptoms in
+    SYMPTOM_SEVERITY, followed by any other symptom the disease database
+    lists. A reported symptom set is a single uint64 mask, and matching it
+    against every disease for the species is a bitwise AND plus a popcount
+    for the matched symptoms. A product with the severity-weighted profile
+    matrix gives the weighted coverage of each disease's profile. The same
+    operations score a batch of masks at once. Diseases without a symptom
+    list in the database are not scored.
+    """
+
+    DEFAULT_SEVERITY = 1
+    MAX_SYMPTOMS = 64
+
+    def __init__(self, disease_database: Dict, severity: Optional[Dict[str, int]] = None):
+        self.disease_database = disease_database
+        severity = {normalize_symptom(name): weight
+                    for name, weight in (severity if severity is not None else SYMPTOM_SEVERITY).items()}
+
+        vocabulary = list(severity)
+        extra = set()
+        for category in disease_database.values():
+            for disease in self._iter_diseases(category):
+                extra.update(normalize_symptom(symptom) for symptom in disease[1].get('symptoms', []))
+        vocabulary.extend(sorted(extra - set(vocabulary)))
+        if len(vocabulary) > self.MAX_SYMPTOMS:
+            raise ValueError(f"Symptom vocabulary has {len(vocabulary)} entries, at most {self.MAX_SYMPTOMS} fit a mask")
+
+        self.vocabulary = vocabulary
+        self.index = {symptom: bit for bit, symptom in enumerate(vocabulary)}
+        self.severities = np.array([severity.get(symptom, self.DEFAULT_SEVERITY) for symptom in vocabulary],
+                                   dtype=float)
+        self._bits = np.arange(len(vocabulary), dtype=np.uint64)
+        self._profiles: Dict[Tuple[str, Optional[str]], DiseaseProfiles] = {}
+
+    @staticmethod
+    def _iter_diseases(category: Dict, species: Optional[str] = None) -> Iterable[Tuple[str, Dict]]:
+        yield from category.get('common_diseases', {}).items()
+        specific = category.get('species_specific', {})
+        if species is None:
+            for diseases in specific.values():
+                yield from diseases.items()
+        else:
+            yield from specific.get(species, {}).items()
+
+    def profiles(self, category: str, species: str) -> DiseaseProfiles:
+        """Precomputed profiles for a species' category and species-specific diseases"""
+        key = (category, species)
+        profiles = self._profiles.get(key)
+        if profiles is None:
+            diseases = [(name, info) for name, info in
+                        self._iter_diseases(self.disease_database.get(category, {}), species)
+                        if info.get('symptoms')]
+            profiles = self._profiles[key] = DiseaseProfiles(diseases, self.index, self.severities)
+        return profiles
+
+    def encode(self, symptoms: Iterable[str]) -> Tuple[int, List[str]]:
+        """Bitmask of the recognized symptoms and the list of unrecognized ones"""
+        mask, unrecognized = 0, []
+        for symptom in symptoms:
+            bit = self.index.get(normalize_symptom(symptom))
+            if bit is None:
+                unrecognized.append(symptom)
+            else:
+                mask |= 1 << bit
+        return mask, unrecognized
+
+    def decode(self, mask: int) -> List[str]:
+        return [symptom for bit, symptom in enumerate(self.vocabulary) if mask >> bit & 1]
+
+    def score(self, masks: np.ndarray, profiles: DiseaseProfiles) -> Tuple[np.ndarray, np.ndarray]:
+        """Matched symptom counts and weighted profile coverage, both (animals, diseases)"""
+        masks = np.asarray(masks, dtype=np.uint64).reshape(-1)
+        matched = popcount(masks[:, None] & profiles.masks[None, :])
+        present = ((masks[:, None] >> self._bits) & np.uint64(1)).astype(float)
+        coverage = (present @ profiles.weights) / np.maximum(profiles.total_weights, 1e-12)
+        return matched, coverage
+
+    @staticmethod
+    def reported_symptoms(data: Dict) -> List[str]:
+        """Symptoms from a record, given as a list or a comma-separated string"""
+        symptoms = data.get('Symptoms', data.get('symptoms'))
+        if not symptoms:
+            return []
+        if isinstance(symptoms, str):
+            symptoms = symptoms.split(',')
+        return [str(symptom).strip() for symptom in symptoms if str(symptom).strip()]
+
+    def analyze_symptoms(self, animal_data: Dict, context: Optional[AnalysisContext] = None) -> Dict:
+        """Diseases ranked by how much of their symptom profile was reported"""
+        try:
+            context = context or AnalysisContext(animal_data)
+            mask, unrecognized = self.encode(self.reported_symptoms(animal_data))
+            reported = self.decode(mask)
+            result = {
+                'reported_symptoms': reported,
+                'unrecognized_symptoms': unrecognized,
+                'severity_score': float(sum(self.severities[self.index[symptom]] for symptom in reported)),
+                'matches': []
+            }
+            if not mask or not context.category:
+                return result
+
+            profiles = self.profiles(context.category, context.species)
+            if not profiles.names:
+                return result
+            matched, coverage = self.score(np.array([mask], dtype=np.uint64), profiles)
+
+            for d in np.lexsort((-matched[0], -coverage[0])):
+                if matched[0, d] == 0:
+                    break
+                overlap = int(mask) & int(profiles.masks[d])
+                result['matches'].append({
+                    'disease': profiles.names[d],
+                    'match_score': round(float(coverage[0, d]), 3),
+                    'matched_symptoms': self.decode(overlap),
+                    'missing_symptoms': self.decode(int(profiles.masks[d]) & ~overlap),
+                    'severity': profiles.severity[d]
+                })
+            return result
+
+        except Exception as e:
+            logger.error("Error in symptom analysis: %s", e)
+            return {'reported_symptoms': [], 'unrecognized_symptoms': [], 'severity_score': 0.0, 'matches': []}
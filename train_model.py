@@ -4,50 +4,95 @@ from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler, LabelEncoder
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import classification_report, confusion_matrix
+import argparse
 import joblib
 import os
 import logging
+from utils.model_store import publish_models, read_manifest, version_dir
+from utils.model_pool import discover_species_models, species_key
+from drift_monitor import build_reference, update_reference
+from utils.logging_setup import configure_logging
+from config import MODEL_VERSIONS_KEEP
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def prepare_data(df):
-    """Prepare data for training with enhanced metrics"""
+TRAINING_DATA_PATH = 'data/training_data.csv'
+MODEL_FILE = 'models/health_analysis_model.pkl'
+SCALER_FILE = 'models/scaler.pkl'
+LABEL_ENCODERS_FILE = 'models/label_encoders.pkl'
+DRIFT_REFERENCE_FILE = 'models/drift_reference.pkl'
+
+CATEGORICAL_COLUMNS = [
+    'Species', 'Breed', 'Diet_Type',
+    'Activity_Level', 'Living_Environment',
+    'Vaccination_Status'
+]
+
+def prepare_data(df, label_encoders=None):
+    """Prepare data for training with enhanced metrics
+
+    When `label_encoders` is given the existing vocabularies are reused
+    (incremental mode) and unseen categories raise a ValueError instead of
+    silently producing codes that disagree with the deployed model.
+    """
     
     # Create label encoders for categorical variables
-    label_encoders = {}
-    categorical_columns = [
-        'Species', 'Breed', 'Diet_Type', 
-        'Activity_Level', 'Living_Environment',
-        'Vaccination_Status'
-    ]
+    fit_encoders = label_encoders is None
+    if fit_encoders:
+        label_encoders = {}
     
-    for column in categorical_columns:
-        label_encoders[column] = LabelEncoder()
-        df[column] = label_encoders[column].fit_transform(df[column])
+    for column in CATEGORICAL_COLUMNS:
+        if fit_encoders:
+            label_encoders[column] = LabelEncoder()
+            df[column] = label_encoders[column].fit_transform(df[column])
+        else:
+            df[column] = label_encoders[column].transform(df[column])
     
     # Split features and target
     X = df.drop(['Health_Status', 'Health_Score'], axis=1)
     y = df['Health_Status']
     
-    # Save label encoders
-    if not os.path.exists('models'):
-        os.makedirs('models')
-    joblib.dump(label_encoders, 'models/label_encoders.pkl')
-    
-    return X, y
+    return X, y, label_encoders
+
+def fit_species_models(df, label_encoders, min_samples=50, n_estimators=100):
+    """Fit one forest and scaler per species with enough samples, keyed by live path"""
+    artifacts = {}
+    for species, species_df in df.groupby('Species'):
+        if len(species_df) < min_samples:
+            logger.info("Skipping %s: only %s samples", species, len(species_df))
+            continue
+
+        X, y, _ = prepare_data(species_df.copy(), label_encoders)
+        scaler = StandardScaler()
+        model = RandomForestClassifier(n_estimators=n_estimators, random_state=42, n_jobs=-1)
+        model.fit(scaler.fit_transform(X), y)
+
+        key = species_key(species)
+        artifacts[f'models/{key}_model.pkl'] = model
+        artifacts[f'models/{key}_scaler.pkl'] = scaler
+        logger.info("Trained %s model on %s samples", species, len(species_df))
+    return artifacts
+
+def published_species_files():
+    """Live paths of the species model files in the published version"""
+    return [os.path.join('models', os.path.basename(path))
+            for paths in discover_species_models(version_dir(read_manifest())).values()
+            for path in paths]
 
 def train_model():
     """Train the enhanced health analysis model"""
     try:
         # Load data
-        df = pd.read_csv('data/training_data.csv')
-        logger.info(f"Loaded training data: {len(df)} samples")
+        df = pd.read_csv(TRAINING_DATA_PATH)
+        logger.info("Loaded training data: %s samples", len(df))
+
+        # Training feature histograms for the drift monitor, taken before
+        # label encoding replaces the categories
+        drift_reference = build_reference(df)
         
         # Prepare data
-        X, y = prepare_data(df)
-        logger.info(f"Prepared data with {X.shape[1]} features")
+        X, y, label_encoders = prepare_data(df.copy())
+        logger.info("Prepared data with %s features", X.shape[1])
         
         # Split into training and testing sets
         X_train, X_test, y_train, y_test = train_test_split(
@@ -76,9 +121,22 @@ def train_model():
         logger.info("\nClassification Report:")
         logger.info(classification_report(y_test, y_pred))
         
-        # Save model and scaler
-        joblib.dump(model, 'models/health_analysis_model.pkl')
-        joblib.dump(scaler, 'models/scaler.pkl')
+        # Species models read the label encodings, which were just refitted:
+        # retrain the published ones in the same version, and drop those of
+        # species that no longer have enough samples
+        species_files = published_species_files()
+        species_artifacts = fit_species_models(df, label_encoders) if species_files else {}
+
+        # Save model, scaler and encoders as a new version
+        publish_models({
+            MODEL_FILE: model,
+            SCALER_FILE: scaler,
+            LABEL_ENCODERS_FILE: label_encoders,
+            DRIFT_REFERENCE_FILE: drift_reference,
+            **species_artifacts
+        }, metadata={'mode': 'full', 'samples': len(df), 'n_trees': len(model.estimators_),
+                     'species': len(species_artifacts) // 2},
+           drop=species_files, keep_versions=MODEL_VERSIONS_KEEP)
         
         logger.info("Model and scaler saved successfully")
         
@@ -92,8 +150,133 @@ def train_model():
         logger.info("Feature importances saved to models/feature_importance.csv")
         
     except Exception as e:
-        logger.error(f"Error training model: {str(e)}")
+        logger.error("Error training model: %s", e)
+        raise
+
+def train_incremental(new_data_path, new_trees=20, max_trees=None):
+    """Extend the deployed forest with trees fitted only on newly arrived records
+
+    The existing scaler and label encoders are kept frozen so the new trees
+    see the same feature space as the old ones. With `max_trees` set the
+    forest behaves as a rolling pool: the oldest trees (earliest windows)
+    are dropped once the cap is exceeded. Falls back to a full retrain when
+    the new data cannot be represented in the deployed feature space.
+    """
+    try:
+        if not all(os.path.exists(path) for path in (MODEL_FILE, SCALER_FILE, LABEL_ENCODERS_FILE)):
+            logger.warning("No deployed model found, running full training instead")
+            return train_model()
+
+        new_df = pd.read_csv(new_data_path)
+        if new_df.empty:
+            logger.info("No new records, skipping incremental training")
+            return
+
+        model = joblib.load(MODEL_FILE)
+        scaler = joblib.load(SCALER_FILE)
+        label_encoders = joblib.load(LABEL_ENCODERS_FILE)
+
+        try:
+            X_new, y_new, _ = prepare_data(new_df.copy(), label_encoders)
+        except ValueError as e:
+            logger.warning("New data has unseen categories (%s), running full training instead", e)
+            return train_model()
+
+        if set(np.unique(y_new)) != set(model.classes_):
+            # Trees fitted on a different class set produce incompatible probabilities
+            logger.warning("New data does not cover all health statuses, running full training instead")
+            return train_model()
+
+        X_new_scaled = scaler.transform(X_new)
+
+        previous_trees = len(model.estimators_)
+        model.set_params(warm_start=True, n_estimators=previous_trees + new_trees)
+        model.fit(X_new_scaled, y_new)
+
+        if max_trees and len(model.estimators_) > max_trees:
+            model.estimators_ = model.estimators_[-max_trees:]
+            model.set_params(n_estimators=len(model.estimators_))
+            logger.info("Aged out %s oldest trees", previous_trees + new_trees - max_trees)
+
+        logger.info("Added %s trees fitted on %s new samples (%s trees total)",
+                    new_trees, len(new_df), len(model.estimators_))
+
+        # The forest now reflects the training history plus the new records,
+        # so drift is measured against both from here on: the new records are
+        # counted into the deployed reference's histograms
+        columns = pd.read_csv(TRAINING_DATA_PATH, nrows=0).columns if os.path.exists(TRAINING_DATA_PATH) else None
+        if os.path.exists(DRIFT_REFERENCE_FILE):
+            drift_reference = update_reference(joblib.load(DRIFT_REFERENCE_FILE), new_df)
+        else:
+            # No reference deployed yet: build one from the history once
+            history = pd.read_csv(TRAINING_DATA_PATH) if columns is not None else None
+            drift_reference = build_reference(new_df if history is None else
+                                              pd.concat([history, new_df[columns]], ignore_index=True))
+
+        # The label encoders are republished unchanged, so the species
+        # models carried into this version still match their encoding
+        publish_models({
+            MODEL_FILE: model,
+            SCALER_FILE: scaler,
+            LABEL_ENCODERS_FILE: label_encoders,
+            DRIFT_REFERENCE_FILE: drift_reference
+        }, metadata={'mode': 'incremental', 'samples': len(new_df), 'n_trees': len(model.estimators_)},
+           keep_versions=MODEL_VERSIONS_KEEP)
+
+        # Keep the full history so a later full retrain includes these records
+        if columns is not None:
+            new_df[columns].to_csv(TRAINING_DATA_PATH, mode='a', header=False, index=False)
+
+    except Exception as e:
+        logger.error("Error in incremental training: %s", e)
+        raise
+
+def train_species_models(min_samples=50, n_estimators=100):
+    """Train one forest per species in the deployed feature space
+
+    Uses the deployed label encoders so species models read exactly the
+    same feature rows as the base model. Writes
+    models/<species>_model.pkl and models/<species>_scaler.pkl, which the
+    workers' species model pool discovers and loads on first use.
+    """
+    try:
+        if not os.path.exists(LABEL_ENCODERS_FILE):
+            logger.warning("No deployed label encoders found, running full training first")
+            train_model()
+
+        df = pd.read_csv(TRAINING_DATA_PATH)
+        label_encoders = joblib.load(LABEL_ENCODERS_FILE)
+        # Species models are trained on the current history, so the drift
+        # reference published with them is rebuilt from it as well
+        artifacts = {DRIFT_REFERENCE_FILE: build_reference(df)}
+        artifacts.update(fit_species_models(df, label_encoders, min_samples, n_estimators))
+
+        if len(artifacts) > 1:
+            publish_models(artifacts, metadata={'mode': 'species', 'species': (len(artifacts) - 1) // 2},
+                           keep_versions=MODEL_VERSIONS_KEEP)
+
+    except Exception as e:
+        logger.error("Error training species models: %s", e)
         raise
 
 if __name__ == '__main__':
-    train_model() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Train the health analysis model')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Extend the deployed forest instead of retraining from scratch')
+    parser.add_argument('--new-data', default='data/new_records.csv',
+                        help='CSV with records that arrived since the last training run')
+    parser.add_argument('--new-trees', type=int, default=20,
+                        help='Number of trees to fit on the new data')
+    parser.add_argument('--max-trees', type=int, default=None,
+                        help='Cap on forest size; oldest trees are dropped first')
+    parser.add_argument('--species-models', action='store_true',
+                        help='Train per-species models next to the deployed base model')
+    args = parser.parse_args()
+    configure_logging(json_format=False)
+
+    if args.species_models:
+        train_species_models()
+    elif args.incremental:
+        train_incremental(args.new_data, args.new_trees, args.max_trees)
+    else:
+        train_model()
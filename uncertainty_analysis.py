@@ -0,0 +1,85 @@
+import logging
+from typing import Dict, Optional
+import numpy as np
+from species_config import get_species_config
+from species_metrics import SpeciesMetricsAnalyzer, health_statuses
+from config import INSTRUMENT_NOISE, DEFAULT_INSTRUMENTS
+
+logger = logging.getLogger(__name__)
+
+SCORE_QUANTILES = (5, 25, 50, 75, 95)
+
+class UncertaintyAnalyzer:
+    """Spread of the health score under measurement noise
+
+    Each measured field (vital signs, weight) is perturbed with the noise
+    model of the instrument it was taken with: a normal error whose
+    standard deviation is `sd` plus `relative_sd` times the reading, added
+    in quadrature. All samples are scored in one vectorized pass through
+    SpeciesMetricsAnalyzer.health_scores.
+    """
+
+    def __init__(self, analyzer: SpeciesMetricsAnalyzer, samples: int = 2000,
+                 noise_models: Optional[Dict] = None, default_instruments: Optional[Dict] = None,
+                 seed: Optional[int] = None):
+        self.analyzer = analyzer
+        self.samples = samples
+        self.noise_models = noise_models if noise_models is not None else INSTRUMENT_NOISE
+        self.default_instruments = default_instruments if default_instruments is not None else DEFAULT_INSTRUMENTS
+        self.seed = seed
+
+    def instruments_for(self, data: Dict) -> Dict[str, str]:
+        """Instrument used for each noisy field, defaults overridden by data['Instruments']"""
+        requested = data.get('Instruments') or {}
+        if not isinstance(requested, dict):
+            raise ValueError("Instruments must map fields to instrument names")
+        instruments = dict(self.default_instruments)
+        for field, instrument in requested.items():
+            if instrument not in self.noise_models:
+                raise ValueError(f"Unknown instrument for {field}: {instrument}; "
+                                 f"known instruments are {', '.join(self.noise_models)}")
+            instruments[field] = instrument
+        return instruments
+
+    def noise_sd(self, instrument: str, value: float) -> float:
+        model = self.noise_models[instrument]
+        return float(np.hypot(model.get('sd', 0.0), model.get('relative_sd', 0.0) * value))
+
+    def analyze(self, data: Dict) -> Dict:
+        """Score quantiles and status probabilities over perturbed measurements"""
+        species_config = get_species_config(data.get('Species')) or {}
+        instruments = self.instruments_for(data)
+        rng = np.random.default_rng(self.seed)
+
+        overrides, noise = {}, {}
+        for field in list(species_config.get('vital_signs', {})) + ['Weight']:
+            instrument = instruments.get(field)
+            value = data.get(field)
+            if instrument is None or not value:
+                continue
+            value = float(value)
+            sd = self.noise_sd(instrument, value)
+            if sd <= 0:
+                continue
+            # A reading of 0 counts as not measured, keep samples positive
+            overrides[field] = np.maximum(rng.normal(value, sd, self.samples), 1e-9)
+            noise[field] = {'instrument': instrument, 'sd': round(sd, 4)}
+
+        if overrides:
+            scores = self.analyzer.health_scores(data, overrides)
+        else:
+            scores = np.full(self.samples, float(self.analyzer.health_scores(data)))
+
+        statuses, counts = np.unique(health_statuses(scores), return_counts=True)
+        return {
+            'samples': self.samples,
+            'noise': noise,
+            'score_mean': round(float(scores.mean()), 2),
+            'score_quantiles': {
+                f'p{q}': round(float(value), 2)
+                for q, value in zip(SCORE_QUANTILES, np.percentile(scores, SCORE_QUANTILES))
+            },
+            'status_probabilities': {
+                str(status): round(count / self.samples, 4) for status, count in zip(statuses, counts)
+            }
+        }
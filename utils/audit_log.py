@@ -0,0 +1,226 @@
+import atexit
+import gzip
+import json
+import logging
+import os
+import queue
+import threading
+import uuid
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_SUFFIX = '.ndjson.gz'
+META_SUFFIX = '.meta.json'
+TIMESTAMP_FORMAT = '%Y%m%dT%H%M%S'
+
+
+class AuditBacklogFull(Exception):
+    """The audit writer is too far behind to accept another record"""
+    pass
+
+
+class AuditLog:
+    """Prediction audit trail written in the background
+
+    `record` only puts the entry on a bounded queue. A writer thread takes
+    up to `batch_size` entries at a time (or whatever arrived within
+    `flush_interval` seconds) and appends them as NDJSON to the current
+    segment, as one gzip member per batch, so a crash loses at most the
+    batch in flight. Segments rotate once they reach `segment_bytes`. A
+    closed segment gets a `.meta.json` sidecar with its time span and
+    species, which lets `read_records` skip it without decompressing.
+
+    NDJSON rather than Parquet (pyarrow is available): a Parquet file can
+    only be read once its footer is written, so a crash would lose the
+    whole open segment rather than one batch. Records are also nested and
+    their shape depends on the requested fields, which does not fit a
+    fixed columnar schema.
+
+    When the queue is full, `record` waits up to `enqueue_timeout` seconds
+    for room and then raises AuditBacklogFull, so callers can refuse the
+    request rather than return a prediction that was never audited.
+    """
+
+    def __init__(self, directory: str, max_queue: int = 10000, batch_size: int = 256,
+                 flush_interval: float = 1.0, segment_bytes: int = 64 * 1024 * 1024,
+                 enqueue_timeout: float = 1.0, fsync: bool = True):
+        self.directory = directory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.segment_bytes = segment_bytes
+        self.enqueue_timeout = enqueue_timeout
+        self.fsync = fsync
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._start_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+        self._segment_path: Optional[str] = None
+        self._segment_meta: Optional[Dict] = None
+        self._sequence = 0
+        self.written = 0
+        self.rejected = 0
+        self.batches = 0
+
+    def _ensure_started(self) -> None:
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    os.makedirs(self.directory, exist_ok=True)
+                    self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+                    self._thread.start()
+                    atexit.register(self.close)
+
+    def record(self, endpoint: str, data: Dict, response: Dict, params: Optional[Dict] = None) -> str:
+        """Queue a prediction's input and output; returns the audit id
+
+        The dicts are serialized by the writer thread, so they must not be
+        modified afterwards.
+        """
+        self._ensure_started()
+        audit_id = uuid.uuid4().hex
+        entry = {
+            'id': audit_id,
+            'ts': datetime.utcnow().isoformat(),
+            'endpoint': endpoint,
+            'species': data.get('Species'),
+            'params': params or {},
+            'input': data,
+            'output': response
+        }
+        try:
+            self._queue.put(entry, timeout=self.enqueue_timeout)
+        except queue.Full:
+            self.rejected += 1
+            raise AuditBacklogFull(f"Audit queue full ({self._queue.maxsize} records pending)")
+        return audit_id
+
+    def _run(self) -> None:
+        while True:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                if self._stop.is_set():
+                    break
+                continue
+            batch = [first]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write_batch(batch)
+            except Exception as e:
+                logger.error("Error writing %s audit records: %s", len(batch), e)
+        self._close_segment()
+
+    def _open_segment(self) -> None:
+        self._sequence += 1
+        started = datetime.utcnow()
+        name = f"audit-{started.strftime(TIMESTAMP_FORMAT)}-{os.getpid()}-{self._sequence:04d}{SEGMENT_SUFFIX}"
+        self._segment_path = os.path.join(self.directory, name)
+        self._segment_meta = {'first_ts': None, 'last_ts': None, 'species': set(), 'records': 0}
+
+    def _write_batch(self, batch: List[Dict]) -> None:
+        if self._segment_path is None:
+            self._open_segment()
+        lines = ''.join(json.dumps(entry, default=str) + '\n' for entry in batch)
+        with open(self._segment_path, 'ab') as f:
+            f.write(gzip.compress(lines.encode('utf-8')))
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+            size = f.tell()
+
+        meta = self._segment_meta
+        meta['first_ts'] = meta['first_ts'] or batch[0]['ts']
+        meta['last_ts'] = batch[-1]['ts']
+        meta['species'].update(str(entry['species']) for entry in batch)
+        meta['records'] += len(batch)
+        self.written += len(batch)
+        self.batches += 1
+
+        if size >= self.segment_bytes:
+            self._close_segment()
+
+    def _close_segment(self) -> None:
+        """Write the current segment's sidecar; the next batch starts a new segment"""
+        if self._segment_path is None:
+            return
+        meta = dict(self._segment_meta, species=sorted(self._segment_meta['species']))
+        with open(self._segment_path[:-len(SEGMENT_SUFFIX)] + META_SUFFIX, 'w') as f:
+            json.dump(meta, f)
+        self._segment_path = None
+        self._segment_meta = None
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Write everything still queued and close the current segment"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.error("Audit writer did not finish within %ss, %s records were not written",
+                         timeout, self._queue.qsize())
+
+    def stats(self) -> Dict:
+        return {
+            'pending': self._queue.qsize(),
+            'written': self.written,
+            'rejected': self.rejected,
+            'batches': self.batches,
+            'segment': os.path.basename(self._segment_path) if self._segment_path else None
+        }
+
+
+def _segment_start(name: str) -> Optional[str]:
+    """Segment start time as an ISO timestamp, from its file name"""
+    try:
+        started = datetime.strptime(name.split('-')[1], TIMESTAMP_FORMAT)
+    except (IndexError, ValueError):
+        return None
+    return started.isoformat()
+
+
+def read_records(directory: str, since: Optional[str] = None, until: Optional[str] = None,
+                 species: Optional[str] = None) -> Iterator[Dict]:
+    """Audit records with since <= ts < until (ISO strings) for a species, oldest segments first
+
+    Segments whose sidecar shows no overlap with the time range or the
+    species are skipped unread; segments without one (still open, or left
+    by a crash) are scanned.
+    """
+    try:
+        names = sorted(name for name in os.listdir(directory) if name.endswith(SEGMENT_SUFFIX))
+    except FileNotFoundError:
+        return
+    for name in names:
+        start = _segment_start(name)
+        if until and start and start >= until:
+            continue
+        meta_path = os.path.join(directory, name[:-len(SEGMENT_SUFFIX)] + META_SUFFIX)
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+            if since and meta['last_ts'] and meta['last_ts'] < since:
+                continue
+            if species and species not in meta['species']:
+                continue
+
+        try:
+            with gzip.open(os.path.join(directory, name), 'rt', encoding='utf-8') as f:
+                for line in f:
+                    entry = json.loads(line)
+                    if since and entry['ts'] < since:
+                        continue
+                    if until and entry['ts'] >= until:
+                        continue
+                    if species and entry.get('species') != species:
+                        continue
+                    yield entry
+        except (EOFError, OSError) as e:
+            # A segment truncated mid-batch by a crash: keep what was readable
+            logger.warning("Stopped reading damaged audit segment %s: %s", name, e)
@@ -0,0 +1,371 @@
+import io
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+import numpy as np
+import logging
+
+# pandas and sklearn are imported when the first index is built, so the app
+# starts without them
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+NUMERIC_COLUMNS = ['Age', 'Weight', 'Heart_Rate', 'Respiratory_Rate', 'Temperature']
+CATEGORICAL_COLUMNS = ['Diet_Type', 'Activity_Level', 'Living_Environment', 'Vaccination_Status', 'Breed']
+OUTCOME_COLUMNS = ['Health_Status', 'Health_Score']
+
+
+class CaseIndexNotReady(Exception):
+    """The similar-case index is still being built"""
+    pass
+
+
+class CaseIndexUnavailable(Exception):
+    """Building the similar-case index failed; it is retried after `retry_after` seconds"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _record_value(record: Dict, column: str):
+    value = record.get(column)
+    if value is None:
+        value = record.get(column.lower())
+    return None if value == '' else value
+
+
+class ClusteredIndex:
+    """Approximate nearest neighbours for species with many cases
+
+    Points are partitioned with k-means; a query scans only the points of
+    the `n_probe` clusters whose centroids are closest. Same `query`
+    signature as sklearn's BallTree.
+    """
+
+    def __init__(self, points: np.ndarray, n_probe: int = 8, random_state: int = 42):
+        self.points = points
+        n_clusters = max(1, int(np.sqrt(len(points))))
+        from sklearn.cluster import MiniBatchKMeans
+
+        kmeans = MiniBatchKMeans(n_clusters=n_clusters, n_init=3, random_state=random_state).fit(points)
+        self.centroids = kmeans.cluster_centers_
+        order = np.argsort(kmeans.labels_, kind='stable')
+        bounds = np.searchsorted(kmeans.labels_[order], np.arange(n_clusters + 1))
+        self.members = [order[bounds[c]:bounds[c + 1]] for c in range(n_clusters)]
+        self.n_probe = min(n_probe, n_clusters)
+
+    def query(self, X: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        distances, indices = [], []
+        for x in X:
+            nearest = np.argpartition(((self.centroids - x) ** 2).sum(axis=1), self.n_probe - 1)[:self.n_probe]
+            candidates = np.concatenate([self.members[c] for c in nearest])
+            d = np.sqrt(((self.points[candidates] - x) ** 2).sum(axis=1))
+            top = np.argsort(d)[:k]
+            distances.append(d[top])
+            indices.append(candidates[top])
+        return np.array(distances), np.array(indices)
+
+
+class SpeciesCaseIndex:
+    """Nearest-neighbour index over one species' historical cases
+
+    Numeric columns are standardized with the species' own mean and
+    standard deviation; categoricals are one-hot encoded with weight
+    `category_weight`, so a mismatch costs about as much as a
+    `category_weight * sqrt(2)` standard deviation difference. The encoding
+    is frozen when the index is built. Cases appended afterwards are
+    encoded the same way and scanned by brute force until the next rebuild
+    (categories first seen after the build match nothing).
+    """
+
+    def __init__(self, cases: 'pd.DataFrame', category_weight: float = 1.0,
+                 approximate_above: int = 200000, leaf_size: int = 40):
+        cases = cases.reset_index(drop=True)
+        self.records = cases.to_dict('records')
+        numeric = cases[NUMERIC_COLUMNS].astype(float)
+        self.means = numeric.mean().to_numpy()
+        scales = numeric.std(ddof=0).to_numpy()
+        self.scales = np.where(scales > 0, scales, 1.0)
+        self.category_weight = category_weight
+
+        self.offsets: Dict[str, Dict[str, int]] = {}
+        width = len(NUMERIC_COLUMNS)
+        for column in CATEGORICAL_COLUMNS:
+            values = sorted(cases[column].dropna().astype(str).unique())
+            self.offsets[column] = {value: width + i for i, value in enumerate(values)}
+            width += len(values)
+        self.width = width
+
+        points = self.encode(cases)
+        if len(points) > approximate_above:
+            self.method = 'clustered'
+            self.tree = ClusteredIndex(points)
+        else:
+            self.method = 'ball_tree'
+            from sklearn.neighbors import BallTree
+            self.tree = BallTree(points, leaf_size=leaf_size)
+
+        # Appended records and their points, replaced together so queries
+        # never see one without the other
+        self._pending: Tuple[List[Dict], np.ndarray] = ([], np.empty((0, self.width)))
+
+    def __len__(self) -> int:
+        return len(self.records) + len(self._pending[0])
+
+    @property
+    def pending(self) -> List[Dict]:
+        return self._pending[0]
+
+    def encode(self, frame: 'pd.DataFrame') -> np.ndarray:
+        points = np.zeros((len(frame), self.width))
+        numeric = frame[NUMERIC_COLUMNS].astype(float).to_numpy()
+        numeric = np.where(np.isnan(numeric), self.means, numeric)
+        points[:, :len(NUMERIC_COLUMNS)] = (numeric - self.means) / self.scales
+        rows = np.arange(len(frame))
+        for column, offsets in self.offsets.items():
+            positions = frame[column].astype(str).map(offsets).to_numpy(dtype=float, na_value=np.nan)
+            known = ~np.isnan(positions)
+            points[rows[known], positions[known].astype(int)] = self.category_weight
+        return points
+
+    def encode_record(self, record: Dict) -> np.ndarray:
+        """Encode a request body; missing numerics count as the species mean"""
+        point = np.zeros((1, self.width))
+        for i, column in enumerate(NUMERIC_COLUMNS):
+            value = _record_value(record, column)
+            if value is not None:
+                point[0, i] = (float(value) - self.means[i]) / self.scales[i]
+        for column, offsets in self.offsets.items():
+            position = offsets.get(_record_value(record, column))
+            if position is not None:
+                point[0, position] = self.category_weight
+        return point
+
+    def append(self, frame: 'pd.DataFrame') -> None:
+        records, points = self._pending
+        self._pending = (records + frame.to_dict('records'), np.vstack([points, self.encode(frame)]))
+
+    def query(self, record: Dict, k: int) -> List[Tuple[float, Dict]]:
+        """The `k` closest cases as (distance, case) pairs, nearest first"""
+        point = self.encode_record(record)
+        distances, indices = self.tree.query(point, k=min(k, len(self.records)))
+        found = [(float(d), self.records[i]) for d, i in zip(distances[0], indices[0])]
+
+        records, points = self._pending
+        if records:
+            pending = np.sqrt(((points - point) ** 2).sum(axis=1))
+            found.extend((float(pending[i]), records[i]) for i in np.argsort(pending)[:k])
+            found.sort(key=lambda item: item[0])
+
+        return found[:k]
+
+
+class SimilarCaseIndex:
+    """Per-species similar-case lookup over the training data CSV
+
+    Indexes are built on a background thread, started by `start` (or the
+    first query); queries before the first build finishes raise
+    CaseIndexNotReady. The file is checked for growth at most
+    every `refresh_interval` seconds; appended rows are parsed from the last
+    read byte offset and added to their species' index without a rebuild.
+    Once a species has accumulated `rebuild_fraction` of its size in
+    appended rows (or `max_pending` rows) it is rebuilt in the background
+    and swapped in. A file that shrank or was rewritten triggers a full
+    rebuild, also in the background; queries use the old indexes meanwhile.
+    A missing file or failed build is retried after `refresh_interval`
+    seconds, doubling with each failure up to `max_retry_interval`; until a
+    build succeeds, queries raise CaseIndexUnavailable.
+    """
+
+    def __init__(self, data_path: str, refresh_interval: float = 5.0, rebuild_fraction: float = 0.2,
+                 max_pending: int = 5000, max_retry_interval: float = 300.0, **index_options):
+        self.data_path = data_path
+        self.refresh_interval = refresh_interval
+        self.max_retry_interval = max_retry_interval
+        self.rebuild_fraction = rebuild_fraction
+        self.max_pending = max_pending
+        self.index_options = index_options
+        self.indexes: Dict[str, SpeciesCaseIndex] = {}
+        self.columns: Optional[List[str]] = None
+        self._offset = 0
+        self._signature = None
+        self._last_check = None
+        self._lock = threading.Lock()
+        self._rebuilding = set()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='case-index')
+        self._building: Optional[threading.Thread] = None
+        self._retry_at = 0.0
+        self.last_error: Optional[str] = None
+
+        # Counters
+        self.appended = 0
+        self.rebuilds = 0
+        self.failures = 0
+
+    @property
+    def ready(self) -> bool:
+        return self.columns is not None
+
+    def start(self) -> None:
+        """Build the indexes in the background unless built, building or backing off"""
+        if self.columns is None and self._building is None and time.monotonic() >= self._retry_at:
+            self.refresh(force=True)
+
+    def _build_failed(self, error: str) -> None:
+        # Called with the lock held
+        self.failures += 1
+        self.last_error = error
+        delay = min(self.refresh_interval * 2 ** (self.failures - 1), self.max_retry_interval)
+        self._retry_at = time.monotonic() + delay
+        logger.error("Error building similar-case indexes: %s (retrying in %.1fs)", error, delay)
+
+    def _start_full_build(self) -> None:
+        # Called with the lock held
+        if self._building is None:
+            self._building = threading.Thread(target=self._full_build, name='case-index-build', daemon=True)
+            self._building.start()
+
+    def _full_build(self) -> None:
+        try:
+            import pandas as pd
+
+            with open(self.data_path, 'rb') as f:
+                data = f.read()
+            end = data.rfind(b'\n') + 1
+            df = pd.read_csv(io.BytesIO(data[:end]))
+            indexes = {
+                species: SpeciesCaseIndex(cases, **self.index_options)
+                for species, cases in df.groupby('Species', sort=False)
+            }
+            with self._lock:
+                self.columns = list(df.columns)
+                self.indexes = indexes
+                self._offset = end
+                self._signature = self._file_signature(data[:end])
+                self.rebuilds += 1
+                self.failures = 0
+                self.last_error = None
+            logger.info("Built similar-case indexes for %s species from %s records", len(indexes), len(df))
+        except Exception as e:
+            with self._lock:
+                self._build_failed(str(e))
+        finally:
+            with self._lock:
+                self._building = None
+
+    @staticmethod
+    def _file_signature(head: bytes) -> bytes:
+        # The first kilobyte identifies the file; a rewrite usually changes it
+        return head[:1024]
+
+    def refresh(self, force: bool = False) -> None:
+        """Pick up records appended to the data file since the last check"""
+        now = time.monotonic()
+        if not force and self._last_check is not None and now - self._last_check < self.refresh_interval:
+            return
+
+        with self._lock:
+            self._last_check = now
+            if self._building is not None:
+                return  # the build in progress reads the whole file
+            if now < self._retry_at:
+                return  # backing off after a failed build
+            try:
+                size = os.path.getsize(self.data_path)
+            except FileNotFoundError:
+                if self.columns is None:
+                    self._build_failed(f"Similar-case data not found: {self.data_path}")
+                else:
+                    logger.warning("Similar-case data not found: %s", self.data_path)
+                return
+
+            if self.columns is None or size < self._offset:
+                self._start_full_build()
+                return
+            if size == self._offset:
+                return
+
+            with open(self.data_path, 'rb') as f:
+                head = f.read(min(1024, self._offset))
+                if head != self._signature[:len(head)]:
+                    self._start_full_build()
+                    return
+                f.seek(self._offset)
+                tail = f.read()
+
+            end = tail.rfind(b'\n') + 1
+            if end == 0:
+                return  # a partially written line; wait for the rest
+            import pandas as pd
+            new = pd.read_csv(io.BytesIO(tail[:end]), header=None, names=self.columns)
+            self._offset += end
+            self.appended += len(new)
+
+            for species, cases in new.groupby('Species', sort=False):
+                index = self.indexes.get(species)
+                if index is None:
+                    self.indexes[species] = SpeciesCaseIndex(cases, **self.index_options)
+                    continue
+                index.append(cases)
+                if species not in self._rebuilding and \
+                        len(index.pending) >= min(self.max_pending, self.rebuild_fraction * len(index.records)):
+                    self._rebuilding.add(species)
+                    self._executor.submit(self._rebuild, species, index)
+
+    def _rebuild(self, species: str, index: SpeciesCaseIndex) -> None:
+        import pandas as pd
+
+        try:
+            pending = index.pending
+            rebuilt = SpeciesCaseIndex(pd.DataFrame(index.records + pending), **self.index_options)
+            with self._lock:
+                if self.indexes.get(species) is not index:
+                    return  # replaced by a full rebuild meanwhile
+                # Carry over rows appended while the new index was being built
+                if len(index.pending) > len(pending):
+                    rebuilt.append(pd.DataFrame(index.pending[len(pending):]))
+                self.indexes[species] = rebuilt
+                self.rebuilds += 1
+            logger.info("Rebuilt similar-case index for %s (%s records)", species, len(rebuilt))
+        except Exception as e:
+            logger.error("Error rebuilding similar-case index for %s: %s", species, e)
+        finally:
+            with self._lock:
+                self._rebuilding.discard(species)
+
+    def find(self, record: Dict, k: int = 5) -> Optional[List[Tuple[float, Dict]]]:
+        """Top-k similar cases of the record's species, None for an unknown species
+
+        Raises CaseIndexNotReady until the first build has finished, and
+        CaseIndexUnavailable while no build has succeeded after a failure.
+        """
+        self.refresh()
+        if self.columns is None:
+            if self._building is None and self.last_error is not None:
+                raise CaseIndexUnavailable("Similar-case index is unavailable: building it from the case data failed",
+                                           max(0.0, self._retry_at - time.monotonic()))
+            raise CaseIndexNotReady("Similar-case index is still being built")
+        index = self.indexes.get(record.get('Species'))
+        if index is None:
+            return None
+        return index.query(record, k)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'species': {
+                    species: {'records': len(index), 'pending': len(index.pending), 'method': index.method}
+                    for species, index in self.indexes.items()
+                },
+                'appended': self.appended,
+                'rebuilds': self.rebuilds,
+                'rebuilding': sorted(self._rebuilding),
+                'failures': self.failures,
+                'last_error': self.last_error
+            }
@@ -3,12 +3,17 @@ import numpy as np
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import LabelEncoder
 from config import *
+from utils.encoders import CategoricalEncoder
+from utils.dataset_cache import DatasetCache
 import logging
 
 logger = logging.getLogger(__name__)
 
 class DataProcessor:
-    def __init__(self):
+    def __init__(self, feature_encoder=None):
+        self.feature_encoder = feature_encoder or CategoricalEncoder(
+            CATEGORICAL_FEATURES, NUMERICAL_FEATURES
+        )
         self.label_encoders = {}
         # Initialize label encoder for Health_Outcome
         self.label_encoders['Health_Outcome'] = LabelEncoder()
@@ -16,11 +21,17 @@ class DataProcessor:
         self.label_encoders['Health_Outcome'].fit([
             'Healthy', 'Minor Issue', 'Requires Treatment', 'Critical', 'Emergency'
         ])
+        self.dataset_cache = DatasetCache(DATASET_PATH, DATASET_CACHE_DIR, DATASET_DATE_COLUMN,
+                                          numeric_columns=NUMERICAL_FEATURES)
         
-    def load_data(self):
-        """Load or generate sample data"""
+    def load_data(self, columns=None, species=None, date_range=None):
+        """Load or generate sample data
+
+        Reads through the columnar dataset cache: only `columns` are read and
+        `species` / `date_range` (start, end) filters are pushed down.
+        """
         try:
-            return pd.read_csv(DATASET_PATH)
+            return self.dataset_cache.load(columns=columns, species=species, date_range=date_range)
         except FileNotFoundError:
             print("Dataset not found. Creating sample data...")
             # Create sample data
@@ -47,39 +58,26 @@ class DataProcessor:
             
             df = pd.DataFrame(data)
             df.to_csv(DATASET_PATH, index=False)
-            return df
+            if species:
+                df = df[df['Species'].isin(list(species))]
+            return df[columns] if columns is not None else df
             
     def preprocess_data(self, df):
-        """Preprocess the data"""
+        """Preprocess the data
+
+        Categoricals are encoded with the frozen vocabularies of
+        `feature_encoder` (fitted on the first call); unseen categories map to
+        the reserved unknown code instead of refitting the encoder.
+        """
         try:
-            df_processed = df.copy()
-            
-            # Handle numerical columns
-            numerical_columns = ['Age', 'Weight', 'Heart_Rate', 'Respiratory_Rate', 'Temperature']
-            for col in numerical_columns:
-                if col in df_processed.columns:
-                    df_processed[col] = pd.to_numeric(df_processed[col], errors='coerce')
-                    mean_val = df_processed[col].mean()
-                    df_processed[col] = df_processed[col].fillna(mean_val)
-            
-            # Handle categorical columns
-            categorical_columns = [
-                'Species', 'Gender', 'Diet_Type', 'Habitat_Quality', 
-                'Genetic_Risk', 'Medical_History'
-            ]
-            
-            for col in categorical_columns:
-                if col in df_processed.columns:
-                    if col not in self.label_encoders:
-                        self.label_encoders[col] = LabelEncoder()
-                        df_processed[col] = self.label_encoders[col].fit_transform(df_processed[col].astype(str))
-                    else:
-                        try:
-                            df_processed[col] = self.label_encoders[col].transform(df_processed[col].astype(str))
-                        except ValueError:
-                            # Handle unseen categories by refitting
-                            self.label_encoders[col] = LabelEncoder()
-                            df_processed[col] = self.label_encoders[col].fit_transform(df_processed[col].astype(str))
+            if not self.feature_encoder.fitted:
+                self.feature_encoder.fit(df)
+            else:
+                unknown = {col: n for col, n in self.feature_encoder.unknown_counts(df).items() if n}
+                if unknown:
+                    logger.warning("Unseen categories mapped to unknown code: %s", unknown)
+
+            df_processed = self.feature_encoder.transform(df)
             
             # Drop any non-feature columns that might have been added
             columns_to_drop = ['Symptoms', 'Animal_ID']
@@ -88,7 +86,7 @@ class DataProcessor:
             return df_processed
             
         except Exception as e:
-            logger.error(f"Error in preprocess_data: {str(e)}")
+            logger.error("Error in preprocess_data: %s", e)
             raise
         
     def prepare_data_for_training(self, df):
@@ -114,5 +112,5 @@ class DataProcessor:
                 return df_processed
                 
         except Exception as e:
-            logger.error(f"Error in prepare_data_for_training: {str(e)}")
+            logger.error("Error in prepare_data_for_training: %s", e)
             raise
\ No newline at end of file
@@ -0,0 +1,203 @@
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - exercised only without pyarrow
+    pa = None
+
+HASH_CHUNK_SIZE = 8 * 1024 * 1024
+# Part of the cache file name: bump when the Parquet layout or typing changes
+CACHE_FORMAT = 2
+
+
+def file_digest(path: str, cache_dir: str) -> str:
+    """Content hash of a source file, memoized by size and mtime
+
+    Hashing a multi-GB CSV costs seconds, so the digest is remembered in a
+    small sidecar file and only recomputed when the file's size or
+    modification time changes.
+    """
+    stat = os.stat(path)
+    sidecar = os.path.join(cache_dir, os.path.basename(path) + '.hash.json')
+    try:
+        with open(sidecar) as f:
+            memo = json.load(f)
+        if memo['size'] == stat.st_size and memo['mtime_ns'] == stat.st_mtime_ns:
+            return memo['digest']
+    except (FileNotFoundError, ValueError, KeyError):
+        pass
+
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(sidecar, 'w') as f:
+        json.dump({'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                   'digest': digest.hexdigest()}, f)
+    return digest.hexdigest()
+
+
+class DatasetCache:
+    """Typed Parquet copy of a CSV dataset, keyed by the CSV's content hash
+
+    The CSV is parsed once, streamed batch by batch into a Parquet file.
+    Column types are fixed before streaming (see `_column_types`). Later
+    loads memory-map that file, read only the requested columns and push
+    species/date filters down to the row-group level. `date_column` is
+    optional; date filters raise ValueError when the file has no such
+    column. Falls back to pandas.read_csv when pyarrow is not installed.
+    """
+
+    def __init__(self, source_path: str, cache_dir: str, date_column: Optional[str] = None,
+                 numeric_columns: Sequence[str] = ()):
+        self.source_path = source_path
+        self.cache_dir = cache_dir
+        self.date_column = date_column
+        self.numeric_columns = set(numeric_columns)
+
+    @property
+    def available(self) -> bool:
+        return pa is not None
+
+    def _cache_path(self, digest: str) -> str:
+        stem = os.path.splitext(os.path.basename(self.source_path))[0]
+        return os.path.join(self.cache_dir, f'{stem}-{digest}-v{CACHE_FORMAT}.parquet')
+
+    def _remove_stale(self, current_path: str) -> None:
+        stem = os.path.splitext(os.path.basename(self.source_path))[0]
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name.startswith(stem + '-') and name.endswith('.parquet') and path != current_path:
+                os.remove(path)
+
+    def _column_types(self) -> Dict[str, 'pa.DataType']:
+        """Type of every CSV column, decided before the file is streamed
+
+        Left to itself pyarrow infers each column from the first block and
+        aborts on a later row that does not fit, e.g. a column that is empty
+        at the start. Known numeric columns are float64 and the date column
+        a timestamp. Other columns keep the first block's type, widened so
+        later rows still parse: integers to float64, all-null columns to
+        string.
+        """
+        schema = pa_csv.open_csv(self.source_path).schema
+        if self.date_column and self.date_column not in schema.names:
+            logger.warning("%s has no %s column; date filters are unavailable",
+                           self.source_path, self.date_column)
+        column_types = {}
+        for field in schema:
+            if field.name in self.numeric_columns or pa.types.is_integer(field.type):
+                column_types[field.name] = pa.float64()
+            elif field.name == self.date_column:
+                column_types[field.name] = pa.timestamp('s')
+            elif pa.types.is_null(field.type):
+                column_types[field.name] = pa.string()
+            else:
+                column_types[field.name] = field.type
+        return column_types
+
+    def _build(self, cache_path: str) -> None:
+        logger.info("Building dataset cache for %s", self.source_path)
+        convert_options = pa_csv.ConvertOptions(
+            column_types=self._column_types(),
+            strings_can_be_null=True,
+            timestamp_parsers=[pa_csv.ISO8601] if self.date_column else None
+        )
+        reader = pa_csv.open_csv(self.source_path, convert_options=convert_options)
+        tmp_path = cache_path + '.tmp'
+        writer = None
+        try:
+            for batch in reader:
+                if writer is None:
+                    writer = pq.ParquetWriter(tmp_path, batch.schema, compression='snappy')
+                writer.write_table(pa.Table.from_batches([batch]))
+        finally:
+            if writer is not None:
+                writer.close()
+        os.replace(tmp_path, cache_path)
+        self._remove_stale(cache_path)
+
+    def ensure(self) -> Optional[str]:
+        """Return the path of an up-to-date cache file, building it if needed"""
+        if not self.available:
+            return None
+        os.makedirs(self.cache_dir, exist_ok=True)
+        cache_path = self._cache_path(file_digest(self.source_path, self.cache_dir))
+        if not os.path.exists(cache_path):
+            self._build(cache_path)
+        return cache_path
+
+    def _check_date_column(self, columns: Sequence[str]) -> None:
+        if not self.date_column or self.date_column not in columns:
+            raise ValueError(f"{self.source_path} has no date column "
+                             f"({self.date_column or 'none configured'}) to filter on")
+
+    def _filters(self, species: Optional[Sequence[str]],
+                 date_range: Optional[Tuple]) -> Optional[List[Tuple]]:
+        filters = []
+        if species:
+            filters.append(('Species', 'in', list(species)))
+        if date_range:
+            start, end = date_range
+            if start is not None:
+                filters.append((self.date_column, '>=', pd.Timestamp(start).to_pydatetime()))
+            if end is not None:
+                filters.append((self.date_column, '<=', pd.Timestamp(end).to_pydatetime()))
+        return filters or None
+
+    def load(self, columns: Optional[List[str]] = None, species: Optional[Sequence[str]] = None,
+             date_range: Optional[Tuple] = None) -> pd.DataFrame:
+        """Load the dataset, optionally projected to `columns` and filtered"""
+        cache_path = self.ensure()
+        if cache_path is None:
+            logger.warning("pyarrow not installed, reading CSV without cache")
+            return self._load_csv(columns, species, date_range)
+
+        schema = pq.read_schema(cache_path)
+        if date_range:
+            self._check_date_column(schema.names)
+        string_columns = [field.name for field in schema if pa.types.is_string(field.type)]
+        table = pq.read_table(
+            cache_path,
+            columns=columns,
+            filters=self._filters(species, date_range),
+            memory_map=True,
+            read_dictionary=[col for col in string_columns if columns is None or col in columns]
+        )
+        return table.to_pandas()
+
+    def _load_csv(self, columns, species, date_range) -> pd.DataFrame:
+        if date_range:
+            self._check_date_column(pd.read_csv(self.source_path, nrows=0).columns)
+        usecols = None
+        if columns is not None:
+            usecols = set(columns)
+            if species:
+                usecols.add('Species')
+            if date_range:
+                usecols.add(self.date_column)
+        df = pd.read_csv(self.source_path, usecols=usecols and list(usecols))
+        if species:
+            df = df[df['Species'].isin(list(species))]
+        if date_range:
+            dates = pd.to_datetime(df[self.date_column])
+            start, end = date_range
+            mask = pd.Series(True, index=df.index)
+            if start is not None:
+                mask &= dates >= pd.Timestamp(start)
+            if end is not None:
+                mask &= dates <= pd.Timestamp(end)
+            df = df[mask]
+        return df[columns] if columns is not None else df
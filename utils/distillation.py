@@ -0,0 +1,92 @@
+import pickle
+import time
+from typing import Dict
+
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class DistilledClassifier:
+    """Compact student model trained on a teacher forest's soft predictions
+
+    A shallow multi-output regressor learns the teacher's class
+    probabilities directly, which keeps far more of the teacher's behaviour
+    than fitting on hard labels. Exposes the classifier interface used by
+    HealthAnalyzer (classes_, predict_proba, predict, feature_importances_).
+    """
+
+    def __init__(self, classes, n_estimators: int = 20, max_depth: int = 8,
+                 min_samples_leaf: int = 5, random_state: int = 42):
+        self.classes_ = np.asarray(classes)
+        self.regressor = RandomForestRegressor(
+            n_estimators=n_estimators,
+            max_depth=max_depth,
+            min_samples_leaf=min_samples_leaf,
+            random_state=random_state,
+            n_jobs=1
+        )
+
+    def fit(self, X, soft_targets):
+        self.regressor.fit(X, soft_targets)
+        return self
+
+    def predict_proba(self, X) -> np.ndarray:
+        proba = np.clip(self.regressor.predict(X), 0, None)
+        if proba.ndim == 1:
+            proba = proba.reshape(1, -1)
+        totals = proba.sum(axis=1, keepdims=True)
+        totals[totals == 0] = 1
+        return proba / totals
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+    @property
+    def feature_importances_(self) -> np.ndarray:
+        return self.regressor.feature_importances_
+
+
+def _median_latency_ms(predict, X, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predict(X)
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings))
+
+
+def compare_models(teacher, student, X_eval: np.ndarray, latency_repeats: int = 50) -> Dict:
+    """Report agreement, artifact size and inference latency of student vs teacher"""
+    teacher_proba = teacher.predict_proba(X_eval)
+    student_proba = student.predict_proba(X_eval)
+
+    teacher_size = len(pickle.dumps(teacher))
+    student_size = len(pickle.dumps(student))
+
+    single_row = X_eval[:1]
+    teacher_single = _median_latency_ms(teacher.predict_proba, single_row, latency_repeats)
+    student_single = _median_latency_ms(student.predict_proba, single_row, latency_repeats)
+    teacher_batch = _median_latency_ms(teacher.predict_proba, X_eval, max(1, latency_repeats // 10))
+    student_batch = _median_latency_ms(student.predict_proba, X_eval, max(1, latency_repeats // 10))
+
+    return {
+        'eval_samples': int(len(X_eval)),
+        'agreement': float(np.mean(teacher_proba.argmax(axis=1) == student_proba.argmax(axis=1))),
+        'mean_abs_probability_diff': float(np.mean(np.abs(teacher_proba - student_proba))),
+        'size_bytes': {
+            'teacher': teacher_size,
+            'student': student_size,
+            'reduction': round(teacher_size / max(student_size, 1), 2)
+        },
+        'latency_ms': {
+            'teacher_single': teacher_single,
+            'student_single': student_single,
+            'teacher_batch': teacher_batch,
+            'student_batch': student_batch,
+            'single_speedup': round(teacher_single / max(student_single, 1e-9), 2),
+            'batch_speedup': round(teacher_batch / max(student_batch, 1e-9), 2)
+        }
+    }
@@ -0,0 +1,127 @@
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_object_dtype, is_string_dtype, CategoricalDtype
+from typing import Dict, List, Optional
+import joblib
+import logging
+
+logger = logging.getLogger(__name__)
+
+class CategoricalEncoder:
+    """Frozen-vocabulary feature encoder built on pandas Categorical
+
+    Vocabularies are learned once in `fit` and never change afterwards, so
+    training and serving always agree on the codes. Code 0 is reserved for
+    unknown/missing categories; known categories are numbered from 1.
+    Codes use the smallest integer dtype that fits and numerics are float32.
+    Missing numerics are imputed with the training mean of the record's
+    `group_column` value (species), falling back to the overall training
+    mean, so a single served record is imputed exactly as in training.
+    """
+
+    UNKNOWN_CODE = 0
+
+    def __init__(self, categorical_columns: List[str], numerical_columns: List[str],
+                 group_column: str = 'Species'):
+        self.categorical_columns = list(categorical_columns)
+        self.numerical_columns = list(numerical_columns)
+        self.group_column = group_column
+        self.vocabularies: Dict[str, pd.Index] = {}
+        self.fill_values: Dict[str, float] = {}
+        self.group_means: Optional[pd.DataFrame] = None
+
+    @property
+    def fitted(self) -> bool:
+        return bool(self.vocabularies) or bool(self.fill_values)
+
+    @staticmethod
+    def _as_categories(values: pd.Series) -> pd.Series:
+        if is_object_dtype(values) or is_string_dtype(values) or isinstance(values.dtype, CategoricalDtype):
+            return values
+        return values.astype(str)
+
+    @staticmethod
+    def _code_dtype(vocab_size: int):
+        # +1 for the reserved unknown code
+        if vocab_size + 1 <= np.iinfo(np.int8).max:
+            return np.int8
+        if vocab_size + 1 <= np.iinfo(np.int16).max:
+            return np.int16
+        return np.int32
+
+    def fit(self, df: pd.DataFrame) -> 'CategoricalEncoder':
+        """Learn category vocabularies, per-group means and fallback fill values"""
+        for col in self.categorical_columns:
+            if col in df.columns:
+                values = self._as_categories(df[col]).dropna()
+                self.vocabularies[col] = pd.Index(sorted(values.astype(str).unique()))
+
+        for col in self.numerical_columns:
+            if col in df.columns:
+                mean_val = pd.to_numeric(df[col], errors='coerce').mean()
+                self.fill_values[col] = float(mean_val) if pd.notna(mean_val) else 0.0
+
+        numerical_columns = [col for col in self.numerical_columns if col in df.columns]
+        if numerical_columns and self.group_column in df.columns:
+            numerics = df[numerical_columns].apply(pd.to_numeric, errors='coerce')
+            group_means = numerics.groupby(df[self.group_column]).mean()
+            group_means.index = group_means.index.astype(str)
+            self.group_means = group_means
+
+        return self
+
+    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Encode categoricals and impute numerics with frozen parameters"""
+        if not self.fitted:
+            raise ValueError("Encoder not fitted. Call fit first.")
+
+        df_encoded = df.copy()
+
+        # Numerics: float32, missing values filled from the species-group mean
+        # learned in fit (one lookup per row), then from the training mean
+        numerical_columns = [col for col in self.numerical_columns if col in df_encoded.columns]
+        if numerical_columns:
+            numerics = df_encoded[numerical_columns].apply(pd.to_numeric, errors='coerce').astype(np.float32)
+            # Encoders saved before group means were stored have none
+            group_means = getattr(self, 'group_means', None)
+            if numerics.isna().any().any():
+                if group_means is not None and self.group_column in df_encoded.columns:
+                    groups = df_encoded[self.group_column].astype(str)
+                    lookup = group_means.reindex(index=groups.values, columns=numerical_columns)
+                    lookup.index = numerics.index
+                    numerics = numerics.fillna(lookup.astype(np.float32))
+                numerics = numerics.fillna({col: self.fill_values.get(col, 0.0) for col in numerical_columns})
+            df_encoded[numerical_columns] = numerics.astype(np.float32)
+
+        for col in self.categorical_columns:
+            if col in df_encoded.columns:
+                vocab = self.vocabularies.get(col)
+                if vocab is None:
+                    continue
+                codes = pd.Categorical(self._as_categories(df_encoded[col]), categories=vocab).codes
+                df_encoded[col] = (codes + 1).astype(self._code_dtype(len(vocab)))
+
+        return df_encoded
+
+    def fit_transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        return self.fit(df).transform(df)
+
+    def unknown_counts(self, df: pd.DataFrame) -> Dict[str, int]:
+        """Count values that would map to the unknown code, per column"""
+        counts = {}
+        for col, vocab in self.vocabularies.items():
+            if col in df.columns:
+                codes = pd.Categorical(self._as_categories(df[col]), categories=vocab).codes
+                counts[col] = int((codes == -1).sum())
+        return counts
+
+    def save(self, path: str) -> None:
+        joblib.dump(self, path)
+
+    @staticmethod
+    def load(path: str) -> Optional['CategoricalEncoder']:
+        try:
+            return joblib.load(path)
+        except FileNotFoundError:
+            logger.warning("Feature encoder not found at %s", path)
+            return None
@@ -0,0 +1,152 @@
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Dict, Hashable, Optional, Sequence
+
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """Coalesce concurrent single-row predictions into one model call
+
+    Callers submit one feature row each; a dispatcher thread stacks the rows
+    waiting at that moment and calls `predict_fn(features, key)` once per
+    distinct `key` (e.g. which model should score the rows), then hands each
+    caller its own output row. Rows that arrive while the model is busy
+    simply form the next batch.
+
+    The dispatcher only holds a batch open (up to `max_delay` seconds or
+    `max_batch_size` rows) when the recent arrival rate says another row is
+    likely to arrive within the window. A lone request under light load is
+    dispatched immediately and never pays the window.
+    """
+
+    def __init__(self, predict_fn: Callable[[np.ndarray, Hashable], Sequence], max_batch_size: int = 32,
+                 max_delay: float = 0.002, name: str = 'inference', history: int = 4096):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.name = name
+        self._queue: 'queue.SimpleQueue' = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._interarrival = None  # EWMA of seconds between submissions
+        self._last_arrival = None
+
+        self._history = history
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        self.batches = 0
+        self.rows = 0
+        self.errors = 0
+        self.batch_sizes: Dict[int, int] = {}
+        self._queue_delays = deque(maxlen=self._history)
+        self._model_times = deque(maxlen=self._history)
+
+    def _ensure_started(self) -> None:
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._dispatch_loop, name=f'{self.name}-batcher', daemon=True
+                    )
+                    self._thread.start()
+
+    def submit(self, row: np.ndarray, key: Hashable = None) -> Future:
+        """Queue one feature row; the future resolves to its output row"""
+        self._ensure_started()
+        future = Future()
+        now = time.perf_counter()
+        with self._lock:
+            if self._last_arrival is not None:
+                gap = now - self._last_arrival
+                self._interarrival = gap if self._interarrival is None \
+                    else 0.8 * self._interarrival + 0.2 * gap
+            self._last_arrival = now
+        self._queue.put((row, future, now, key))
+        return future
+
+    def predict(self, row: np.ndarray, key: Hashable = None, timeout: Optional[float] = None):
+        """Submit a row and wait for its result"""
+        return self.submit(row, key).result(timeout)
+
+    def _worth_waiting(self) -> bool:
+        interarrival = self._interarrival
+        return interarrival is not None and interarrival < self.max_delay
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = batch[0][2] + self.max_delay
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except queue.Empty:
+                pass
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0 or not self._worth_waiting():
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _dispatch_loop(self) -> None:
+        while True:
+            groups = {}
+            for item in self._collect():
+                # Skip rows whose callers already gave up
+                if item[1].set_running_or_notify_cancel():
+                    groups.setdefault(item[3], []).append(item)
+            for key, batch in groups.items():
+                self._run_batch(key, batch)
+
+    def _run_batch(self, key: Hashable, batch) -> None:
+        start = time.perf_counter()
+        try:
+            outputs = self.predict_fn(np.vstack([item[0] for item in batch]), key)
+        except Exception as e:
+            logger.error("Batched %s call failed: %s", self.name, e)
+            self.errors += 1
+            for item in batch:
+                item[1].set_exception(e)
+            return
+        finished = time.perf_counter()
+
+        for item, output in zip(batch, outputs):
+            item[1].set_result(output)
+
+        size = len(batch)
+        self.batches += 1
+        self.rows += size
+        self.batch_sizes[size] = self.batch_sizes.get(size, 0) + 1
+        self._queue_delays.extend(start - item[2] for item in batch)
+        self._model_times.append(finished - start)
+
+    @staticmethod
+    def _percentiles_ms(samples) -> Dict[str, float]:
+        if not samples:
+            return {}
+        values = np.fromiter(samples, dtype=float) * 1000
+        return {f'p{q}': float(np.percentile(values, q)) for q in (50, 90, 99)}
+
+    def stats(self) -> Dict:
+        """Batch size and queueing delay over recent batches"""
+        return {
+            'batches': self.batches,
+            'rows': self.rows,
+            'errors': self.errors,
+            'mean_batch_size': self.rows / self.batches if self.batches else 0.0,
+            'batch_sizes': dict(sorted(self.batch_sizes.items())),
+            'queue_delay_ms': self._percentiles_ms(list(self._queue_delays)),
+            'model_time_ms': self._percentiles_ms(list(self._model_times)),
+            'max_batch_size': self.max_batch_size,
+            'max_delay_ms': self.max_delay * 1000
+        }
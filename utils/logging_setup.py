@@ -0,0 +1,155 @@
+import atexit
+import json
+import logging
+import queue
+import sys
+import threading
+import time
+from collections.abc import Mapping
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+# Record attributes (passed with `extra=`) copied into JSON log lines
+STRUCTURED_FIELDS = ('species', 'stage', 'endpoint', 'latency_ms', 'status', 'suppressed')
+# Message arguments whose text cannot change between the log call and the
+# listener formatting it, so formatting can be left to the listener
+_STABLE_ARGS = (str, int, float, bool, type(None), BaseException)
+
+_listener: Optional[QueueListener] = None
+_configure_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message and structured fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        for field in STRUCTURED_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Plain text lines with the structured fields appended as key=value"""
+
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = ' '.join(f'{field}={getattr(record, field)}' for field in STRUCTURED_FIELDS
+                          if getattr(record, field, None) is not None)
+        return f'{line} [{fields}]' if fields else line
+
+
+class RateLimitFilter(logging.Filter):
+    """Lets through at most `burst` records per message template every `interval` seconds
+
+    Only records at `min_level` and above are limited. Records are keyed by
+    logger, level and unformatted message, so an error storm with varying
+    arguments counts as one message. The first record let through after
+    some were dropped carries the dropped count as `suppressed`.
+    """
+
+    def __init__(self, burst: int = 10, interval: float = 60.0, min_level: int = logging.WARNING,
+                 max_keys: int = 10000):
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        self.min_level = min_level
+        self.max_keys = max_keys
+        self._windows: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < self.min_level:
+            return True
+        key = (record.name, record.levelno, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                suppressed = window[2] if window is not None else 0
+                if window is None and len(self._windows) >= self.max_keys:
+                    self._windows.clear()
+                self._windows[key] = [now, 1, 0]
+                if suppressed:
+                    record.suppressed = suppressed
+                return True
+            if window[1] < self.burst:
+                window[1] += 1
+                return True
+            window[2] += 1
+            return False
+
+
+class LazyQueueHandler(QueueHandler):
+    """Queues records for the listener thread without formatting them first
+
+    QueueHandler formats every message in the logging thread. Here the
+    message is only formatted up front when an argument could change before
+    the listener gets to it. When the queue is full the record is dropped
+    and counted rather than blocking the caller.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        args = record.args
+        # A single mapping argument is unwrapped into `args`; the mapping
+        # itself can still change, so it is always formatted here
+        if args and (isinstance(args, Mapping)
+                     or not all(isinstance(value, _STABLE_ARGS) for value in args)):
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def configure_logging(level: str = 'INFO', json_format: bool = True, queue_size: int = 10000,
+                      sample_burst: int = 10, sample_interval: float = 60.0, stream=None) -> None:
+    """Route all logging through a queue to a background listener
+
+    Call once from the process entry point (app, training scripts); later
+    calls do nothing. Log calls then only filter and enqueue; a listener
+    thread formats and writes the records, and is stopped (flushing what
+    is queued) at exit.
+    """
+    global _listener
+    with _configure_lock:
+        if _listener is not None:
+            return
+
+        output = logging.StreamHandler(stream or sys.stderr)
+        output.setFormatter(JsonFormatter() if json_format else TextFormatter())
+
+        log_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        handler = LazyQueueHandler(log_queue)
+        handler.addFilter(RateLimitFilter(burst=sample_burst, interval=sample_interval))
+
+        root = logging.getLogger()
+        for existing in list(root.handlers):
+            root.removeHandler(existing)
+        root.addHandler(handler)
+        root.setLevel(level)
+
+        _listener = QueueListener(log_queue, output, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
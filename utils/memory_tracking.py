@@ -0,0 +1,312 @@
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+import types
+from collections import Counter, deque
+from concurrent.futures import Executor
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Objects that are shared infrastructure rather than data held by a component
+_SKIP_TYPES = (
+    type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType,
+    types.CodeType, types.FrameType, threading.Thread, Executor, logging.Logger,
+    type(threading.Lock()), type(threading.RLock())
+)
+# Allocation sites left out of reports: tracemalloc itself, this module, and
+# frozen/unknown frames (imports). Filtered after grouping by line, which is
+# much cheaper than Snapshot.filter_traces on every trace.
+_IGNORED_FILES = (tracemalloc.__file__, __file__)
+
+
+def deep_sizeof(*objects) -> int:
+    """Approximate bytes held by `objects` and everything they reference
+
+    Containers, instance attributes and slots are followed; numpy arrays
+    count their buffer once (views only their header). Extension objects
+    without a `__dict__` (sklearn trees, BallTree) are measured through
+    their pickled state. Classes, functions, modules, threads, locks and
+    executors are not followed. Each object is counted once.
+    """
+    seen = set()
+    total = 0
+    stack = list(objects)
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, _SKIP_TYPES):
+            continue
+        seen.add(id(obj))
+        try:
+            total += sys.getsizeof(obj)
+        except TypeError:
+            continue
+
+        if isinstance(obj, np.ndarray):
+            if obj.base is None and obj.dtype != object:
+                total += obj.nbytes
+            elif obj.dtype == object:
+                stack.extend(obj.ravel().tolist())
+            else:
+                stack.append(obj.base)
+            continue
+        if isinstance(obj, (str, bytes, bytearray, int, float, bool, complex, type(None))):
+            continue
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+            continue
+        if isinstance(obj, (list, tuple, set, frozenset, deque)):
+            stack.extend(obj)
+            continue
+
+        attributes = getattr(obj, '__dict__', None)
+        if attributes is not None:
+            stack.append(attributes)
+        slots = [slot for cls in type(obj).__mro__ for slot in getattr(cls, '__slots__', ())]
+        stack.extend(getattr(obj, slot) for slot in slots if hasattr(obj, slot))
+        if attributes is None and not slots:
+            try:
+                state = obj.__getstate__()
+            except Exception:
+                state = None
+            if state is not None:
+                stack.append(state)
+    return total
+
+
+def rss_bytes() -> Optional[int]:
+    """Resident set size of this process (Linux), else None"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _reported(stat) -> bool:
+    filename = stat.traceback[0].filename
+    return stat.size_diff > 0 and not filename.startswith('<') and filename not in _IGNORED_FILES
+
+
+def _top_sites(stats, top: int) -> List[Dict]:
+    """Largest positive size differences of a snapshot comparison"""
+    growth = [stat for stat in stats if _reported(stat)]
+    growth.sort(key=lambda stat: stat.size_diff, reverse=True)
+    return [{
+        'site': _site(stat.traceback),
+        'size_diff': stat.size_diff,
+        'count_diff': stat.count_diff,
+        'size': stat.size
+    } for stat in growth[:top]]
+
+
+def _site(traceback) -> str:
+    frame = traceback[0]
+    return f'{frame.filename}:{frame.lineno}'
+
+
+class _EndpointMemory:
+    """Memory counters of one endpoint"""
+
+    def __init__(self):
+        self.requests = 0
+        self.net_bytes = 0
+        self.max_net_bytes = 0
+        self.sampled = 0
+        self.max_peak_bytes = 0
+        # Bytes still allocated at the end of sampled requests, by site
+        self.retained: Counter = Counter()
+        self.retained_counts: Counter = Counter()
+
+    def to_dict(self, top: int) -> Dict:
+        return {
+            'requests': self.requests,
+            'mean_net_bytes': round(self.net_bytes / self.requests) if self.requests else 0,
+            'max_net_bytes': self.max_net_bytes,
+            'sampled': self.sampled,
+            'max_peak_bytes': self.max_peak_bytes if self.sampled else None,
+            'top_retained_sites': [
+                {'site': site, 'size_diff': size, 'count_diff': self.retained_counts[site]}
+                for site, size in self.retained.most_common(top)
+            ]
+        }
+
+
+class MemoryTracker:
+    """tracemalloc-based memory accounting per endpoint, over time and per component
+
+    Three views, all read through `report()`:
+
+    * per endpoint: the traced-memory change over every request, and for
+      a `sample_rate` share of requests a snapshot before and after, whose
+      difference names the source lines that left memory allocated behind
+      the request. Only one request is snapshotted at a time; allocations
+      of concurrent requests land in the same numbers, so they are
+      indicative under load.
+    * periodic: every `snapshot_interval` seconds a background thread
+      snapshots the heap and records the sites that grew most since the
+      first snapshot and since the previous one, with the process RSS.
+    * components: `register(name, size_fn)` adds a named byte count
+      (models, caches) that is evaluated when a report is taken.
+
+    tracemalloc slows allocation-heavy code noticeably and uses memory for
+    its own bookkeeping, so it is only started (`start`) when tracking is
+    enabled. Component sizes and RSS are reported regardless.
+    """
+
+    def __init__(self, enabled: bool = False, frames: int = 1, top: int = 15, sample_rate: float = 0.01,
+                 snapshot_interval: float = 300.0, max_endpoints: int = 200):
+        self.enabled = enabled
+        self.frames = frames
+        self.top = top
+        self.sample_rate = sample_rate
+        self.snapshot_interval = snapshot_interval
+        self.max_endpoints = max_endpoints
+        self._components: Dict[str, Callable] = {}
+        self._endpoints: Dict[str, _EndpointMemory] = {}
+        self._lock = threading.Lock()
+        self._sample_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self._previous: Optional[tracemalloc.Snapshot] = None
+        self.periodic: Dict = {}
+
+    def register(self, name: str, size_fn: Callable[[], Union[int, Dict[str, int]]]) -> None:
+        """Report `size_fn()` bytes as component `name`
+
+        `size_fn` may also return a dict of sizes, reported as `name.key`.
+        """
+        self._components[name] = size_fn
+
+    def start(self) -> None:
+        """Start tracemalloc and the periodic snapshot thread (once per process)"""
+        if not self.enabled or self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start(self.frames)
+                self._thread = threading.Thread(target=self._run, name='memory-snapshots', daemon=True)
+                self._thread.start()
+
+    def before_request(self) -> Optional[Tuple]:
+        """Token to pass to `after_request`, or None when not tracking"""
+        if not self.enabled or not tracemalloc.is_tracing():
+            return None
+        snapshot = None
+        if self.sample_rate > 0 and random.random() < self.sample_rate \
+                and self._sample_lock.acquire(blocking=False):
+            try:
+                snapshot = tracemalloc.take_snapshot()
+                if hasattr(tracemalloc, 'reset_peak'):
+                    tracemalloc.reset_peak()
+            except Exception:
+                self._sample_lock.release()
+                raise
+        return tracemalloc.get_traced_memory()[0], snapshot
+
+    def after_request(self, endpoint: str, token: Optional[Tuple]) -> None:
+        if token is None:
+            return
+        start_bytes, before = token
+        current, peak = tracemalloc.get_traced_memory()
+        stats = None
+        if before is not None:
+            try:
+                stats = tracemalloc.take_snapshot().compare_to(before, 'lineno')
+            except Exception as e:
+                logger.error("Error comparing memory snapshots: %s", e)
+            finally:
+                self._sample_lock.release()
+
+        net = current - start_bytes
+        with self._lock:
+            memory = self._endpoints.get(endpoint)
+            if memory is None:
+                if len(self._endpoints) >= self.max_endpoints:
+                    return
+                memory = self._endpoints[endpoint] = _EndpointMemory()
+            memory.requests += 1
+            memory.net_bytes += net
+            memory.max_net_bytes = max(memory.max_net_bytes, net)
+            if stats is not None:
+                memory.sampled += 1
+                memory.max_peak_bytes = max(memory.max_peak_bytes, peak - start_bytes)
+                for stat in stats:
+                    if _reported(stat):
+                        site = _site(stat.traceback)
+                        memory.retained[site] += stat.size_diff
+                        memory.retained_counts[site] += stat.count_diff
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self._take_periodic()
+            except Exception as e:
+                logger.error("Error taking periodic memory snapshot: %s", e)
+            if self._stop.wait(self.snapshot_interval):
+                break
+
+    def _take_periodic(self) -> None:
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        periodic = {
+            'taken_at': time.time(),
+            'traced_bytes': current,
+            'traced_peak_bytes': peak,
+            'rss_bytes': rss_bytes()
+        }
+        if self._baseline is None:
+            self._baseline = snapshot
+            periodic['baseline_rss_bytes'] = periodic['rss_bytes']
+        else:
+            periodic['baseline_rss_bytes'] = self.periodic.get('baseline_rss_bytes')
+            periodic['growth_since_start'] = _top_sites(snapshot.compare_to(self._baseline, 'lineno'), self.top)
+            periodic['growth_last_interval'] = _top_sites(snapshot.compare_to(self._previous, 'lineno'), self.top)
+        self._previous = snapshot
+        self.periodic = periodic
+
+    def component_sizes(self) -> Dict[str, Optional[int]]:
+        sizes = {}
+        for name, size_fn in self._components.items():
+            try:
+                size = size_fn()
+            except Exception as e:
+                logger.error("Error measuring %s: %s", name, e)
+                sizes[name] = None
+                continue
+            if isinstance(size, dict):
+                sizes.update((f'{name}.{key}', int(value)) for key, value in size.items())
+            else:
+                sizes[name] = int(size)
+        return sizes
+
+    def report(self) -> Dict:
+        tracing = tracemalloc.is_tracing()
+        current, peak = tracemalloc.get_traced_memory() if tracing else (None, None)
+        with self._lock:
+            endpoints = {name: memory.to_dict(self.top) for name, memory in sorted(self._endpoints.items())}
+        return {
+            'tracemalloc': tracing,
+            'rss_bytes': rss_bytes(),
+            'traced_bytes': current,
+            'traced_peak_bytes': peak,
+            'tracemalloc_overhead_bytes': tracemalloc.get_tracemalloc_memory() if tracing else None,
+            'components': self.component_sizes(),
+            'endpoints': endpoints,
+            'periodic': self.periodic
+        }
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(5)
@@ -0,0 +1,187 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+SPECIES_MODEL_PATTERN = re.compile(r'^(?P<species>[a-z0-9_]+)_model\.pkl$')
+
+
+def species_key(species: Optional[str]) -> str:
+    """File-name form of a species name ('Guinea Pig' -> 'guinea_pig')"""
+    return (species or '').strip().lower().replace(' ', '_')
+
+
+def discover_species_models(models_dir: str) -> Dict[str, Tuple[str, str]]:
+    """Map lowercased species names to (model, scaler) paths found on disk
+
+    A species model is `<species>_model.pkl` with a matching
+    `<species>_scaler.pkl` next to it.
+    """
+    found = {}
+    try:
+        names = os.listdir(models_dir)
+    except FileNotFoundError:
+        return found
+
+    for name in names:
+        match = SPECIES_MODEL_PATTERN.match(name)
+        if not match:
+            continue
+        species = match.group('species')
+        scaler_path = os.path.join(models_dir, f'{species}_scaler.pkl')
+        if os.path.exists(scaler_path):
+            found[species] = (os.path.join(models_dir, name), scaler_path)
+    return found
+
+
+def _joblib_load(path: str):
+    # joblib (and the sklearn classes a model unpickles into) are imported on first load
+    import joblib
+    return joblib.load(path)
+
+
+def estimate_model_bytes(model, path: Optional[str] = None) -> int:
+    """Approximate in-memory size of a fitted model
+
+    Tree ensembles are measured from their node and value arrays, which
+    dominate their footprint; anything else falls back to the pickle size.
+    """
+    estimators = getattr(model, 'estimators_', None)
+    if estimators is not None:
+        total = 0
+        for estimator in estimators:
+            tree = getattr(estimator, 'tree_', None)
+            if tree is None:
+                break
+            state = tree.__getstate__()
+            total += state['nodes'].nbytes + state['values'].nbytes
+        else:
+            return total
+    return os.path.getsize(path) if path else 0
+
+
+class SpeciesModelPool:
+    """Per-species models loaded on first use and kept under a memory budget
+
+    `get` never blocks on disk: a species whose model is not resident yet
+    is scheduled for loading in the background and the caller falls back
+    to the base model until it is ready. Resident models are evicted least
+    recently used first once their estimated size exceeds `memory_budget`
+    bytes. `on_load(model)` runs in the loader thread before a model is
+    made available, for per-model precomputation.
+    """
+
+    def __init__(self, models_dir: str = 'models', memory_budget: int = 512 * 1024 * 1024,
+                 loader: Callable[[str], object] = None, max_loaders: int = 1,
+                 on_load: Optional[Callable[[object], object]] = None):
+        self.models_dir = models_dir
+        self.memory_budget = memory_budget
+        self.loader = loader or _joblib_load
+        self.on_load = on_load
+        self.available = discover_species_models(models_dir)
+        self._resident: 'OrderedDict[str, Tuple[object, object, int]]' = OrderedDict()
+        self._loading = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_loaders, thread_name_prefix='model-pool')
+        self.resident_bytes = 0
+
+        # Counters
+        self.hits = 0
+        self.fallbacks = 0
+        self.loads = 0
+        self.load_failures = 0
+        self.evictions = 0
+
+    def get(self, species: Optional[str]) -> Optional[Tuple[object, object]]:
+        """(model, scaler) for `species` if resident, else None
+
+        A miss for a species that has a model on disk starts loading it.
+        """
+        key = species_key(species)
+        if key not in self.available:
+            return None
+
+        with self._lock:
+            entry = self._resident.get(key)
+            if entry is not None:
+                self._resident.move_to_end(key)
+                self.hits += 1
+                return entry[0], entry[1]
+
+            self.fallbacks += 1
+            if key not in self._loading:
+                self._loading[key] = self._executor.submit(self._load, key)
+        return None
+
+    def peek(self, species: Optional[str]) -> Optional[Tuple[object, object]]:
+        """(model, scaler) if resident, without counting or triggering a load"""
+        entry = self._resident.get(species_key(species))
+        return None if entry is None else (entry[0], entry[1])
+
+    def wait_until_loaded(self, species: str, timeout: Optional[float] = None) -> bool:
+        """Block until a pending load of `species` finishes"""
+        future = self._loading.get(species_key(species))
+        if future is not None:
+            future.result(timeout)
+        return species_key(species) in self._resident
+
+    def close(self) -> None:
+        """Stop the loader threads and drop resident models"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            self._resident.clear()
+            self.resident_bytes = 0
+
+    def _load(self, key: str) -> None:
+        model_path, scaler_path = self.available[key]
+        try:
+            model = self.loader(model_path)
+            scaler = self.loader(scaler_path)
+            size = estimate_model_bytes(model, model_path)
+            if self.on_load is not None:
+                self.on_load(model)
+        except Exception as e:
+            logger.error("Error loading species model for %s: %s", key, e)
+            with self._lock:
+                self.load_failures += 1
+                self._loading.pop(key, None)
+            return
+
+        with self._lock:
+            self._resident[key] = (model, scaler, size)
+            self.resident_bytes += size
+            self.loads += 1
+            self._loading.pop(key, None)
+            self._evict(keep=key)
+        logger.info("Loaded species model for %s (%.1f MB)", key, size / 1024 / 1024)
+
+    def _evict(self, keep: str) -> None:
+        while self.resident_bytes > self.memory_budget and len(self._resident) > 1:
+            key = next(iter(self._resident))
+            if key == keep:
+                break
+            _, _, size = self._resident.pop(key)
+            self.resident_bytes -= size
+            self.evictions += 1
+            logger.info("Evicted species model for %s to stay within memory budget", key)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'available': sorted(self.available),
+                'resident': list(self._resident),
+                'loading': sorted(self._loading),
+                'resident_bytes': self.resident_bytes,
+                'memory_budget': self.memory_budget,
+                'hits': self.hits,
+                'fallbacks': self.fallbacks,
+                'loads': self.loads,
+                'load_failures': self.load_failures,
+                'evictions': self.evictions
+            }
@@ -0,0 +1,184 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+MODELS_DIR = 'models'
+VERSIONS_DIR = os.path.join(MODELS_DIR, 'versions')
+MANIFEST_PATH = os.path.join(MODELS_DIR, 'model_version.json')
+
+
+def _atomic_dump(obj, path: str) -> None:
+    """Write an artifact next to its destination and rename it into place"""
+    import joblib
+
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    os.close(fd)
+    try:
+        joblib.dump(obj, tmp_path)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def read_manifest(manifest_path: str = MANIFEST_PATH) -> Optional[Dict]:
+    """Read the manifest describing the currently published model version"""
+    try:
+        with open(manifest_path) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def version_dir(manifest: Optional[Dict]) -> str:
+    """Directory to load the artifacts of a manifest's version from
+
+    Versions that list their complete file set are read from their own
+    directory, so a worker never pairs files of different versions. Without
+    a manifest, or for versions published before every version directory
+    was complete, the live files are used.
+    """
+    if manifest and 'files' in manifest:
+        directory = os.path.join(VERSIONS_DIR, manifest['version'])
+        if os.path.isdir(directory):
+            return directory
+    return MODELS_DIR
+
+
+def _carried_over(manifest: Optional[Dict]) -> Dict[str, str]:
+    """Files of the current version (name -> path) to carry into the next one"""
+    directory = version_dir(manifest)
+    if directory != MODELS_DIR:
+        names = manifest['files']
+    else:
+        try:
+            names = [name for name in os.listdir(MODELS_DIR) if name.endswith('.pkl')]
+        except FileNotFoundError:
+            names = []
+    return {name: os.path.join(directory, name) for name in names
+            if os.path.isfile(os.path.join(directory, name))}
+
+
+def prune_versions(keep: int, current: str) -> None:
+    """Delete all but the `keep` newest version directories (never `current`)"""
+    try:
+        names = sorted(name for name in os.listdir(VERSIONS_DIR)
+                       if os.path.isdir(os.path.join(VERSIONS_DIR, name)))
+    except FileNotFoundError:
+        return
+    for name in names[:-max(keep, 1)]:
+        if name != current:
+            # Files shared with newer versions are hard links and survive
+            shutil.rmtree(os.path.join(VERSIONS_DIR, name), ignore_errors=True)
+            logger.info("Pruned model version %s", name)
+
+
+def publish_models(artifacts: Dict[str, object], metadata: Optional[Dict] = None,
+                   manifest_path: str = MANIFEST_PATH, drop: Iterable[str] = (),
+                   keep_versions: int = 10) -> str:
+    """Version a set of artifacts and atomically swap them in as the live models
+
+    `artifacts` maps live paths (e.g. 'models/health_analysis_model.pkl') to
+    the objects to store there. Each artifact is written to a new versions
+    directory, which also gets (hard links to) every other file of the
+    current version except the live paths in `drop`, so it holds a complete
+    set that workers load from. The live paths are then replaced with
+    os.replace (and dropped files removed) for tools that read them
+    directly, and the manifest is rewritten last, so readers watching the
+    manifest never observe a half-published version. Only the
+    `keep_versions` newest version directories are kept.
+    """
+    version = datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')
+    target_dir = os.path.join(VERSIONS_DIR, version)
+    os.makedirs(target_dir, exist_ok=True)
+
+    for live_path, obj in artifacts.items():
+        _atomic_dump(obj, os.path.join(target_dir, os.path.basename(live_path)))
+    drop = [live_path for live_path in drop if live_path not in artifacts]
+    excluded = {os.path.basename(live_path) for live_path in list(artifacts) + drop}
+    for name, path in _carried_over(read_manifest(manifest_path)).items():
+        if name not in excluded:
+            try:
+                os.link(path, os.path.join(target_dir, name))
+            except OSError:
+                shutil.copy2(path, os.path.join(target_dir, name))
+    for live_path, obj in artifacts.items():
+        _atomic_dump(obj, live_path)
+    for live_path in drop:
+        if os.path.exists(live_path):
+            os.remove(live_path)
+
+    manifest = {
+        'version': version,
+        'published_at': datetime.utcnow().isoformat(),
+        'artifacts': sorted(artifacts.keys()),
+        'files': sorted(os.listdir(target_dir)),
+        'metadata': metadata or {}
+    }
+    directory = os.path.dirname(manifest_path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(manifest, f, indent=4)
+    os.replace(tmp_path, manifest_path)
+
+    logger.info("Published model version %s", version)
+    prune_versions(keep_versions, version)
+    return version
+
+
+class ModelWatcher:
+    """Detects newly published model versions so workers can hot-swap them"""
+
+    def __init__(self, manifest_path: str = MANIFEST_PATH, check_interval: float = 5.0):
+        self.manifest_path = manifest_path
+        self.check_interval = check_interval
+        self.current_version = None
+        self._last_mtime = None
+        self._published_version = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+
+    def poll(self, now: float) -> Optional[str]:
+        """Return the published version if it is not the loaded one
+
+        Checked at most every `check_interval` seconds. The manifest is
+        only re-read when it changed, but a version that failed to load
+        (`mark_loaded` was not called) is returned again on the next check.
+        """
+        if now - self._last_check < self.check_interval:
+            return None
+
+        with self._lock:
+            if now - self._last_check < self.check_interval:
+                return None
+            self._last_check = now
+
+            try:
+                mtime = os.stat(self.manifest_path).st_mtime_ns
+            except FileNotFoundError:
+                return None
+            if mtime != self._last_mtime:
+                manifest = read_manifest(self.manifest_path)
+                if manifest is None:
+                    return None  # being rewritten; read it on the next check
+                self._last_mtime = mtime
+                self._published_version = manifest.get('version')
+
+            if self._published_version is None or self._published_version == self.current_version:
+                return None
+            return self._published_version
+
+    def mark_loaded(self, version: Optional[str]) -> None:
+        """Record the version a worker has finished loading"""
+        self.current_version = version
@@ -1,12 +1,6 @@
-import joblib
 import json
 import numpy as np
 import pandas as pd
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, confusion_matrix
-from sklearn.model_selection import cross_val_score
-from sklearn.preprocessing import LabelEncoder
-import xgboost as xgb
 from config import *
 import logging
 
@@ -15,6 +9,12 @@ logger = logging.getLogger(__name__)
 class ModelTrainer:
     def __init__(self):
         try:
+            # Imported here: scikit-learn and xgboost are only needed once a
+            # trainer is created
+            import xgboost as xgb
+            from sklearn.ensemble import RandomForestClassifier
+            from sklearn.preprocessing import LabelEncoder
+
             self.rf_model = RandomForestClassifier(
                 n_estimators=100,
                 max_depth=10,
@@ -29,12 +29,16 @@ class ModelTrainer:
             self.best_model = None
             self.species_specific_models = {}
             self.label_encoder = LabelEncoder()
+            self.feature_encoder = None
         except Exception as e:
-            logger.error(f"Error initializing ModelTrainer: {str(e)}")
+            logger.error("Error initializing ModelTrainer: %s", e)
             raise
         
     def train(self, X_train, y_train):
         """Train multiple models and select the best one"""
+        from sklearn.ensemble import RandomForestClassifier
+        from sklearn.model_selection import cross_val_score
+
         # Convert X_train to DataFrame if it's not already
         if not isinstance(X_train, pd.DataFrame):
             X_train = pd.DataFrame(X_train)
@@ -101,11 +105,13 @@ class ModelTrainer:
                 # Use best general model
                 return self.best_model.predict(X)
         except Exception as e:
-            logger.error(f"Error in prediction: {str(e)}")
+            logger.error("Error in prediction: %s", e)
             raise
     
     def evaluate(self, X_test, y_test):
         """Evaluate the model and save detailed metrics"""
+        from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, confusion_matrix
+
         # Convert X_test to DataFrame if it's not already
         if not isinstance(X_test, pd.DataFrame):
             X_test = pd.DataFrame(X_test)
@@ -157,18 +163,33 @@ class ModelTrainer:
             
         return metrics
     
-    def save_model(self):
+    def save_model(self, feature_encoder=None, path=MODEL_PATH):
         """Save all models and encoders"""
+        import joblib
+
+        if feature_encoder is not None:
+            self.feature_encoder = feature_encoder
         models = {
             'best_model': self.best_model,
             'species_models': self.species_specific_models,
-            'label_encoder': self.label_encoder
+            'label_encoder': self.label_encoder,
+            'feature_encoder': self.feature_encoder
         }
-        joblib.dump(models, MODEL_PATH)
+        joblib.dump(models, path)
     
-    def load_model(self):
+    def load_model(self, path=MODEL_PATH):
         """Load all models and encoders"""
-        models = joblib.load(MODEL_PATH)
+        import joblib
+
+        models = joblib.load(path)
         self.best_model = models['best_model']
         self.species_specific_models = models['species_models']
-        self.label_encoder = models['label_encoder']
\ No newline at end of file
+        self.label_encoder = models['label_encoder']
+        self.feature_encoder = models.get('feature_encoder')
+
+    def data_processor(self):
+        """DataProcessor that encodes with the vocabularies the loaded models were trained on"""
+        if self.feature_encoder is None:
+            raise ValueError("No feature encoder saved with the model. Please retrain the model.")
+        from utils.data_processor import DataProcessor
+        return DataProcessor(feature_encoder=self.feature_encoder)
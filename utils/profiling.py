@@ -0,0 +1,207 @@
+import contextvars
+import cProfile
+import io
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+_active_profile: contextvars.ContextVar = contextvars.ContextVar('active_profile', default=None)
+# One profiled request at a time per process (see RequestProfile)
+_profile_lock = threading.Lock()
+
+
+class RequestProfile:
+    """Deterministic (cProfile) profile of one request
+
+    The request thread is profiled while the `with` block runs. Only one
+    profiler can be active at a time on Python 3.12+ (cProfile is built on
+    sys.monitoring), so work is not profiled in other threads: code that
+    would hand work to a pool checks `active()` and runs it in the request
+    thread instead. For the same reason concurrent profiled requests wait
+    for each other.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.profile_id = f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}-{os.getpid()}-{name}"
+        self._token = None
+        self._profile: Optional[cProfile.Profile] = None
+
+    def __enter__(self):
+        _profile_lock.acquire()
+        try:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        except Exception:
+            _profile_lock.release()
+            raise
+        self._token = _active_profile.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._profile.disable()
+        _active_profile.reset(self._token)
+        _profile_lock.release()
+        return False
+
+    def stats(self) -> pstats.Stats:
+        return pstats.Stats(self._profile)
+
+    def save(self, directory: str, top: int = 40) -> str:
+        """Write `<id>.prof` (for snakeviz/pstats) and a `<id>.txt` summary; returns the .prof path"""
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'{self.profile_id}.prof')
+        stats = self.stats()
+        stats.dump_stats(path)
+        summary = io.StringIO()
+        stats.stream = summary
+        stats.sort_stats('cumulative').print_stats(top)
+        with open(path[:-len('.prof')] + '.txt', 'w') as f:
+            f.write(summary.getvalue())
+        return path
+
+
+def active() -> Optional[RequestProfile]:
+    """The profile of the current request, if it is being profiled"""
+    return _active_profile.get()
+
+
+# Leaf frames of threads that are waiting rather than working
+IDLE_FRAMES = {
+    ('threading.py', 'wait'), ('threading.py', '_wait_for_tstate_lock'), ('queue.py', 'get'),
+    ('selectors.py', 'select'), ('socket.py', 'accept'), ('socketserver.py', 'serve_forever'),
+    ('thread.py', '_worker')
+}
+
+
+class SamplingProfiler:
+    """Always-on statistical profiler writing collapsed stacks per time window
+
+    A daemon thread samples the Python stack of every other thread `hz`
+    times a second and counts identical stacks. Every `window` seconds the
+    counts are written to `<directory>/stacks-<start>-<pid>.collapsed` in
+    the folded format flame graph tools read (`frame;frame;frame count`,
+    outermost frame first, the thread name as the root). Threads idling in
+    a wait are not counted. Files older than `max_files` windows are
+    deleted, whichever process wrote them, so files left by restarted
+    workers are pruned too.
+    """
+
+    def __init__(self, directory: str, hz: float = 100.0, window: float = 60.0, max_files: int = 60):
+        self.directory = directory
+        self.interval = 1.0 / hz
+        self.window = window
+        self.max_files = max_files
+        self.samples = 0
+        self.sample_seconds = 0.0
+        self._labels: Dict = {}
+        self._stop = threading.Event()
+        self._start_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def ensure_started(self) -> None:
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    os.makedirs(self.directory, exist_ok=True)
+                    self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+                    self._thread.start()
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+            self._labels[code] = label
+        return label
+
+    @staticmethod
+    def _thread_names() -> Dict[int, str]:
+        return {thread.ident: thread.name.replace(';', '_').replace(' ', '_') for thread in threading.enumerate()}
+
+    def _sample(self, counts: Counter, names: Dict[int, str]) -> None:
+        own = threading.get_ident()
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            if ident not in names:
+                names.update(self._thread_names())
+            code = frame.f_code
+            if (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(self._label(frame.f_code))
+                frame = frame.f_back
+            stack.append(names.get(ident, 'thread'))
+            counts[';'.join(reversed(stack))] += 1
+
+    def _run(self) -> None:
+        counts: Counter = Counter()
+        window_start = time.time()
+        next_sample = time.perf_counter()
+        names: Dict[int, str] = {}
+        while not self._stop.is_set():
+            start = time.perf_counter()
+            try:
+                self._sample(counts, names)
+            except Exception as e:
+                logger.error("Error sampling stacks: %s", e)
+            self.samples += 1
+            self.sample_seconds += time.perf_counter() - start
+
+            if time.time() - window_start >= self.window:
+                self._write(counts, window_start)
+                # Thread ids are reused, so names are looked up afresh each window
+                counts, window_start, names = Counter(), time.time(), {}
+
+            next_sample += self.interval
+            delay = next_sample - time.perf_counter()
+            if delay > 0:
+                self._stop.wait(delay)
+            else:
+                next_sample = time.perf_counter()
+        self._write(counts, window_start)
+
+    def _write(self, counts: Counter, window_start: float) -> None:
+        if not counts:
+            return
+        started = datetime.utcfromtimestamp(window_start).strftime('%Y%m%dT%H%M%S')
+        path = os.path.join(self.directory, f'stacks-{started}-{os.getpid()}.collapsed')
+        try:
+            with open(path, 'w') as f:
+                for stack, count in counts.most_common():
+                    f.write(f'{stack} {count}\n')
+            self._prune(time.time() - self.max_files * self.window)
+        except OSError as e:
+            logger.error("Error writing stack samples: %s", e)
+
+    def _prune(self, cutoff: float) -> None:
+        """Delete stack files last written before `cutoff`, from any process"""
+        for name in os.listdir(self.directory):
+            if not (name.startswith('stacks-') and name.endswith('.collapsed')):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except FileNotFoundError:
+                pass  # pruned by another worker meanwhile
+
+    def stats(self) -> Dict:
+        return {
+            'samples': self.samples,
+            'overhead_ms_per_sample': round(self.sample_seconds / self.samples * 1000, 3) if self.samples else None
+        }
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(5)
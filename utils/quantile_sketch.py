@@ -0,0 +1,144 @@
+import math
+import random
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+
+class KLLSketch:
+    """Mergeable streaming quantile sketch (Karnin, Lang and Liberty 2016)
+
+    Items are kept in a stack of compactors; an item at level h stands for
+    2**h stream items. When the sketch exceeds its capacity, the lowest
+    full compactor sorts its items and promotes every other one (random
+    offset) to the next level. Memory is O(k log(n / k)) items, and a rank
+    or quantile is within about 1.7 / k of the exact one with high
+    probability. Sketches with the same `k` merge by concatenating levels.
+    """
+
+    def __init__(self, k: int = 200, c: float = 2 / 3, seed: Optional[int] = None):
+        self.k = k
+        self.c = c
+        self.compactors: List[List[float]] = [[]]
+        self.n = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self._random = random.Random(seed)
+        self._size = 0
+        self._max_size = self._capacity(0)
+        self._cdf = None
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.compactors) - level - 1
+        return max(2, int(math.ceil(self.k * self.c ** depth)))
+
+    def _grow(self) -> None:
+        self.compactors.append([])
+        self._max_size = sum(self._capacity(h) for h in range(len(self.compactors)))
+
+    def update(self, value: float) -> None:
+        value = float(value)
+        self.compactors[0].append(value)
+        self.n += 1
+        self._size += 1
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        self._cdf = None
+        if self._size >= self._max_size:
+            self._compress()
+
+    def update_many(self, values: Iterable[float]) -> None:
+        for value in values:
+            self.update(value)
+
+    def _compress(self) -> None:
+        while self._size >= self._max_size:
+            for level, items in enumerate(self.compactors):
+                if len(items) >= self._capacity(level):
+                    if level + 1 == len(self.compactors):
+                        self._grow()
+                    items.sort()
+                    even = len(items) - len(items) % 2
+                    promoted = items[self._random.random() < 0.5:even:2]
+                    self.compactors[level + 1].extend(promoted)
+                    self.compactors[level] = items[even:]
+                    self._size -= even - len(promoted)
+                    break
+            else:
+                break
+
+    def merge(self, other: 'KLLSketch') -> 'KLLSketch':
+        """Add another sketch's items to this one (in place)"""
+        if other.n == 0:
+            return self
+        while len(self.compactors) < len(other.compactors):
+            self._grow()
+        for level, items in enumerate(other.compactors):
+            self.compactors[level].extend(items)
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._size = sum(len(items) for items in self.compactors)
+        self._cdf = None
+        self._compress()
+        return self
+
+    def _weighted_items(self):
+        if self._cdf is None:
+            values = np.concatenate([np.asarray(items, dtype=float) for items in self.compactors])
+            weights = np.concatenate([np.full(len(items), 2 ** level, dtype=float)
+                                      for level, items in enumerate(self.compactors)])
+            order = np.argsort(values, kind='stable')
+            self._cdf = (values[order], np.cumsum(weights[order]))
+        return self._cdf
+
+    def weight_at_most(self, value: float) -> float:
+        """Estimated number of stream items <= value"""
+        values, cumulative = self._weighted_items()
+        i = np.searchsorted(values, value, side='right')
+        return float(cumulative[i - 1]) if i else 0.0
+
+    def weight_below(self, value: float) -> float:
+        """Estimated number of stream items < value"""
+        values, cumulative = self._weighted_items()
+        i = np.searchsorted(values, value, side='left')
+        return float(cumulative[i - 1]) if i else 0.0
+
+    def total_weight(self) -> float:
+        values, cumulative = self._weighted_items()
+        return float(cumulative[-1]) if len(cumulative) else 0.0
+
+    def rank(self, value: float) -> float:
+        """Estimated fraction of stream items <= value"""
+        total = self.total_weight()
+        return self.weight_at_most(value) / total if total else math.nan
+
+    def quantile(self, q: float) -> float:
+        values, cumulative = self._weighted_items()
+        if not len(values):
+            return math.nan
+        i = np.searchsorted(cumulative, q * cumulative[-1], side='left')
+        return float(values[min(i, len(values) - 1)])
+
+    def __len__(self) -> int:
+        return self._size
+
+    def to_dict(self) -> Dict:
+        return {
+            'k': self.k, 'c': self.c, 'n': self.n,
+            'min': self.min if self.n else None, 'max': self.max if self.n else None,
+            'compactors': [list(items) for items in self.compactors]
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> 'KLLSketch':
+        sketch = cls(k=state['k'], c=state.get('c', 2 / 3))
+        sketch.compactors = [list(items) for items in state['compactors']] or [[]]
+        sketch.n = state['n']
+        sketch.min = state['min'] if state.get('min') is not None else math.inf
+        sketch.max = state['max'] if state.get('max') is not None else -math.inf
+        sketch._size = sum(len(items) for items in sketch.compactors)
+        sketch._max_size = sum(sketch._capacity(h) for h in range(len(sketch.compactors)))
+        return sketch
@@ -0,0 +1,60 @@
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+# Modules the app must not import at startup: they are loaded on first use
+HEAVY_MODULES = ('sklearn', 'scipy', 'pandas', 'joblib', 'xgboost')
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$')
+
+
+def parse_importtime(output: str) -> List[Dict]:
+    """Entries of `python -X importtime` output: module, depth, self and cumulative microseconds"""
+    entries = []
+    for line in output.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            entries.append({
+                'module': match.group(4),
+                'depth': len(match.group(3)) // 2,
+                'self_us': int(match.group(1)),
+                'cumulative_us': int(match.group(2))
+            })
+    return entries
+
+
+def import_report(module: str = 'app', top: int = 25, env: Optional[Dict[str, str]] = None) -> Dict:
+    """Import `module` in a fresh interpreter under `-X importtime` and summarize it
+
+    Returns the total import time, the `top` slowest modules by cumulative
+    time, self time per top-level package, and which HEAVY_MODULES ended up
+    imported.
+    """
+    code = f"import sys, {module}; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=REPO_DIR,
+                            env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"importing {module} failed:\n{result.stderr[-2000:]}")
+    entries = parse_importtime(result.stderr)
+
+    packages: Dict[str, int] = defaultdict(int)
+    for entry in entries:
+        packages[entry['module'].split('.')[0]] += entry['self_us']
+    # Top-level entries are imported directly by the interpreter or by `module`
+    total_us = sum(entry['cumulative_us'] for entry in entries if entry['depth'] == 0)
+    return {
+        'module': module,
+        'total_ms': total_us / 1000,
+        'slowest': [
+            {'module': entry['module'], 'cumulative_ms': entry['cumulative_us'] / 1000,
+             'self_ms': entry['self_us'] / 1000}
+            for entry in sorted(entries, key=lambda entry: entry['cumulative_us'], reverse=True)[:top]
+        ],
+        'packages_ms': {name: us / 1000 for name, us in sorted(packages.items(), key=lambda item: -item[1])[:top]},
+        'heavy_modules': [name for name in result.stdout.strip().split(',') if name]
+    }
@@ -0,0 +1,325 @@
+import atexit
+import contextvars
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# OTLP span kinds and status codes
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+STATUS_ERROR = 2
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar('current_span', default=None)
+
+
+class _NoopSpan:
+    """Stands in for a span when the request is not sampled"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set_attribute(self, key: str, value) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class _Trace:
+    """Spans of one sampled request, exported together when the root span ends"""
+
+    def __init__(self, trace_id: str, exporter: 'FileSpanExporter'):
+        self.trace_id = trace_id
+        self.exporter = exporter
+        self.spans: List['Span'] = []
+        self.exported = False
+        self.lock = threading.Lock()
+
+    def finish(self, span: 'Span') -> None:
+        with self.lock:
+            if self.exported:
+                # A pool stage that outlived its request (timed out)
+                self.exporter.export([span])
+                return
+            self.spans.append(span)
+            if span.is_root:
+                self.exported = True
+                self.exporter.export(self.spans)
+
+
+class Span:
+    """A timed operation within a trace; use as a context manager"""
+
+    __slots__ = ('trace', 'span_id', 'parent_id', 'name', 'kind', 'attributes', 'start_ns', 'end_ns',
+                 'error', 'is_root', '_token')
+
+    def __init__(self, trace: _Trace, name: str, parent_id: Optional[str], kind: int = SPAN_KIND_INTERNAL,
+                 attributes: Optional[Dict] = None, is_root: bool = False):
+        self.trace = trace
+        self.span_id = '%016x' % random.getrandbits(64)
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes or {}
+        self.start_ns = 0
+        self.end_ns = 0
+        self.error: Optional[str] = None
+        self.is_root = is_root
+        self._token = None
+
+    def set_attribute(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    def __enter__(self):
+        self.start_ns = time.time_ns()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end_ns = time.time_ns()
+        if exc is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        _current_span.reset(self._token)
+        self.trace.finish(self)
+        return False
+
+
+def span(name: str, **attributes):
+    """Child span of the current span, or a no-op outside a sampled trace"""
+    parent = _current_span.get()
+    if parent is None:
+        return NOOP_SPAN
+    return Span(parent.trace, name, parent.span_id, attributes=attributes)
+
+
+def active() -> bool:
+    """Whether the caller is inside a sampled trace"""
+    return _current_span.get() is not None
+
+
+def set_attribute(key: str, value) -> None:
+    """Set an attribute on the current span, if any"""
+    current = _current_span.get()
+    if current is not None:
+        current.attributes[key] = value
+
+
+def current_trace_id() -> Optional[str]:
+    current = _current_span.get()
+    return current.trace.trace_id if current is not None else None
+
+
+def parse_traceparent(header: str):
+    """(trace id, parent span id) of a sampled W3C traceparent header, else (None, None)"""
+    parts = header.strip().split('-')
+    # version-traceid-parentid-flags; sampled when bit 0 of flags is set
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None, None
+    try:
+        sampled = int(parts[3], 16) & 1
+        int(parts[1], 16), int(parts[2], 16)
+    except ValueError:
+        return None, None
+    return (parts[1], parts[2]) if sampled else (None, None)
+
+
+def _otlp_value(value) -> Dict:
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def _otlp_span(span: Span) -> Dict:
+    entry = {
+        'traceId': span.trace.trace_id,
+        'spanId': span.span_id,
+        'name': span.name,
+        'kind': span.kind,
+        'startTimeUnixNano': str(span.start_ns),
+        'endTimeUnixNano': str(span.end_ns),
+        'attributes': [{'key': key, 'value': _otlp_value(value)} for key, value in span.attributes.items()
+                       if value is not None],
+        'status': {'code': STATUS_ERROR, 'message': span.error} if span.error else {}
+    }
+    if span.parent_id:
+        entry['parentSpanId'] = span.parent_id
+    return entry
+
+
+class FileSpanExporter:
+    """Writes finished traces as OTLP/JSON lines to size-rotated files
+
+    Each line is one ExportTraceServiceRequest, the format of the
+    OpenTelemetry collector's file exporter, so the files can be replayed
+    into any OTLP viewer. Serialization and writes happen on a background
+    thread; if it falls behind, traces are dropped and counted. The newest
+    `max_files` files are kept across all processes writing to the
+    directory; the file a running process still writes to is never deleted.
+    """
+
+    def __init__(self, directory: str, service_name: str = 'vetcare', max_file_bytes: int = 32 * 1024 * 1024,
+                 max_files: int = 10, max_queue: int = 1000):
+        self.directory = directory
+        self.max_file_bytes = max_file_bytes
+        self.max_files = max_files
+        self.service_name = service_name
+        # Built when the exporter starts, in the worker: the exporter is
+        # created at import, before gunicorn forks
+        self.resource: Optional[Dict] = None
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._file = None
+        self._path: Optional[str] = None
+        self.exported = 0
+        self.dropped = 0
+
+    def _ensure_started(self) -> None:
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    os.makedirs(self.directory, exist_ok=True)
+                    self.resource = {'attributes': [
+                        {'key': 'service.name', 'value': {'stringValue': self.service_name}},
+                        {'key': 'process.pid', 'value': {'intValue': str(os.getpid())}}
+                    ]}
+                    self._thread = threading.Thread(target=self._run, name='trace-exporter', daemon=True)
+                    self._thread.start()
+                    atexit.register(self.close)
+
+    def export(self, spans: List[Span]) -> None:
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(list(spans))
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        while True:
+            spans = self._queue.get()
+            if spans is None:
+                break
+            try:
+                self._write(spans)
+            except Exception as e:
+                logger.error("Error exporting %s spans: %s", len(spans), e)
+        if self._file is not None:
+            self._file.close()
+
+    def _write(self, spans: List[Span]) -> None:
+        if self._file is None or self._file.tell() >= self.max_file_bytes:
+            self._rotate()
+        request = {'resourceSpans': [{
+            'resource': self.resource,
+            'scopeSpans': [{'scope': {'name': __name__}, 'spans': [_otlp_span(span) for span in spans]}]
+        }]}
+        self._file.write(json.dumps(request) + '\n')
+        self._file.flush()
+        self.exported += len(spans)
+
+    def _rotate(self) -> None:
+        if self._file is not None:
+            self._file.close()
+        name = f"traces-{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}-{os.getpid()}.jsonl"
+        self._path = os.path.join(self.directory, name)
+        self._file = open(self._path, 'a')
+        self._prune()
+
+    @staticmethod
+    def _pid_running(pid: int) -> bool:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except OSError:
+            return True  # exists, owned by another user
+        return True
+
+    def _prune(self) -> None:
+        """Delete all but the newest `max_files` trace files of any process
+
+        Names start with their creation time, so they sort oldest first.
+        Each running process's newest file may still be open for writing
+        and is kept.
+        """
+        names = sorted(name for name in os.listdir(self.directory)
+                       if name.startswith('traces-') and name.endswith('.jsonl'))
+        newest = {}
+        for name in names:
+            newest[name[:-len('.jsonl')].rsplit('-', 1)[-1]] = name
+        for old in names[:-self.max_files]:
+            pid = old[:-len('.jsonl')].rsplit('-', 1)[-1]
+            if newest[pid] == old and pid.isdigit() and self._pid_running(int(pid)):
+                continue
+            try:
+                os.remove(os.path.join(self.directory, old))
+            except FileNotFoundError:
+                pass  # pruned by another worker meanwhile
+
+    def close(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(5)
+
+
+class Tracer:
+    """Starts request traces, sampling `sample_rate` of them
+
+    With `follow_parent`, a request carrying a W3C `traceparent` header
+    with the sampled flag joins that trace and is always recorded.
+    Unsampled requests get NOOP_SPAN, and every `span()` inside them costs
+    one context variable lookup.
+    """
+
+    def __init__(self, sample_rate: float = 0.0, exporter: Optional[FileSpanExporter] = None,
+                 follow_parent: bool = False):
+        self.sample_rate = sample_rate
+        self.exporter = exporter
+        self.follow_parent = follow_parent
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def start_trace(self, name: str, traceparent: Optional[str] = None, **attributes):
+        """Root span for a request, or NOOP_SPAN when it is not sampled"""
+        if self.exporter is None:
+            return NOOP_SPAN
+        trace_id, parent_id = None, None
+        if traceparent and self.follow_parent:
+            trace_id, parent_id = parse_traceparent(traceparent)
+        if trace_id is None:
+            if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+                return NOOP_SPAN
+            trace_id = '%032x' % random.getrandbits(128)
+        return Span(_Trace(trace_id, self.exporter), name, parent_id, kind=SPAN_KIND_SERVER,
+                    attributes=attributes, is_root=True)
+
+
+tracer = Tracer()
+
+
+def configure_tracing(sample_rate: float, directory: str, max_file_bytes: int, max_files: int,
+                      follow_parent: bool = False) -> Tracer:
+    """Set up the module tracer; tracing stays off unless something can be sampled"""
+    tracer.sample_rate = sample_rate
+    tracer.follow_parent = follow_parent
+    tracer.exporter = None
+    if sample_rate > 0 or follow_parent:
+        tracer.exporter = FileSpanExporter(directory, max_file_bytes=max_file_bytes, max_files=max_files)
+    return tracer
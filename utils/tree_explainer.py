@@ -0,0 +1,136 @@
+from typing import Tuple
+
+import numpy as np
+from scipy import sparse
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ForestExplainer:
+    """Per-prediction feature contributions for a random forest classifier
+
+    Uses the treeinterpreter decomposition. The probability a tree assigns
+    is its root value plus the value change of every split on the path to
+    the leaf, credited to that split's feature. These value deltas are
+    summed along each root-to-leaf path once, at construction time. Each
+    leaf's total per (feature, class) goes into a sparse
+    (leaves x features*classes) matrix.
+
+    Explaining a batch then costs one `apply` per tree (the traversal
+    predict_proba does too) and two sparse products: one for the
+    probabilities and one for the contributions. Calling the trees
+    directly also avoids the forest's per-call dispatch overhead, so
+    explanations cost no more than predict_proba.
+
+    The explainer keeps the trees but not the forest object, so it can be
+    cached in a WeakKeyDictionary keyed by the model.
+    """
+
+    # Upper bound on the dense per-node path buffer (floats) built at once
+    CHUNK_FLOATS = 4_000_000
+
+    def __init__(self, forest):
+        self.trees = [estimator.tree_ for estimator in forest.estimators_]
+        n_trees = len(self.trees)
+        self.n_features = forest.n_features_in_
+        self.n_classes = len(forest.classes_)
+        width = self.n_features * self.n_classes
+
+        self.bias = np.zeros(self.n_classes)
+        leaf_lookups, path_rows, leaf_value_rows = [], [], []
+        self.n_leaves = 0
+
+        start = 0
+        while start < n_trees:
+            # Process as many trees together as fit in the path buffer
+            end, nodes = start, 0
+            while end < n_trees and (end == start or (nodes + self.trees[end].node_count) * width <= self.CHUNK_FLOATS):
+                nodes += self.trees[end].node_count
+                end += 1
+            lookups, paths, values = self._leaf_paths(self.trees[start:end])
+            leaf_lookups.extend(lookups)
+            path_rows.append(paths)
+            leaf_value_rows.append(values)
+            start = end
+
+        self.bias /= n_trees
+        self._leaf_lookups = leaf_lookups
+        self.leaf_paths = sparse.vstack(path_rows, format='csr') / n_trees
+        self.leaf_values = np.vstack(leaf_value_rows) / n_trees
+
+    def _leaf_paths(self, trees):
+        """Leaf lookups, summed path deltas and values for a group of trees
+
+        The trees' nodes are laid out back to back so every tree level of
+        the whole group is processed with a few array operations.
+        """
+        n_classes = self.n_classes
+        counts = np.array([tree.node_count for tree in trees])
+        offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+        value = np.concatenate([tree.value[:, 0, :] for tree in trees])
+        value = value / value.sum(axis=1, keepdims=True)
+        feature = np.concatenate([tree.feature for tree in trees])
+        left = np.concatenate([tree.children_left for tree in trees])
+        right = np.concatenate([tree.children_right for tree in trees])
+        internal = left != -1
+        shift = np.repeat(offsets, counts)
+        left = np.where(internal, left + shift, -1)
+        right = np.where(internal, right + shift, -1)
+
+        # Accumulate each path's deltas one level at a time, all trees at once
+        path = np.zeros((counts.sum(), self.n_features * n_classes))
+        class_index = np.arange(n_classes)
+        parents = offsets[internal[offsets]]
+        while len(parents):
+            columns = feature[parents][:, None] * n_classes + class_index
+            for children in (left[parents], right[parents]):
+                path[children] = path[parents]
+                path[children[:, None], columns] += value[children] - value[parents]
+            next_level = np.concatenate((left[parents], right[parents]))
+            parents = next_level[internal[next_level]]
+
+        leaves = np.nonzero(~internal)[0]
+        lookup = np.full(len(left), -1, dtype=np.int64)
+        lookup[leaves] = self.n_leaves + np.arange(len(leaves))
+        self.n_leaves += len(leaves)
+        self.bias += value[offsets].sum(axis=0)
+
+        lookups = [lookup[offset:offset + count] for offset, count in zip(offsets, counts)]
+        return lookups, sparse.csr_matrix(path[leaves]), value[leaves]
+
+    def _leaf_indicator(self, X: np.ndarray) -> sparse.csr_matrix:
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n_rows, n_trees = len(X), len(self.trees)
+        leaves = np.empty((n_rows, n_trees), dtype=np.int64)
+        for t, (tree, lookup) in enumerate(zip(self.trees, self._leaf_lookups)):
+            leaves[:, t] = lookup[tree.apply(X)]
+        return sparse.csr_matrix(
+            (np.ones(leaves.size), leaves.ravel(), np.arange(0, leaves.size + 1, n_trees)),
+            shape=(n_rows, self.n_leaves)
+        )
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        return self._leaf_indicator(X) @ self.leaf_values
+
+    def explain(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Class probabilities (n, classes) and contributions (n, features, classes)
+
+        For every row, `bias + contributions.sum(axis=1)` equals the
+        probabilities up to floating point rounding.
+        """
+        indicator = self._leaf_indicator(X)
+        probabilities = indicator @ self.leaf_values
+        contributions = (indicator @ self.leaf_paths).toarray()
+        return probabilities, contributions.reshape(len(X), self.n_features, self.n_classes)
+
+
+def can_explain(model) -> bool:
+    """Whether `model` is a single-output forest of decision tree classifiers"""
+    estimators = getattr(model, 'estimators_', None)
+    return (
+        estimators is not None and len(estimators) > 0 and hasattr(model, 'classes_')
+        and getattr(estimators[0], 'tree_', None) is not None
+        and getattr(model, 'n_outputs_', 1) == 1
+    )
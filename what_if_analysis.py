@@ -0,0 +1,82 @@
+import logging
+from typing import Dict, List, Tuple
+import numpy as np
+from species_config import get_species_config
+from species_metrics import health_statuses
+from prediction_pipeline import metrics_analyzer
+
+logger = logging.getLogger(__name__)
+
+MAX_SWEEP_FIELDS = 2
+
+def sweep_fields(species_config: Dict) -> List[str]:
+    """Record fields a what-if sweep can vary for a species"""
+    return list(species_config.get('vital_signs', {})) + ['Weight', 'Age']
+
+def _sweep_values(field: str, spec, max_points: int) -> np.ndarray:
+    """Values to sweep a field over: a list, or {'start', 'stop', 'points'}"""
+    if isinstance(spec, list):
+        values = np.array(spec, dtype=float)
+    elif isinstance(spec, dict) and {'start', 'stop'} <= set(spec):
+        points = int(spec.get('points', 50))
+        if points > max_points:
+            raise ValueError(f"Sweep for {field} has {points} points, at most {max_points} are allowed")
+        values = np.linspace(float(spec['start']), float(spec['stop']), points)
+    else:
+        raise ValueError(f"Sweep for {field} must be a list of values or have start, stop and points")
+    if values.ndim != 1 or len(values) == 0:
+        raise ValueError(f"Sweep for {field} has no values")
+    if not np.all(np.isfinite(values)):
+        raise ValueError(f"Sweep for {field} has non-numeric values")
+    return values
+
+def parse_sweep(sweep: Dict, species_config: Dict, max_points: int) -> List[Tuple[str, np.ndarray]]:
+    """Validate the requested sweep and return (field, values) pairs"""
+    if not isinstance(sweep, dict) or not sweep:
+        raise ValueError("sweep must map one or two fields to their values")
+    if len(sweep) > MAX_SWEEP_FIELDS:
+        raise ValueError(f"At most {MAX_SWEEP_FIELDS} fields can be swept at once")
+
+    allowed = {field.lower(): field for field in sweep_fields(species_config)}
+    parsed = []
+    for name, spec in sweep.items():
+        field = allowed.get(str(name).lower())
+        if field is None:
+            raise ValueError(f"Cannot sweep {name}; sweepable fields are {', '.join(allowed.values())}")
+        parsed.append((field, _sweep_values(field, spec, max_points)))
+
+    points = int(np.prod([len(values) for _, values in parsed]))
+    if points > max_points:
+        raise ValueError(f"Sweep has {points} points, at most {max_points} are allowed")
+    return parsed
+
+def what_if(record: Dict, sweep: Dict, max_points: int) -> Dict:
+    """Health score and status over a sweep of one or two fields
+
+    One field gives a curve, two give a grid with the first field along
+    the rows. All points are scored in a single vectorized pass.
+    """
+    species = record.get('Species')
+    if not species:
+        raise ValueError("Species is required")
+    species_config = get_species_config(species)
+    if not species_config:
+        raise ValueError(f"Unsupported species: {species}")
+
+    parsed = parse_sweep(sweep, species_config, max_points)
+    # Give each swept field its own axis so the arrays broadcast to a grid
+    overrides = {
+        field: values.reshape([-1 if axis == i else 1 for axis in range(len(parsed))])
+        for i, (field, values) in enumerate(parsed)
+    }
+    scores = np.broadcast_to(metrics_analyzer.health_scores(record, overrides),
+                             tuple(len(values) for _, values in parsed))
+
+    return {
+        'species': species,
+        'base_score': float(metrics_analyzer.health_scores(record)),
+        'fields': [field for field, _ in parsed],
+        'values': {field: values.tolist() for field, values in parsed},
+        'scores': np.round(scores, 2).tolist(),
+        'statuses': health_statuses(scores).tolist()
+    }